@@ -0,0 +1,26 @@
+"""add version to tasks and shifts
+
+Revision ID: 0a7c3e5b9d14
+Revises: f2a6d9c41e38
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a7c3e5b9d14'
+down_revision = 'f2a6d9c41e38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('shifts', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('tasks', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('tasks', 'version')
+    op.drop_column('shifts', 'version')
@@ -0,0 +1,40 @@
+"""add updated_at indexes and tombstones for sync
+
+Revision ID: 3d8b6f1a2c57
+Revises: 0a7c3e5b9d14
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d8b6f1a2c57'
+down_revision = '0a7c3e5b9d14'
+branch_labels = None
+depends_on = None
+
+SYNCED_TABLES = ('employees', 'crews', 'robots', 'transports', 'shifts', 'tasks')
+
+
+def upgrade() -> None:
+    for table in SYNCED_TABLES:
+        op.create_index(f'ix_{table}_updated_at', table, ['updated_at'])
+
+    op.create_table(
+        'tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(length=32), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstones_deleted_at', 'tombstones', ['deleted_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tombstones_deleted_at', table_name='tombstones')
+    op.drop_table('tombstones')
+    for table in SYNCED_TABLES:
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
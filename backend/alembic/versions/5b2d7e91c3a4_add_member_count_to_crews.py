@@ -0,0 +1,29 @@
+"""add member_count to crews
+
+Revision ID: 5b2d7e91c3a4
+Revises: add_geojson_filename_to_tasks
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2d7e91c3a4'
+down_revision = 'add_geojson_filename_to_tasks'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('crews', sa.Column('member_count', sa.Integer(), nullable=False, server_default='0'))
+    # Заполняем счётчик по текущему составу команд
+    op.execute("""
+        UPDATE crews
+        SET member_count = (SELECT COUNT(*) FROM employees WHERE employees.crew = crews.id)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('crews', 'member_count')
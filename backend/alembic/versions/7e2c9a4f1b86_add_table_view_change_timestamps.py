@@ -0,0 +1,26 @@
+"""add table view change timestamps and applied ids
+
+Revision ID: 7e2c9a4f1b86
+Revises: 3d8b6f1a2c57
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e2c9a4f1b86'
+down_revision = '3d8b6f1a2c57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('table_view_changes', sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.add_column('user_tables', sa.Column('applied_change_ids', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('user_tables', 'applied_change_ids')
+    op.drop_column('table_view_changes', 'created_at')
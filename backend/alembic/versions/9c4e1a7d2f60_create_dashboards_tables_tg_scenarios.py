@@ -0,0 +1,75 @@
+"""create dashboards, user_tables and tg_scenarios
+
+Revision ID: 9c4e1a7d2f60
+Revises: 5b2d7e91c3a4
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4e1a7d2f60'
+down_revision = '5b2d7e91c3a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('dashboards',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('dashboard_type', sa.String(50), nullable=False),
+        sa.Column('is_public', sa.Boolean(), nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_dashboards_id'), 'dashboards', ['id'], unique=False)
+    op.create_index(op.f('ix_dashboards_owner_id'), 'dashboards', ['owner_id'], unique=False)
+
+    op.create_table('user_tables',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('table_type', sa.String(50), nullable=False),
+        sa.Column('columns', sa.JSON(), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_user_tables_id'), 'user_tables', ['id'], unique=False)
+    op.create_index(op.f('ix_user_tables_owner_id'), 'user_tables', ['owner_id'], unique=False)
+
+    op.create_table('tg_scenarios',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('trigger_keywords', sa.JSON(), nullable=False),
+        sa.Column('message_template', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tg_scenarios_id'), 'tg_scenarios', ['id'], unique=False)
+    op.create_index(op.f('ix_tg_scenarios_owner_id'), 'tg_scenarios', ['owner_id'], unique=False)
+    op.create_index(op.f('ix_tg_scenarios_status'), 'tg_scenarios', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_tg_scenarios_status'), table_name='tg_scenarios')
+    op.drop_index(op.f('ix_tg_scenarios_owner_id'), table_name='tg_scenarios')
+    op.drop_index(op.f('ix_tg_scenarios_id'), table_name='tg_scenarios')
+    op.drop_table('tg_scenarios')
+    op.drop_index(op.f('ix_user_tables_owner_id'), table_name='user_tables')
+    op.drop_index(op.f('ix_user_tables_id'), table_name='user_tables')
+    op.drop_table('user_tables')
+    op.drop_index(op.f('ix_dashboards_owner_id'), table_name='dashboards')
+    op.drop_index(op.f('ix_dashboards_id'), table_name='dashboards')
+    op.drop_table('dashboards')
@@ -0,0 +1,26 @@
+"""add dashboard widgets and tasks.time_start index
+
+Revision ID: b7f3c2a9e481
+Revises: 9c4e1a7d2f60
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7f3c2a9e481'
+down_revision = '9c4e1a7d2f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('dashboards', sa.Column('widgets', sa.JSON(), nullable=True))
+    op.create_index(op.f('ix_tasks_time_start'), 'tasks', ['time_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_tasks_time_start'), table_name='tasks')
+    op.drop_column('dashboards', 'widgets')
@@ -0,0 +1,59 @@
+"""add materialized table views
+
+Revision ID: d41a8e6b0c27
+Revises: b7f3c2a9e481
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41a8e6b0c27'
+down_revision = 'b7f3c2a9e481'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('user_tables', sa.Column('source', sa.String(20), nullable=True))
+    op.add_column('user_tables', sa.Column('filters', sa.JSON(), nullable=True))
+    op.add_column('user_tables', sa.Column('sort', sa.JSON(), nullable=True))
+    op.add_column('user_tables', sa.Column('row_count', sa.Integer(), nullable=True))
+    op.add_column('user_tables', sa.Column('last_change_id', sa.Integer(), nullable=True))
+    op.add_column('user_tables', sa.Column('materialized_at', sa.DateTime(timezone=True), nullable=True))
+
+    op.create_table('table_view_rows',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('table_id', sa.Integer(), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.Column('sort_key', sa.String(512), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.ForeignKeyConstraint(['table_id'], ['user_tables.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_table_view_rows_page', 'table_view_rows', ['table_id', 'sort_key', 'row_id'], unique=False)
+    op.create_index('ix_table_view_rows_row', 'table_view_rows', ['table_id', 'row_id'], unique=False)
+
+    op.create_table('table_view_changes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('source', sa.String(20), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_table_view_changes_source', 'table_view_changes', ['source', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_table_view_changes_source', table_name='table_view_changes')
+    op.drop_table('table_view_changes')
+    op.drop_index('ix_table_view_rows_row', table_name='table_view_rows')
+    op.drop_index('ix_table_view_rows_page', table_name='table_view_rows')
+    op.drop_table('table_view_rows')
+    op.drop_column('user_tables', 'materialized_at')
+    op.drop_column('user_tables', 'last_change_id')
+    op.drop_column('user_tables', 'row_count')
+    op.drop_column('user_tables', 'sort')
+    op.drop_column('user_tables', 'filters')
+    op.drop_column('user_tables', 'source')
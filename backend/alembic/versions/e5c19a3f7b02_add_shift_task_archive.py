@@ -0,0 +1,77 @@
+"""add shift and task archive
+
+Revision ID: e5c19a3f7b02
+Revises: d41a8e6b0c27
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c19a3f7b02'
+down_revision = 'd41a8e6b0c27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('shifts_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('time_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('time_end', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('edited_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_shifts_archive_date', 'shifts_archive', ['date'], unique=False)
+
+    op.create_table('tasks_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('shift_id', sa.Integer(), nullable=False),
+        sa.Column('executor', sa.Integer(), nullable=False),
+        sa.Column('robot_name', sa.Integer(), nullable=True),
+        sa.Column('transport_id', sa.Integer(), nullable=True),
+        sa.Column('time_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('time_end', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('type', sa.Enum('ROUTE', 'CARPET', 'DEMO', 'CUSTOM', name='tasktype'), nullable=False),
+        sa.Column('geojson', sa.JSON(), nullable=True),
+        sa.Column('geojson_filename', sa.String(500), nullable=True),
+        sa.Column('tickets', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['shift_id'], ['shifts_archive.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tasks_archive_shift_id', 'tasks_archive', ['shift_id'], unique=False)
+    op.create_index('ix_tasks_archive_robot_name', 'tasks_archive', ['robot_name'], unique=False)
+    op.create_index('ix_tasks_archive_transport_id', 'tasks_archive', ['transport_id'], unique=False)
+    op.create_index('ix_tasks_archive_time_start', 'tasks_archive', ['time_start'], unique=False)
+    op.create_index('ix_tasks_archive_executor_time', 'tasks_archive', ['executor', 'time_start'], unique=False)
+
+    op.create_table('archive_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('cutoff', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('shifts', sa.Integer(), nullable=False),
+        sa.Column('tasks', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('archive_runs')
+    op.drop_index('ix_tasks_archive_executor_time', table_name='tasks_archive')
+    op.drop_index('ix_tasks_archive_time_start', table_name='tasks_archive')
+    op.drop_index('ix_tasks_archive_transport_id', table_name='tasks_archive')
+    op.drop_index('ix_tasks_archive_robot_name', table_name='tasks_archive')
+    op.drop_index('ix_tasks_archive_shift_id', table_name='tasks_archive')
+    op.drop_table('tasks_archive')
+    op.drop_index('ix_shifts_archive_date', table_name='shifts_archive')
+    op.drop_table('shifts_archive')
@@ -0,0 +1,70 @@
+"""add tasks_enriched projection
+
+Revision ID: f2a6d9c41e38
+Revises: e5c19a3f7b02
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a6d9c41e38'
+down_revision = 'e5c19a3f7b02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('tasks_enriched',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('shift_id', sa.Integer(), nullable=False),
+        sa.Column('executor', sa.Integer(), nullable=False),
+        sa.Column('robot_ref', sa.Integer(), nullable=True),
+        sa.Column('robot_name', sa.Integer(), nullable=True),
+        sa.Column('transport_id', sa.Integer(), nullable=True),
+        sa.Column('time_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('time_end', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('type', sa.Enum('ROUTE', 'CARPET', 'DEMO', 'CUSTOM', name='tasktype'), nullable=False),
+        sa.Column('geojson', sa.JSON(), nullable=True),
+        sa.Column('geojson_filename', sa.String(500), nullable=True),
+        sa.Column('tickets', sa.JSON(), nullable=False),
+        sa.Column('executor_name', sa.String(302), nullable=True),
+        sa.Column('transport_name', sa.String(200), nullable=True),
+        sa.Column('transport_gov_number', sa.String(20), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tasks_enriched_shift', 'tasks_enriched', ['shift_id', 'id'], unique=False)
+    op.create_index('ix_tasks_enriched_executor', 'tasks_enriched', ['executor'], unique=False)
+    op.create_index('ix_tasks_enriched_robot_ref', 'tasks_enriched', ['robot_ref'], unique=False)
+    op.create_index('ix_tasks_enriched_transport_id', 'tasks_enriched', ['transport_id'], unique=False)
+
+    # Начальное заполнение — то же, что task_projection.rebuild
+    op.execute("""
+        INSERT INTO tasks_enriched (
+            id, shift_id, executor, robot_ref, robot_name, transport_id, time_start, time_end, type,
+            geojson, geojson_filename, tickets, executor_name, transport_name, transport_gov_number,
+            created_at, updated_at
+        )
+        SELECT
+            t.id, t.shift_id, t.executor, t.robot_name, COALESCE(r.name, t.robot_name), t.transport_id,
+            t.time_start, t.time_end, t.type, t.geojson, t.geojson_filename, t.tickets,
+            CONCAT(e.firstname, ' ', e.lastname,
+                   CASE WHEN COALESCE(e.patronymic, '') <> '' THEN CONCAT(' ', e.patronymic) ELSE '' END),
+            tr.name, tr.gov_number, t.created_at, t.updated_at
+        FROM tasks t
+        LEFT JOIN employees e ON e.id = t.executor
+        LEFT JOIN transports tr ON tr.id = t.transport_id
+        LEFT JOIN robots r ON r.id = t.robot_name
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_enriched_transport_id', table_name='tasks_enriched')
+    op.drop_index('ix_tasks_enriched_robot_ref', table_name='tasks_enriched')
+    op.drop_index('ix_tasks_enriched_executor', table_name='tasks_enriched')
+    op.drop_index('ix_tasks_enriched_shift', table_name='tasks_enriched')
+    op.drop_table('tasks_enriched')
@@ -0,0 +1,136 @@
+import logging
+
+from sqlalchemy.orm import Session
+from sqlalchemy import func, or_, select, update
+from app.models.database_models import Crew, Employee
+from app.services.registry import registry
+from app.services import table_views
+from app.services import cache
+from app.services import invalidation
+from typing import Dict, List, Optional, Tuple
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+class CrewCapacityError(ValueError):
+    """Команда заполнена: max_members уже достигнут"""
+
+def get_crew(db: Session, crew_id: int) -> Optional[Crew]:
+    return db.query(Crew).filter(Crew.id == crew_id).first()
+
+def get_crews(db: Session, skip: int = 0, limit: int = 100) -> List[Crew]:
+    return db.query(Crew).order_by(Crew.id).offset(skip).limit(limit).all()
+
+def get_crew_roster(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    include_members: bool = False
+) -> Tuple[List[Crew], Dict[int, List[Employee]]]:
+    """Команды со счётчиком участников и (опционально) участниками — два запроса"""
+    crews = get_crews(db, skip=skip, limit=limit)
+    members: Dict[int, List[Employee]] = {crew.id: [] for crew in crews}
+    if include_members and crews:
+        employees = db.query(Employee).filter(
+            Employee.crew.in_(list(members.keys()))
+        ).order_by(Employee.id).all()
+        for employee in employees:
+            members[employee.crew].append(employee)
+    return crews, members
+
+def _capacity_error(db: Session, crew_id: int) -> ValueError:
+    crew = get_crew(db, crew_id)
+    if crew is None:
+        return ValueError(f"Crew with id {crew_id} does not exist")
+    return CrewCapacityError(
+        f"Crew with id {crew_id} is full ({crew.member_count}/{crew.max_members})"
+    )
+
+def reserve_seats(db: Session, crew_id: int, count: int = 1) -> None:
+    """Атомарно занять места в команде одним условным UPDATE.
+
+    Проверка вместимости и инкремент счётчика выполняются в БД одной командой,
+    поэтому параллельные назначения не могут переполнить команду.
+    Коммит остаётся за вызывающей функцией.
+    """
+    if count <= 0:
+        return
+    result = db.execute(
+        update(Crew)
+        .where(
+            Crew.id == crew_id,
+            or_(Crew.max_members.is_(None), Crew.member_count + count <= Crew.max_members)
+        )
+        .values(member_count=Crew.member_count + count)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        raise _capacity_error(db, crew_id)
+
+def release_seats(db: Session, crew_id: int, count: int = 1) -> None:
+    """Освободить места в команде; счётчик не уходит ниже нуля.
+
+    Если освобождать больше, чем занято, счётчик уже разошёлся с участниками:
+    UPDATE не меняет строку, а расхождение пишется в лог, чтобы его заметили.
+    """
+    if count <= 0:
+        return
+    result = db.execute(
+        update(Crew)
+        .where(Crew.id == crew_id, Crew.member_count >= count)
+        .values(member_count=Crew.member_count - count)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        crew = db.query(Crew.member_count).filter(Crew.id == crew_id).first()
+        if crew is not None:
+            logger.warning("Crew %s member_count drift: releasing %s of %s seats", crew_id, count, crew.member_count)
+
+def recount_members(db: Session) -> None:
+    """Пересчитать member_count всех команд по фактическим участникам.
+
+    Для загрузки данных в обход reserve_seats (примеры, синтетика); коммит за вызывающим.
+    """
+    db.execute(
+        update(Crew)
+        .values(member_count=select(func.count(Employee.id)).where(Employee.crew == Crew.id).scalar_subquery())
+        .execution_options(synchronize_session=False)
+    )
+
+def assign_members(db: Session, crew_id: Optional[int], employee_ids: List[int]) -> Tuple[List[int], List[int]]:
+    """Перевести сотрудников в команду (или убрать из команды при crew_id=None).
+
+    Возвращает (перемещённые id, ненайденные id). Все изменения — одна транзакция.
+    """
+    ids = list(dict.fromkeys(employee_ids))
+    # Строки сотрудников блокируются до commit: параллельный перевод тех же людей
+    # дождётся его и увидит уже новые команды, а не освободит старое место второй раз
+    rows = db.query(Employee.id, Employee.crew).filter(Employee.id.in_(ids)).with_for_update().all() if ids else []
+    current = {employee_id: crew for employee_id, crew in rows}
+    missing = [employee_id for employee_id in ids if employee_id not in current]
+    moved = [employee_id for employee_id in ids if employee_id in current and current[employee_id] != crew_id]
+    if not moved:
+        db.rollback()  # снять блокировку строк
+        return moved, missing
+
+    try:
+        if crew_id is not None:
+            reserve_seats(db, crew_id, len(moved))
+        for old_crew, count in Counter(current[employee_id] for employee_id in moved).items():
+            if old_crew is not None:
+                release_seats(db, old_crew, count)
+        db.execute(
+            update(Employee)
+            .where(Employee.id.in_(moved))
+            .values(crew=crew_id)
+            .execution_options(synchronize_session=False)
+        )
+        table_views.record_changes(db, table_views.EMPLOYEES, moved)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    registry.set_employees_crew(moved, crew_id)
+    invalidation.publish(invalidation.EMPLOYEES, moved)
+    cache.invalidate(cache.EMPLOYEES, cache.CREWS)
+    return moved, missing
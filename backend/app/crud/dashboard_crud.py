@@ -0,0 +1,37 @@
+from sqlalchemy.orm import Session
+from app.models.database_models import Dashboard
+from app.models.schemas import DashboardCreate, DashboardUpdate
+from app.crud import row_writes
+from typing import List, Optional
+
+def get_dashboard(db: Session, dashboard_id: int) -> Optional[Dashboard]:
+    return db.query(Dashboard).filter(Dashboard.id == dashboard_id).first()
+
+def get_dashboards(db: Session, skip: int = 0, limit: int = 100, owner_id: int = None) -> List[Dashboard]:
+    query = db.query(Dashboard)
+    if owner_id is not None:
+        query = query.filter(Dashboard.owner_id == owner_id)
+    return query.order_by(Dashboard.id).offset(skip).limit(limit).all()
+
+def create_dashboard(db: Session, dashboard: DashboardCreate, owner_id: int = 1) -> Dashboard:
+    db_dashboard = Dashboard(**dashboard.dict(exclude={"widgets"}), owner_id=owner_id)
+    db_dashboard.widgets = [w.dict() for w in dashboard.widgets]
+    db.add(db_dashboard)
+    db.commit()
+    db.refresh(db_dashboard)
+    return db_dashboard
+
+def update_dashboard(db: Session, dashboard_id: int, dashboard: DashboardUpdate) -> Optional[Dashboard]:
+    update_data = dashboard.dict(exclude_unset=True)
+    if update_data.get('widgets') is not None:
+        update_data['widgets'] = [w.dict() for w in dashboard.widgets]
+    db_dashboard = row_writes.update_row(db, Dashboard, dashboard_id, update_data)
+    if db_dashboard:
+        db.commit()
+    return db_dashboard
+
+def delete_dashboard(db: Session, dashboard_id: int) -> bool:
+    if row_writes.delete_row(db, Dashboard, dashboard_id) is None:
+        return False
+    db.commit()
+    return True
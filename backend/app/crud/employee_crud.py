@@ -2,11 +2,23 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from app.models.database_models import Employee, Crew
 from app.models.schemas import EmployeeCreate, EmployeeUpdate
-from typing import List, Optional
+from app.crud import crew_crud
+from app.crud import multiget, row_writes
+from app.services import search_index
+from app.services.registry import registry
+from app.services import table_views
+from app.services import cache
+from app.services import invalidation
+from app.services import task_projection
+from app.services import sync
+from typing import List, Optional, Tuple
 
 def get_employee(db: Session, employee_id: int) -> Optional[Employee]:
     return db.query(Employee).filter(Employee.id == employee_id).first()
 
+def get_employees_by_ids(db: Session, ids: List[int]) -> Tuple[List[Employee], List[int]]:
+    return multiget.by_ids(db, Employee, ids)
+
 def get_employees(db: Session, skip: int = 0, limit: int = 100) -> List[Employee]:
     return db.query(Employee).offset(skip).limit(limit).all()
 
@@ -55,36 +67,69 @@ def crew_exists(db: Session, crew_id: int) -> bool:
     return db.query(Crew).filter(Crew.id == crew_id).first() is not None
 
 def create_employee(db: Session, employee: EmployeeCreate) -> Employee:
-    # Проверяем, что crew существует, если указан
-    if employee.crew is not None and not crew_exists(db, employee.crew):
-        raise ValueError(f"Crew with id {employee.crew} does not exist")
-    
-    db_employee = Employee(**employee.dict())
-    db.add(db_employee)
-    db.commit()
+    # Занимаем место в команде: заодно проверяется, что crew существует и не заполнена
+    try:
+        if employee.crew is not None:
+            crew_crud.reserve_seats(db, employee.crew)
+
+        db_employee = Employee(**employee.dict())
+        db.add(db_employee)
+        db.flush()
+        table_views.record_change(db, table_views.EMPLOYEES, db_employee.id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     db.refresh(db_employee)
+    search_index.index_employee(db_employee)
+    registry.put_employee(db_employee)
+    invalidation.publish(invalidation.EMPLOYEES, [db_employee.id])
+    cache.invalidate(cache.EMPLOYEES, cache.CREWS)
     return db_employee
 
 def update_employee(db: Session, employee_id: int, employee: EmployeeUpdate) -> Optional[Employee]:
-    db_employee = get_employee(db, employee_id)
-    if db_employee:
-        update_data = employee.dict(exclude_unset=True)
-        
-        # Проверяем, что crew существует, если указан
-        if 'crew' in update_data and update_data['crew'] is not None:
-            if not crew_exists(db, update_data['crew']):
-                raise ValueError(f"Crew with id {update_data['crew']} does not exist")
-        
-        for field, value in update_data.items():
-            setattr(db_employee, field, value)
+    update_data = employee.dict(exclude_unset=True)
+    try:
+        if 'crew' in update_data:
+            # Перевод в другую команду: нужна текущая команда, строка блокируется до commit
+            current = db.query(Employee.crew).filter(Employee.id == employee_id).with_for_update().first()
+            if current is None:
+                return None
+            # Атомарно занимаем место в новой команде и освобождаем в старой
+            if update_data['crew'] != current.crew:
+                if update_data['crew'] is not None:
+                    crew_crud.reserve_seats(db, update_data['crew'])
+                if current.crew is not None:
+                    crew_crud.release_seats(db, current.crew)
+
+        db_employee = row_writes.update_row(db, Employee, employee_id, update_data)
+        if db_employee is None:
+            db.rollback()
+            return None
+        table_views.record_change(db, table_views.EMPLOYEES, employee_id)
+        if update_data.keys() & {'firstname', 'lastname', 'patronymic'}:
+            task_projection.refresh_employees(db, [employee_id])
         db.commit()
-        db.refresh(db_employee)
+    except Exception:
+        db.rollback()
+        raise
+    search_index.index_employee(db_employee)
+    registry.put_employee(db_employee)
+    invalidation.publish(invalidation.EMPLOYEES, [employee_id])
+    cache.invalidate(cache.EMPLOYEES, cache.CREWS)
     return db_employee
 
 def delete_employee(db: Session, employee_id: int) -> bool:
-    db_employee = get_employee(db, employee_id)
-    if db_employee:
-        db.delete(db_employee)
-        db.commit()
-        return True
-    return False
+    deleted = row_writes.delete_row(db, Employee, employee_id, columns=[Employee.crew])
+    if deleted is None:
+        return False
+    if deleted.crew is not None:
+        crew_crud.release_seats(db, deleted.crew)
+    table_views.record_change(db, table_views.EMPLOYEES, employee_id)
+    sync.record_deletes(db, sync.EMPLOYEES, [employee_id])
+    db.commit()
+    search_index.remove(search_index.EMPLOYEE, employee_id)
+    registry.remove_employee(employee_id)
+    invalidation.publish(invalidation.EMPLOYEES, [employee_id])
+    cache.invalidate(cache.EMPLOYEES, cache.CREWS)
+    return True
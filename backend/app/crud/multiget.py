@@ -0,0 +1,37 @@
+"""Выборка нескольких строк по списку id (?ids=1,2,3).
+
+Одним запросом WHERE id IN (...) вместо запроса на каждую карточку. Порядок
+результата совпадает с порядком id в запросе, повторы схлопываются;
+ненайденные id возвращаются отдельно — роутер отдаёт их в заголовке
+X-Missing-Ids, не меняя формы ответа списочной ручки.
+"""
+from typing import List, Tuple
+
+from sqlalchemy.orm import Session
+
+MAX_IDS = 500
+MISSING_HEADER = "X-Missing-Ids"
+
+
+def parse_ids(raw: str) -> List[int]:
+    """"1,2,3" -> [1, 2, 3]; ValueError, если список пуст, слишком длинный или содержит не числа"""
+    try:
+        ids = [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise ValueError("ids должен быть списком целых чисел через запятую")
+    if not ids:
+        raise ValueError("ids не может быть пустым")
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_IDS:
+        raise ValueError(f"Не больше {MAX_IDS} id за запрос")
+    return ids
+
+
+def by_ids(db: Session, model, ids: List[int]) -> Tuple[list, List[int]]:
+    """(найденные строки в порядке ids, ненайденные id)"""
+    found = {row.id: row for row in db.query(model).filter(model.id.in_(ids))}
+    return [found[i] for i in ids if i in found], [i for i in ids if i not in found]
+
+
+def missing_header(missing: List[int]) -> str:
+    return ",".join(str(i) for i in missing)
@@ -1,7 +1,14 @@
 from sqlalchemy.orm import Session
 from app.models.database_models import Robots
 from app.models.schemas import RobotsCreate, RobotsUpdate
-from typing import List, Optional
+from app.crud import multiget, row_writes
+from app.services import search_index
+from app.services.registry import registry
+from app.services import cache
+from app.services import invalidation
+from app.services import task_projection
+from app.services import sync
+from typing import List, Optional, Tuple
 
 def get_robot(db: Session, robot_id: int) -> Optional[Robots]:
     return db.query(Robots).filter(Robots.id == robot_id).first()
@@ -9,11 +16,14 @@ def get_robot(db: Session, robot_id: int) -> Optional[Robots]:
 def get_robot_by_name(db: Session, name: int) -> Optional[Robots]:
     return db.query(Robots).filter(Robots.name == name).first()
 
+def get_robots_by_ids(db: Session, ids: List[int]) -> Tuple[List[Robots], List[int]]:
+    return multiget.by_ids(db, Robots, ids)
+
 def get_robots(db: Session, skip: int = 0, limit: int = 100) -> List[Robots]:
     return db.query(Robots).offset(skip).limit(limit).all()
 
 def get_robots_by_series(db: Session, series: int) -> List[Robots]:
-    return db.query(Robots).filter(Robots.series == series).all()
+    return registry.robots_by_series(db, series)
 
 def get_robots_with_blockers(db: Session) -> List[Robots]:
     return db.query(Robots).filter(Robots.has_blockers == True).all()
@@ -21,24 +31,38 @@ def get_robots_with_blockers(db: Session) -> List[Robots]:
 def create_robot(db: Session, robot: RobotsCreate) -> Robots:
     db_robot = Robots(**robot.dict())
     db.add(db_robot)
+    db.flush()
+    # Задачи сопоставляются с роботом по id (см. task_projection)
+    task_projection.refresh_robots(db, [db_robot.id])
     db.commit()
     db.refresh(db_robot)
+    search_index.index_robot(db_robot)
+    registry.put_robot(db_robot)
+    invalidation.publish(invalidation.ROBOTS, [db_robot.id])
+    cache.invalidate(cache.ROBOTS)
     return db_robot
 
 def update_robot(db: Session, robot_id: int, robot: RobotsUpdate) -> Optional[Robots]:
-    db_robot = get_robot(db, robot_id)
+    update_data = robot.dict(exclude_unset=True)
+    db_robot = row_writes.update_row(db, Robots, robot_id, update_data)
     if db_robot:
-        update_data = robot.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_robot, field, value)
+        if 'name' in update_data:
+            task_projection.refresh_robots(db, [robot_id])
         db.commit()
-        db.refresh(db_robot)
+        search_index.index_robot(db_robot)
+        registry.put_robot(db_robot)
+        invalidation.publish(invalidation.ROBOTS, [robot_id])
+        cache.invalidate(cache.ROBOTS)
     return db_robot
 
 def delete_robot(db: Session, robot_id: int) -> bool:
-    db_robot = get_robot(db, robot_id)
-    if db_robot:
-        db.delete(db_robot)
-        db.commit()
-        return True
-    return False
+    if row_writes.delete_row(db, Robots, robot_id) is None:
+        return False
+    task_projection.refresh_robots(db, [robot_id])
+    sync.record_deletes(db, sync.ROBOTS, [robot_id])
+    db.commit()
+    search_index.remove(search_index.ROBOT, robot_id)
+    registry.remove_robot(robot_id)
+    invalidation.publish(invalidation.ROBOTS, [robot_id])
+    cache.invalidate(cache.ROBOTS)
+    return True
@@ -0,0 +1,112 @@
+"""Изменение и удаление строки по id одной SQL-инструкцией.
+
+update_row выполняет UPDATE ... WHERE id = :id без предварительного SELECT;
+отсутствие строки определяется по rowcount. Свежие значения (включая
+onupdate-колонки вроде updated_at) возвращает RETURNING, если диалект его
+поддерживает (SQLite, PostgreSQL); иначе (MySQL) строка дочитывается одним
+SELECT по первичному ключу. delete_row аналогично выполняет один DELETE и
+через RETURNING отдаёт нужные вызывающему колонки удалённой строки.
+
+Если у модели есть колонка version, каждое изменение увеличивает её на 1.
+expected_version (заголовок If-Match) добавляет в WHERE условие на версию:
+конкурентная правка сделает rowcount нулевым, и тогда VersionConflict
+отличается от «не найдено» одним дополнительным SELECT — только на этом пути.
+
+Функции не делают commit: побочные действия (журнал представлений, проекция)
+выполняются вызывающим в той же транзакции. Возвращаемый объект отсоединён от
+сессии, поэтому commit не сбрасывает его атрибуты и не требует refresh.
+"""
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+
+class VersionConflict(Exception):
+    """Строка изменена после того, как клиент прочитал её версию"""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Версия изменилась: текущая {current_version}")
+        self.current_version = current_version
+
+
+def versioned(model) -> bool:
+    return "version" in model.__table__.columns
+
+
+def parse_if_match(header: Optional[str]) -> Optional[int]:
+    """Версия из If-Match ("3", W/"3" или 3); None — заголовка нет или он равен *"""
+    if header is None:
+        return None
+    value = header.strip()
+    if value == "*":
+        return None
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise ValueError("If-Match должен содержать версию, полученную в ETag")
+
+
+def etag(version: Optional[int]) -> Optional[str]:
+    return f'"{version}"' if version is not None else None
+
+
+def _where(model, statement, row_id: int, expected_version: Optional[int]):
+    statement = statement.where(model.id == row_id)
+    if expected_version is not None and versioned(model):
+        statement = statement.where(model.version == expected_version)
+    return statement
+
+
+def _raise_if_conflict(db: Session, model, row_id: int, expected_version: Optional[int]) -> None:
+    """Инструкция не затронула строк: если строка существует, значит не совпала версия"""
+    if expected_version is None or not versioned(model):
+        return
+    current = db.execute(select(model.version).where(model.id == row_id)).scalar()
+    if current is not None:
+        db.rollback()
+        raise VersionConflict(current)
+
+
+def update_row(db: Session, model, row_id: int, values: Dict[str, Any],
+               expected_version: Optional[int] = None):
+    """UPDATE строки; возвращает отсоединённый объект со свежими значениями или None, если строки нет"""
+    values = dict(values)
+    if versioned(model):
+        values["version"] = model.version + 1
+    statement = _where(model, update(model), row_id, expected_version).values(**values)
+
+    if db.get_bind().dialect.update_returning:
+        obj = db.execute(statement.returning(model), execution_options={"populate_existing": True}).scalars().first()
+    else:
+        result = db.execute(statement)
+        obj = db.get(model, row_id, populate_existing=True) if result.rowcount else None
+    if obj is None:
+        _raise_if_conflict(db, model, row_id, expected_version)
+        return None
+    db.expunge(obj)
+    return obj
+
+
+def delete_row(db: Session, model, row_id: int, expected_version: Optional[int] = None,
+               columns: Sequence = ()) -> Optional[Row]:
+    """DELETE строки; возвращает запрошенные колонки удалённой строки (и id) или None, если строки нет"""
+    columns = [model.id, *columns]
+    statement = _where(model, delete(model), row_id, expected_version)
+
+    if db.get_bind().dialect.delete_returning:
+        row = db.execute(statement.returning(*columns)).first()
+    else:
+        row = db.execute(_where(model, select(*columns), row_id, expected_version)).first() if len(columns) > 1 else None
+        result = db.execute(statement)
+        if not result.rowcount:
+            row = None
+        elif row is None:
+            row = (row_id,)
+    if row is None:
+        _raise_if_conflict(db, model, row_id, expected_version)
+        return None
+    return row
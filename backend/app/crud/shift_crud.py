@@ -1,21 +1,43 @@
 from sqlalchemy.orm import Session, joinedload
-from app.models.database_models import Shift, Task, Employee, Transport, Robots
-from app.models.schemas import ShiftCreate, ShiftUpdate
-from typing import List, Optional
+from app.models.database_models import Shift, ShiftArchive, Task
+from app.models.schemas import ShiftCreate, ShiftUpdate, ShiftWithEnrichedTasks, EnrichedTaskForShift
+from app.crud import multiget, row_writes
+from app.services.registry import registry
+from app.services import widgets
+from app.services import table_views
+from app.services import cache
+from app.services import invalidation
+from app.services import archive
+from app.services import task_projection
+from app.services import sync
+from typing import List, Optional, Tuple
 from datetime import datetime
 
 def get_shift(db: Session, shift_id: int) -> Optional[Shift]:
     return db.query(Shift).filter(Shift.id == shift_id).first()
 
+def get_shifts_by_ids(db: Session, ids: List[int]) -> Tuple[List[Shift], List[int]]:
+    """Смены по списку id в порядке ids (ненайденные ищутся в архиве) и id, которых нет нигде"""
+    shifts, missing = multiget.by_ids(db, Shift, ids)
+    if missing and archive.watermark(db) is not None:
+        archived, missing = multiget.by_ids(db, ShiftArchive, missing)
+        found = {shift.id: shift for shift in shifts + archived}
+        shifts = [found[i] for i in ids if i in found]
+    return shifts, missing
+
 def get_shift_with_tasks(db: Session, shift_id: int) -> Optional[Shift]:
-    """Получить смену с задачами и связанными данными"""
-    return db.query(Shift).options(
-        joinedload(Shift.tasks).joinedload(Task.executor_rel),
-        joinedload(Shift.tasks).joinedload(Task.transport_rel)
+    """Получить смену с задачами (справочные данные берутся из реестра); ищется и в архиве"""
+    shift = db.query(Shift).options(
+        joinedload(Shift.tasks)
     ).filter(Shift.id == shift_id).first()
+    if shift is None and archive.watermark(db) is not None:
+        shift = db.query(ShiftArchive).options(
+            joinedload(ShiftArchive.tasks)
+        ).filter(ShiftArchive.id == shift_id).first()
+    return shift
 
 def enrich_task_data(task: Task, db: Session) -> dict:
-    """Обогатить данные задачи дополнительной информацией"""
+    """Обогатить данные задачи дополнительной информацией из реестра справочников"""
     task_data = {
         'id': task.id,
         'executor': task.executor,
@@ -35,21 +57,21 @@ def enrich_task_data(task: Task, db: Session) -> dict:
     }
     
     # Добавляем ФИО исполнителя
-    if task.executor_rel:
-        executor = task.executor_rel
+    executor = registry.employee(db, task.executor)
+    if executor:
         executor_name_parts = [executor.firstname, executor.lastname]
         if executor.patronymic:
             executor_name_parts.append(executor.patronymic)
         task_data['executor_name'] = ' '.join(executor_name_parts)
     
     # Добавляем информацию о транспорте
-    if task.transport_rel:
-        transport = task.transport_rel
+    transport = registry.transport(db, task.transport_id) if task.transport_id is not None else None
+    if transport:
         task_data['transport_name'] = transport.name
         task_data['transport_gov_number'] = transport.gov_number
     
     # Получаем имя робота по его ID
-    robot = db.query(Robots).filter(Robots.id == task.robot_name).first()
+    robot = registry.robot(db, task.robot_name) if task.robot_name is not None else None
     if robot:
         task_data['robot_name'] = robot.name
     
@@ -78,12 +100,100 @@ def get_shifts_by_date(db: Session, date: datetime) -> List[Shift]:
         print(f"Error in get_shifts_by_date CRUD: {e}")
         raise
 
+def get_shifts_with_tasks_by_date(db: Session, date: datetime) -> List[Shift]:
+    """Получить смены за дату вместе с задачами одним запросом"""
+    start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
+    end_of_day = date.replace(hour=23, minute=59, second=59, microsecond=999999)
+    models = [Shift, ShiftArchive] if archive.reaches_shifts(db, start_of_day) else [Shift]
+    shifts = []
+    for model in models:
+        shifts += db.query(model).options(
+            joinedload(model.tasks)
+        ).filter(
+            model.date >= start_of_day,
+            model.date <= end_of_day
+        ).order_by(model.time_start, model.id).all()
+    if len(models) > 1:
+        shifts.sort(key=lambda shift: (shift.time_start, shift.id))
+    return shifts
+
+def _shift_view(shift, tasks: List[EnrichedTaskForShift]) -> ShiftWithEnrichedTasks:
+    return ShiftWithEnrichedTasks(
+        id=shift.id,
+        date=shift.date,
+        time_start=shift.time_start,
+        time_end=shift.time_end,
+        edited_at=shift.edited_at,
+        created_at=shift.created_at,
+        updated_at=shift.updated_at,
+        version=getattr(shift, 'version', None),
+        tasks=tasks
+    )
+
+def _hot_views(db: Session, shifts: List[Shift]) -> List[ShiftWithEnrichedTasks]:
+    """Задачи горячих смен — готовые строки проекции tasks_enriched, один запрос на все смены"""
+    tasks = task_projection.tasks_by_shift(db, [shift.id for shift in shifts])
+    return [
+        _shift_view(shift, [EnrichedTaskForShift.model_validate(task) for task in tasks[shift.id]])
+        for shift in shifts
+    ]
+
+def _archived_view(db: Session, shift: ShiftArchive) -> ShiftWithEnrichedTasks:
+    """Архивные задачи не входят в проекцию — обогащаются из реестра"""
+    registry.prefetch(
+        db,
+        robot_ids=[task.robot_name for task in shift.tasks],
+        transport_ids=[task.transport_id for task in shift.tasks],
+        employee_ids=[task.executor for task in shift.tasks],
+    )
+    return _shift_view(shift, [EnrichedTaskForShift(**enrich_task_data(task, db)) for task in shift.tasks])
+
+def get_shift_view(db: Session, shift_id: int) -> Optional[ShiftWithEnrichedTasks]:
+    """Смена с обогащёнными задачами (данные для /shifts/{shift_id}); ищется и в архиве"""
+    shift = get_shift(db, shift_id)
+    if shift is not None:
+        return _hot_views(db, [shift])[0]
+    if archive.watermark(db) is not None:
+        shift = db.query(ShiftArchive).options(
+            joinedload(ShiftArchive.tasks)
+        ).filter(ShiftArchive.id == shift_id).first()
+        if shift is not None:
+            return _archived_view(db, shift)
+    return None
+
+def get_day_view(db: Session, date: datetime) -> List[ShiftWithEnrichedTasks]:
+    """Смены за дату с обогащёнными задачами (данные для /shifts/date/{date})"""
+    start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
+    end_of_day = date.replace(hour=23, minute=59, second=59, microsecond=999999)
+    views = _hot_views(db, db.query(Shift).filter(
+        Shift.date >= start_of_day,
+        Shift.date <= end_of_day
+    ).order_by(Shift.time_start, Shift.id).all())
+    if archive.reaches_shifts(db, start_of_day):
+        views += [
+            _archived_view(db, shift)
+            for shift in db.query(ShiftArchive).options(
+                joinedload(ShiftArchive.tasks)
+            ).filter(
+                ShiftArchive.date >= start_of_day,
+                ShiftArchive.date <= end_of_day
+            ).all()
+        ]
+        views.sort(key=lambda view: (view.time_start, view.id))
+    return views
+
 def get_shifts_by_date_range(db: Session, start_date: datetime, end_date: datetime) -> List[Shift]:
-    """Получить смены в диапазоне дат"""
-    return db.query(Shift).filter(
+    """Получить смены в диапазоне дат (из архива — если диапазон начинается до его границы)"""
+    shifts = db.query(Shift).filter(
         Shift.date >= start_date,
         Shift.date <= end_date
     ).all()
+    if archive.reaches_shifts(db, start_date):
+        shifts += db.query(ShiftArchive).filter(
+            ShiftArchive.date >= start_date,
+            ShiftArchive.date <= end_date
+        ).all()
+    return shifts
 
 def get_active_shifts(db: Session, current_time: datetime = None) -> List[Shift]:
     """Получить активные смены (текущее время между time_start и time_end)"""
@@ -97,24 +207,32 @@ def get_active_shifts(db: Session, current_time: datetime = None) -> List[Shift]
 def create_shift(db: Session, shift: ShiftCreate) -> Shift:
     db_shift = Shift(**shift.dict())
     db.add(db_shift)
+    db.flush()
+    table_views.record_change(db, table_views.SHIFTS, db_shift.id)
     db.commit()
+    widgets.invalidate()
+    cache.invalidate(cache.SHIFTS)
+    invalidation.publish(invalidation.SHIFTS, [db_shift.id])
     db.refresh(db_shift)
     return db_shift
 
-def update_shift(db: Session, shift_id: int, shift: ShiftUpdate) -> Optional[Shift]:
-    db_shift = get_shift(db, shift_id)
+def update_shift(db: Session, shift_id: int, shift: ShiftUpdate, expected_version: int = None) -> Optional[Shift]:
+    db_shift = row_writes.update_row(db, Shift, shift_id, shift.dict(exclude_unset=True), expected_version)
     if db_shift:
-        update_data = shift.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_shift, field, value)
+        table_views.record_change(db, table_views.SHIFTS, shift_id)
         db.commit()
-        db.refresh(db_shift)
+        widgets.invalidate()
+        cache.invalidate(cache.SHIFTS)
+        invalidation.publish(invalidation.SHIFTS, [shift_id])
     return db_shift
 
-def delete_shift(db: Session, shift_id: int) -> bool:
-    db_shift = get_shift(db, shift_id)
-    if db_shift:
-        db.delete(db_shift)
-        db.commit()
-        return True
-    return False
+def delete_shift(db: Session, shift_id: int, expected_version: int = None) -> bool:
+    if row_writes.delete_row(db, Shift, shift_id, expected_version) is None:
+        return False
+    table_views.record_change(db, table_views.SHIFTS, shift_id)
+    sync.record_deletes(db, sync.SHIFTS, [shift_id])
+    db.commit()
+    widgets.invalidate()
+    cache.invalidate(cache.SHIFTS)
+    invalidation.publish(invalidation.SHIFTS, [shift_id])
+    return True
@@ -0,0 +1,51 @@
+from sqlalchemy.orm import Session
+from app.models.database_models import UserTable, TableViewRow
+from app.models.schemas import TableCreate, TableUpdate
+from app.crud import row_writes
+from app.services import table_views
+from typing import List, Optional
+
+def get_table(db: Session, table_id: int) -> Optional[UserTable]:
+    return db.query(UserTable).filter(UserTable.id == table_id).first()
+
+def get_tables(db: Session, skip: int = 0, limit: int = 100, owner_id: int = None) -> List[UserTable]:
+    query = db.query(UserTable)
+    if owner_id is not None:
+        query = query.filter(UserTable.owner_id == owner_id)
+    return query.order_by(UserTable.id).offset(skip).limit(limit).all()
+
+VIEW_FIELDS = {'source', 'columns', 'filters', 'sort'}
+
+def create_table(db: Session, table: TableCreate, owner_id: int = 1) -> UserTable:
+    data = table.dict()
+    table_views.validate_view(data['source'], data['columns'], data['filters'], data['sort'])
+    db_table = UserTable(**data, owner_id=owner_id)
+    db.add(db_table)
+    db.commit()
+    db.refresh(db_table)
+    return db_table
+
+def update_table(db: Session, table_id: int, table: TableUpdate) -> Optional[UserTable]:
+    update_data = table.dict(exclude_unset=True)
+    if VIEW_FIELDS & update_data.keys():
+        # Новое определение проверяется вместе с текущими полями представления
+        current = db.query(*[getattr(UserTable, field) for field in VIEW_FIELDS]).filter(UserTable.id == table_id).first()
+        if current is None:
+            return None
+        merged = dict(current._mapping)
+        merged.update({k: v for k, v in update_data.items() if k in VIEW_FIELDS})
+        table_views.validate_view(merged['source'], merged['columns'], merged['filters'] or [], merged['sort'] or [])
+        # Определение представления изменилось — материализуем заново при чтении
+        update_data['materialized_at'] = None
+    db_table = row_writes.update_row(db, UserTable, table_id, update_data)
+    if db_table:
+        db.commit()
+    return db_table
+
+def delete_table(db: Session, table_id: int) -> bool:
+    db.query(TableViewRow).filter(TableViewRow.table_id == table_id).delete(synchronize_session=False)
+    if row_writes.delete_row(db, UserTable, table_id) is None:
+        db.rollback()
+        return False
+    db.commit()
+    return True
@@ -1,7 +1,16 @@
 from sqlalchemy.orm import Session
-from app.models.database_models import Task
+from app.models.database_models import Task, TaskArchive
 from app.models.schemas import TaskCreate, TaskUpdate
-from typing import List, Optional
+from app.crud import multiget, row_writes
+from app.services import search_index
+from app.services import widgets
+from app.services import table_views
+from app.services import cache
+from app.services import invalidation
+from app.services import archive
+from app.services import task_projection
+from app.services import sync
+from typing import List, Optional, Tuple
 from datetime import datetime
 
 def get_task(db: Session, task_id: int) -> Optional[Task]:
@@ -10,23 +19,59 @@ def get_task(db: Session, task_id: int) -> Optional[Task]:
 def get_tasks(db: Session, skip: int = 0, limit: int = 100) -> List[Task]:
     return db.query(Task).offset(skip).limit(limit).all()
 
+def get_tasks_by_ids(db: Session, ids: List[int]) -> Tuple[List[Task], List[int]]:
+    """Задачи по списку id в порядке ids (ненайденные ищутся в архиве) и id, которых нет нигде"""
+    tasks, missing = multiget.by_ids(db, Task, ids)
+    if missing and archive.watermark(db) is not None:
+        archived, missing = multiget.by_ids(db, TaskArchive, missing)
+        found = {task.id: task for task in tasks + archived}
+        tasks = [found[i] for i in ids if i in found]
+    return tasks, missing
+
+def get_archived_task(db: Session, task_id: int) -> Optional[TaskArchive]:
+    """Задача из архива (только чтение)"""
+    if archive.watermark(db) is None:
+        return None
+    return db.query(TaskArchive).filter(TaskArchive.id == task_id).first()
+
+def _in_range(query, model, start_date: Optional[datetime], end_date: Optional[datetime]):
+    if start_date is not None:
+        query = query.filter(model.time_start >= start_date)
+    if end_date is not None:
+        query = query.filter(model.time_end <= end_date)
+    return query
+
+def _with_archive(db: Session, build, start_date: Optional[datetime]) -> list:
+    """build(model) строит запрос; архив читается, только если диапазон до него дотягивается"""
+    tasks = build(Task).all()
+    if archive.reaches_tasks(db, start_date):
+        tasks += build(TaskArchive).all()
+    return tasks
+
 def get_tasks_by_shift(db: Session, shift_id: int) -> List[Task]:
-    return db.query(Task).filter(Task.shift_id == shift_id).all()
+    tasks = db.query(Task).filter(Task.shift_id == shift_id).all()
+    if not tasks and archive.watermark(db) is not None:
+        # Смена целиком либо в горячей таблице, либо в архиве
+        tasks = db.query(TaskArchive).filter(TaskArchive.shift_id == shift_id).all()
+    return tasks
 
-def get_tasks_by_executor(db: Session, executor_id: int) -> List[Task]:
-    return db.query(Task).filter(Task.executor == executor_id).all()
+def get_tasks_by_executor(db: Session, executor_id: int, start_date: datetime = None, end_date: datetime = None) -> List[Task]:
+    return _with_archive(db, lambda model: _in_range(
+        db.query(model).filter(model.executor == executor_id), model, start_date, end_date
+    ), start_date)
 
-def get_tasks_by_robot(db: Session, robot_name: int) -> List[Task]:
-    return db.query(Task).filter(Task.robot_name == robot_name).all()
+def get_tasks_by_robot(db: Session, robot_name: int, start_date: datetime = None, end_date: datetime = None) -> List[Task]:
+    return _with_archive(db, lambda model: _in_range(
+        db.query(model).filter(model.robot_name == robot_name), model, start_date, end_date
+    ), start_date)
 
-def get_tasks_by_transport(db: Session, transport_id: int) -> List[Task]:
-    return db.query(Task).filter(Task.transport_id == transport_id).all()
+def get_tasks_by_transport(db: Session, transport_id: int, start_date: datetime = None, end_date: datetime = None) -> List[Task]:
+    return _with_archive(db, lambda model: _in_range(
+        db.query(model).filter(model.transport_id == transport_id), model, start_date, end_date
+    ), start_date)
 
 def get_tasks_by_date_range(db: Session, start_date: datetime, end_date: datetime) -> List[Task]:
-    return db.query(Task).filter(
-        Task.time_start >= start_date,
-        Task.time_end <= end_date
-    ).all()
+    return _with_archive(db, lambda model: _in_range(db.query(model), model, start_date, end_date), start_date)
 
 def get_active_tasks(db: Session, current_time: datetime = None) -> List[Task]:
     if current_time is None:
@@ -42,24 +87,38 @@ def get_tasks_by_type(db: Session, task_type: str) -> List[Task]:
 def create_task(db: Session, task: TaskCreate) -> Task:
     db_task = Task(**task.dict())
     db.add(db_task)
+    db.flush()
+    table_views.record_change(db, table_views.TASKS, db_task.id)
+    task_projection.project_tasks(db, [db_task.id])
     db.commit()
+    widgets.invalidate()
+    cache.invalidate(cache.TASKS)
     db.refresh(db_task)
+    search_index.index_task(db_task)
+    invalidation.publish(invalidation.TASKS, [db_task.id])
     return db_task
 
-def update_task(db: Session, task_id: int, task: TaskUpdate) -> Optional[Task]:
-    db_task = get_task(db, task_id)
+def update_task(db: Session, task_id: int, task: TaskUpdate, expected_version: int = None) -> Optional[Task]:
+    db_task = row_writes.update_row(db, Task, task_id, task.dict(exclude_unset=True), expected_version)
     if db_task:
-        update_data = task.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_task, field, value)
+        table_views.record_change(db, table_views.TASKS, task_id)
+        task_projection.project_tasks(db, [task_id])
         db.commit()
-        db.refresh(db_task)
+        widgets.invalidate()
+        cache.invalidate(cache.TASKS)
+        search_index.index_task(db_task)
+        invalidation.publish(invalidation.TASKS, [task_id])
     return db_task
 
-def delete_task(db: Session, task_id: int) -> bool:
-    db_task = get_task(db, task_id)
-    if db_task:
-        db.delete(db_task)
-        db.commit()
-        return True
-    return False
+def delete_task(db: Session, task_id: int, expected_version: int = None) -> bool:
+    if row_writes.delete_row(db, Task, task_id, expected_version) is None:
+        return False
+    table_views.record_change(db, table_views.TASKS, task_id)
+    task_projection.remove_tasks(db, [task_id])
+    sync.record_deletes(db, sync.TASKS, [task_id])
+    db.commit()
+    widgets.invalidate()
+    cache.invalidate(cache.TASKS)
+    search_index.remove(search_index.TASK, task_id)
+    invalidation.publish(invalidation.TASKS, [task_id])
+    return True
@@ -0,0 +1,47 @@
+from sqlalchemy.orm import Session
+from app.models.database_models import TgScenario
+from app.models.schemas import TgScenarioCreate, TgScenarioUpdate
+from app.crud import row_writes
+from app.services import tg_matcher
+from app.services import invalidation
+from typing import List, Optional
+
+def get_scenario(db: Session, scenario_id: int) -> Optional[TgScenario]:
+    return db.query(TgScenario).filter(TgScenario.id == scenario_id).first()
+
+def get_scenarios(db: Session, skip: int = 0, limit: int = 100, owner_id: int = None) -> List[TgScenario]:
+    query = db.query(TgScenario)
+    if owner_id is not None:
+        query = query.filter(TgScenario.owner_id == owner_id)
+    return query.order_by(TgScenario.id).offset(skip).limit(limit).all()
+
+def get_scenarios_by_status(db: Session, status: str) -> List[TgScenario]:
+    return db.query(TgScenario).filter(TgScenario.status == status).order_by(TgScenario.id).all()
+
+def create_scenario(db: Session, scenario: TgScenarioCreate, owner_id: int = 1) -> TgScenario:
+    db_scenario = TgScenario(**scenario.dict(), owner_id=owner_id)
+    db.add(db_scenario)
+    db.commit()
+    tg_matcher.invalidate()
+    invalidation.publish(invalidation.TG_SCENARIOS, [db_scenario.id])
+    db.refresh(db_scenario)
+    return db_scenario
+
+def update_scenario(db: Session, scenario_id: int, scenario: TgScenarioUpdate) -> Optional[TgScenario]:
+    db_scenario = row_writes.update_row(db, TgScenario, scenario_id, scenario.dict(exclude_unset=True))
+    if db_scenario:
+        db.commit()
+        tg_matcher.invalidate()
+        invalidation.publish(invalidation.TG_SCENARIOS, [scenario_id])
+    return db_scenario
+
+def set_scenario_status(db: Session, scenario_id: int, status: str) -> Optional[TgScenario]:
+    return update_scenario(db, scenario_id, TgScenarioUpdate(status=status))
+
+def delete_scenario(db: Session, scenario_id: int) -> bool:
+    if row_writes.delete_row(db, TgScenario, scenario_id) is None:
+        return False
+    db.commit()
+    tg_matcher.invalidate()
+    invalidation.publish(invalidation.TG_SCENARIOS, [scenario_id])
+    return True
@@ -1,11 +1,22 @@
 from sqlalchemy.orm import Session
 from app.models.database_models import Transport
 from app.models.schemas import TransportCreate, TransportUpdate
-from typing import List, Optional
+from app.crud import multiget, row_writes
+from app.services import search_index
+from app.services.registry import registry
+from app.services import cache
+from app.services import invalidation
+from app.services import table_views
+from app.services import task_projection
+from app.services import sync
+from typing import List, Optional, Tuple
 
 def get_transport(db: Session, transport_id: int) -> Optional[Transport]:
     return db.query(Transport).filter(Transport.id == transport_id).first()
 
+def get_transports_by_ids(db: Session, ids: List[int]) -> Tuple[List[Transport], List[int]]:
+    return multiget.by_ids(db, Transport, ids)
+
 def get_transports(db: Session, skip: int = 0, limit: int = 100) -> List[Transport]:
     return db.query(Transport).offset(skip).limit(limit).all()
 
@@ -22,24 +33,38 @@ def get_transports_by_type(db: Session, carsharing: bool = None, corporate: bool
 def create_transport(db: Session, transport: TransportCreate) -> Transport:
     db_transport = Transport(**transport.dict())
     db.add(db_transport)
+    db.flush()
+    table_views.record_change(db, table_views.TRANSPORTS, db_transport.id)
     db.commit()
     db.refresh(db_transport)
+    search_index.index_transport(db_transport)
+    registry.put_transport(db_transport)
+    invalidation.publish(invalidation.TRANSPORTS, [db_transport.id])
+    cache.invalidate(cache.TRANSPORTS)
     return db_transport
 
 def update_transport(db: Session, transport_id: int, transport: TransportUpdate) -> Optional[Transport]:
-    db_transport = get_transport(db, transport_id)
+    update_data = transport.dict(exclude_unset=True)
+    db_transport = row_writes.update_row(db, Transport, transport_id, update_data)
     if db_transport:
-        update_data = transport.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_transport, field, value)
+        table_views.record_change(db, table_views.TRANSPORTS, transport_id)
+        if update_data.keys() & {'name', 'gov_number'}:
+            task_projection.refresh_transports(db, [transport_id])
         db.commit()
-        db.refresh(db_transport)
+        search_index.index_transport(db_transport)
+        registry.put_transport(db_transport)
+        invalidation.publish(invalidation.TRANSPORTS, [transport_id])
+        cache.invalidate(cache.TRANSPORTS)
     return db_transport
 
 def delete_transport(db: Session, transport_id: int) -> bool:
-    db_transport = get_transport(db, transport_id)
-    if db_transport:
-        db.delete(db_transport)
-        db.commit()
-        return True
-    return False
+    if row_writes.delete_row(db, Transport, transport_id) is None:
+        return False
+    table_views.record_change(db, table_views.TRANSPORTS, transport_id)
+    sync.record_deletes(db, sync.TRANSPORTS, [transport_id])
+    db.commit()
+    search_index.remove(search_index.TRANSPORT, transport_id)
+    registry.remove_transport(transport_id)
+    invalidation.publish(invalidation.TRANSPORTS, [transport_id])
+    cache.invalidate(cache.TRANSPORTS)
+    return True
@@ -1,16 +1,41 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from app.config import settings
 
+def _engine_options(url: str) -> dict:
+    if url.startswith("sqlite"):
+        options = {"connect_args": {"check_same_thread": False}}
+        # In-memory SQLite живёт только в рамках одного соединения
+        if ":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite+pysqlite:"):
+            options["poolclass"] = StaticPool
+        return options
+    # Пул соединений: параллельные запросы и фоновые вычисления не делят одно соединение
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": 3600,
+    }
+
 engine = create_engine(
     settings.DATABASE_URL,
-    poolclass=StaticPool,
     pool_pre_ping=True,
-    echo=True
+    echo=True,
+    **_engine_options(settings.DATABASE_URL)
 )
 
+if engine.dialect.name == "mysql":
+    @event.listens_for(engine, "connect")
+    def _set_time_zone(dbapi_connection, connection_record):
+        # NOW() и значения по умолчанию created_at/updated_at — в UTC, независимо от
+        # часового пояса сервера: /sync сравнивает updated_at с часами БД между сессиями
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SET time_zone = %s", (settings.DB_TIME_ZONE,))
+        finally:
+            cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -28,7 +28,7 @@ class Employee(Base):
     crew = Column(Integer, ForeignKey("crews.id"), nullable=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)  # /sync
     
     crew_rel = relationship("Crew", back_populates="members")
 
@@ -45,7 +45,7 @@ class Transport(Base):
     has_blockers = Column(Boolean, default=False)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)  # /sync
 
 class Robots(Base):
     __tablename__ = "robots"
@@ -56,7 +56,7 @@ class Robots(Base):
     has_blockers = Column(Boolean, default=False)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)  # /sync
 
 class Shift(Base):
     __tablename__ = "shifts"
@@ -66,9 +66,10 @@ class Shift(Base):
     time_start = Column(DateTime(timezone=True), nullable=False)
     time_end = Column(DateTime(timezone=True), nullable=False)
     edited_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # ETag / If-Match
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)  # /sync
     
     tasks = relationship("Task", back_populates="shift_rel")
 
@@ -79,10 +80,11 @@ class Crew(Base):
     name = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
     max_members = Column(Integer, default=10)
+    member_count = Column(Integer, nullable=False, default=0, server_default="0")
     owner_id = Column(Integer, nullable=False)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)  # /sync
     
     members = relationship("Employee", back_populates="crew_rel")
 
@@ -94,15 +96,16 @@ class Task(Base):
     executor = Column(Integer, ForeignKey("employees.id"), nullable=False)
     robot_name = Column(Integer, nullable=True)
     transport_id = Column(Integer, ForeignKey("transports.id"), nullable=True)
-    time_start = Column(DateTime(timezone=True), nullable=False)
+    time_start = Column(DateTime(timezone=True), nullable=False, index=True)
     time_end = Column(DateTime(timezone=True), nullable=False)
     type = Column(SQLEnum(TaskType), nullable=False)
     geojson = Column(JSON, nullable=True)
     geojson_filename = Column(String(500), nullable=True)
     tickets = Column(JSON, nullable=False)  # Список ссылок на сторонние ресурсы
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # ETag / If-Match
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)  # /sync
     
     # Relationships
     shift_rel = relationship("Shift", back_populates="tasks")
@@ -112,3 +115,170 @@ class Task(Base):
 # Add back_populates to existing models
 Employee.tasks = relationship("Task", back_populates="executor_rel")
 Transport.tasks = relationship("Task", back_populates="transport_rel")
+
+class Dashboard(Base):
+    __tablename__ = "dashboards"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(200), nullable=False)
+    description = Column(Text, nullable=True)
+    dashboard_type = Column(String(50), nullable=False)
+    is_public = Column(Boolean, default=False)
+    widgets = Column(JSON, nullable=True)
+    owner_id = Column(Integer, nullable=False, index=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class UserTable(Base):
+    __tablename__ = "user_tables"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(200), nullable=False)
+    description = Column(Text, nullable=True)
+    table_type = Column(String(50), nullable=False)
+    columns = Column(JSON, nullable=False)
+    # Сохранённое представление: сущность, фильтры и сортировка
+    source = Column(String(20), nullable=True)
+    filters = Column(JSON, nullable=True)
+    sort = Column(JSON, nullable=True)
+    row_count = Column(Integer, nullable=True)
+    last_change_id = Column(Integer, nullable=True)
+    # id записей журнала выше last_change_id, уже учтённые (моложе TABLE_VIEW_CHANGE_LAG)
+    applied_change_ids = Column(JSON, nullable=True)
+    materialized_at = Column(DateTime(timezone=True), nullable=True)
+    owner_id = Column(Integer, nullable=False, index=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class TgScenario(Base):
+    __tablename__ = "tg_scenarios"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(200), nullable=False)
+    description = Column(Text, nullable=True)
+    trigger_keywords = Column(JSON, nullable=False)
+    message_template = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default="draft", index=True)
+    owner_id = Column(Integer, nullable=False, index=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class TableViewRow(Base):
+    """Материализованная строка сохранённого представления (user_tables)"""
+    __tablename__ = "table_view_rows"
+    
+    id = Column(Integer, primary_key=True)
+    table_id = Column(Integer, ForeignKey("user_tables.id", ondelete="CASCADE"), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    sort_key = Column(String(512), nullable=False)
+    data = Column(JSON, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_table_view_rows_page", "table_id", "sort_key", "row_id"),
+        Index("ix_table_view_rows_row", "table_id", "row_id"),
+    )
+
+class TableViewChange(Base):
+    """Журнал изменённых строк для инкрементального обновления представлений"""
+    __tablename__ = "table_view_changes"
+    
+    id = Column(Integer, primary_key=True)
+    source = Column(String(20), nullable=False)
+    row_id = Column(Integer, nullable=True)  # NULL — нужна полная перестройка
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_table_view_changes_source", "source", "id"),
+    )
+
+class ShiftArchive(Base):
+    """Смена, перенесённая из shifts архивацией (id сохраняется)"""
+    __tablename__ = "shifts_archive"
+    
+    id = Column(Integer, primary_key=True)
+    date = Column(DateTime(timezone=True), nullable=False, index=True)
+    time_start = Column(DateTime(timezone=True), nullable=False)
+    time_end = Column(DateTime(timezone=True), nullable=False)
+    edited_at = Column(DateTime(timezone=True), nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    tasks = relationship("TaskArchive", back_populates="shift_rel")
+
+class TaskArchive(Base):
+    """Задача архивной смены. Без внешних ключей на справочники: архив не мешает удалять сотрудников и транспорт"""
+    __tablename__ = "tasks_archive"
+    
+    id = Column(Integer, primary_key=True)
+    shift_id = Column(Integer, ForeignKey("shifts_archive.id"), nullable=False, index=True)
+    executor = Column(Integer, nullable=False)
+    robot_name = Column(Integer, nullable=True, index=True)
+    transport_id = Column(Integer, nullable=True, index=True)
+    time_start = Column(DateTime(timezone=True), nullable=False, index=True)
+    time_end = Column(DateTime(timezone=True), nullable=False)
+    type = Column(SQLEnum(TaskType), nullable=False)
+    geojson = Column(JSON, nullable=True)
+    geojson_filename = Column(String(500), nullable=True)
+    tickets = Column(JSON, nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    shift_rel = relationship("ShiftArchive", back_populates="tasks")
+    
+    __table_args__ = (
+        Index("ix_tasks_archive_executor_time", "executor", "time_start"),
+    )
+
+class ArchiveRun(Base):
+    """Журнал запусков архивации; максимальный cutoff — граница архива"""
+    __tablename__ = "archive_runs"
+    
+    id = Column(Integer, primary_key=True)
+    cutoff = Column(DateTime(timezone=True), nullable=False)
+    shifts = Column(Integer, nullable=False, default=0)
+    tasks = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+class TaskEnriched(Base):
+    """Проекция задачи со справочными данными для чтения смен; поддерживается путями записи в той же транзакции"""
+    __tablename__ = "tasks_enriched"
+    
+    id = Column(Integer, primary_key=True)  # = tasks.id
+    shift_id = Column(Integer, nullable=False)
+    executor = Column(Integer, nullable=False, index=True)
+    robot_ref = Column(Integer, nullable=True, index=True)  # tasks.robot_name как есть
+    robot_name = Column(Integer, nullable=True)  # имя робота из справочника, иначе robot_ref
+    transport_id = Column(Integer, nullable=True, index=True)
+    time_start = Column(DateTime(timezone=True), nullable=False)
+    time_end = Column(DateTime(timezone=True), nullable=False)
+    type = Column(SQLEnum(TaskType), nullable=False)
+    geojson = Column(JSON, nullable=True)
+    geojson_filename = Column(String(500), nullable=True)
+    tickets = Column(JSON, nullable=False)
+    executor_name = Column(String(302), nullable=True)
+    transport_name = Column(String(200), nullable=True)
+    transport_gov_number = Column(String(20), nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        Index("ix_tasks_enriched_shift", "shift_id", "id"),
+    )
+
+class Tombstone(Base):
+    """Удалённые строки сущностей планировщика для /sync; хранятся SYNC_TOMBSTONE_DAYS дней"""
+    __tablename__ = "tombstones"
+    
+    id = Column(Integer, primary_key=True)
+    entity = Column(String(32), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
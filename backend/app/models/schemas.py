@@ -40,11 +40,24 @@ class TaskType(str, Enum):
     DEMO = "demo"
     CUSTOM = "custom"
 
+class WidgetType(str, Enum):
+    TASKS_PER_TYPE_PER_DAY = "tasks_per_type_per_day"
+    ROBOT_HOURS = "robot_hours"
+    TRANSPORT_USAGE = "transport_usage"
+    EXECUTOR_LOAD = "executor_load"
+
+class DashboardWidget(BaseModel):
+    id: str = Field(..., description="Идентификатор виджета внутри дашборда")
+    type: WidgetType = Field(...)
+    title: Optional[str] = Field(None)
+    days: int = Field(30, ge=1, le=3660, description="Период по умолчанию, дней")
+
 class DashboardBase(BaseModel):
     name: str = Field(...)
     description: Optional[str] = Field(None)
     dashboard_type: DashboardType = Field(...)
     is_public: bool = Field(False)
+    widgets: List[DashboardWidget] = Field([])
 
 class DashboardCreate(DashboardBase):
     pass
@@ -54,6 +67,7 @@ class DashboardUpdate(BaseModel):
     description: Optional[str] = None
     dashboard_type: Optional[DashboardType] = None
     is_public: Optional[bool] = None
+    widgets: Optional[List[DashboardWidget]] = None
 
 class Dashboard(DashboardBase):
     id: int
@@ -64,11 +78,54 @@ class Dashboard(DashboardBase):
     class Config:
         from_attributes = True
 
+class WidgetData(BaseModel):
+    id: Optional[str] = None
+    type: WidgetType
+    title: Optional[str] = None
+    date_from: datetime
+    date_to: datetime
+    cached: bool
+    elapsed_ms: float
+    rows: List[Dict[str, Any]]
+
+class DashboardData(BaseModel):
+    dashboard_id: int
+    widgets: List[WidgetData]
+
+class TableSource(str, Enum):
+    TASKS = "tasks"
+    SHIFTS = "shifts"
+    EMPLOYEES = "employees"
+    TRANSPORTS = "transports"
+
+class FilterOp(str, Enum):
+    EQ = "eq"
+    NE = "ne"
+    LT = "lt"
+    LTE = "lte"
+    GT = "gt"
+    GTE = "gte"
+    CONTAINS = "contains"
+    IN = "in"
+    IS_NULL = "is_null"
+
+class TableFilter(BaseModel):
+    column: str = Field(...)
+    op: FilterOp = Field(FilterOp.EQ)
+    value: Any = Field(None)
+
+class TableSort(BaseModel):
+    column: str = Field(...)
+    desc: bool = Field(False)
+
 class TableBase(BaseModel):
     name: str = Field(...)
     description: Optional[str] = Field(None)
     table_type: TableType = Field(...)
     columns: List[str] = Field(...)
+    source: Optional[TableSource] = Field(None, description="Сущность для сохранённого представления")
+    filters: List[TableFilter] = Field([])
+    sort: List[TableSort] = Field([])
 
 class TableCreate(TableBase):
     pass
@@ -78,16 +135,31 @@ class TableUpdate(BaseModel):
     description: Optional[str] = None
     table_type: Optional[TableType] = None
     columns: Optional[List[str]] = None
+    source: Optional[TableSource] = None
+    filters: Optional[List[TableFilter]] = None
+    sort: Optional[List[TableSort]] = None
 
 class Table(TableBase):
     id: int
     created_at: datetime
     updated_at: datetime
     owner_id: int
+    filters: Optional[List[TableFilter]] = []
+    sort: Optional[List[TableSort]] = []
+    row_count: Optional[int] = None
+    materialized_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
+class TableRows(BaseModel):
+    table_id: int
+    total: int
+    skip: int
+    limit: int
+    materialized_at: Optional[datetime] = None
+    rows: List[Dict[str, Any]]
+
 class LegacyShiftBase(BaseModel):
     name: str = Field(...)
     start_time: datetime = Field(...)
@@ -179,6 +251,20 @@ class TgScenario(TgScenarioBase):
     class Config:
         from_attributes = True
 
+class TgMatchRequest(BaseModel):
+    text: str = Field(...)
+
+class TgBatchMatchRequest(BaseModel):
+    messages: List[str] = Field(...)
+
+class TgScenarioMatch(BaseModel):
+    scenario_id: int
+    name: str
+    keywords: List[str]
+
+class TgMatchResult(BaseModel):
+    matches: List[TgScenarioMatch]
+
 class EmployeeBase(BaseModel):
     firstname: str = Field(...)
     lastname: str = Field(...)
@@ -218,6 +304,25 @@ class Employee(EmployeeBase):
     class Config:
         from_attributes = True
 
+class CrewRoster(CrewBase):
+    id: int
+    owner_id: int
+    member_count: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    members: Optional[List[Employee]] = None
+
+    class Config:
+        from_attributes = True
+
+class CrewMembersAssign(BaseModel):
+    employee_ids: List[int] = Field(..., description="ID сотрудников для перевода в команду")
+
+class CrewMembersAssignResult(BaseModel):
+    crew_id: Optional[int] = None
+    moved: List[int] = []
+    missing: List[int] = []
+
 class TransportBase(BaseModel):
     name: str = Field(...)
     model: Optional[str] = Field(None)
@@ -286,6 +391,7 @@ class Shift(ShiftBase):
     edited_at: datetime
     created_at: datetime
     updated_at: datetime
+    version: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -346,6 +452,7 @@ class ShiftWithEnrichedTasks(ShiftBase):
     edited_at: datetime
     created_at: datetime
     updated_at: datetime
+    version: Optional[int] = None
     tasks: List[EnrichedTaskForShift] = []
 
     class Config:
@@ -395,6 +502,104 @@ class Task(TaskBase):
     id: int
     created_at: datetime
     updated_at: datetime
+    version: Optional[int] = None  # у архивных задач версии нет
 
     class Config:
         from_attributes = True
+
+class SearchKind(str, Enum):
+    EMPLOYEE = "employee"
+    ROBOT = "robot"
+    TRANSPORT = "transport"
+    TASK = "task"
+
+class SearchHit(BaseModel):
+    kind: SearchKind
+    id: int
+    title: str
+    subtitle: Optional[str] = None
+    score: int
+
+class ImportEntity(str, Enum):
+    EMPLOYEES = "employees"
+    TRANSPORTS = "transports"
+    ROBOTS = "robots"
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class ImportResult(BaseModel):
+    entity: ImportEntity
+    dry_run: bool
+    total_rows: int
+    imported: int
+    updated: int
+    failed: int
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False
+
+class NotificationRequest(BaseModel):
+    date: datetime
+    scenario_id: int
+    dry_run: bool = False
+
+class NotificationMessage(BaseModel):
+    executor: int
+    chat: str
+    text: str
+
+class NotificationRun(BaseModel):
+    run_id: str
+    status: str
+    created_at: datetime
+    total: int
+    sent: int
+    failed: int
+    retries: int
+    skipped: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    messages: List[NotificationMessage] = []
+
+class JobExportEntity(str, Enum):
+    TASKS = "tasks"
+    SHIFTS = "shifts"
+    EMPLOYEES = "employees"
+    TRANSPORTS = "transports"
+    ROBOTS = "robots"
+
+class JobSubmitted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+class JobStatus(BaseModel):
+    job_id: str
+    name: Optional[str] = None
+    status: str
+    progress: Optional[Dict[str, Any]] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+class ColumnarFormat(str, Enum):
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+class Bootstrap(BaseModel):
+    api: Dict[str, Any]
+    date: datetime
+    employees: List[Employee] = []
+    bodies: List[str] = []
+    crews: List[int] = []
+    robots: List[Robots] = []
+    transports: List[Transport] = []
+    shifts: List[ShiftWithEnrichedTasks] = []
+
+class SyncEntityChanges(BaseModel):
+    created: List[Dict[str, Any]] = []
+    updated: List[Dict[str, Any]] = []
+    deleted: List[int] = []
+
+class SyncResult(BaseModel):
+    token: str
+    changes: Dict[str, SyncEntityChanges] = {}
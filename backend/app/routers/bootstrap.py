@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Header, Query, Response
+
+from app.models.schemas import Bootstrap
+from app.services import bootstrap
+
+router = APIRouter()
+
+@router.get("/", response_model=Bootstrap)
+async def get_bootstrap(
+    date: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """Всё, что нужно интерфейсу при запуске, одним ответом: сотрудники, должности, команды,
+    роботы, транспорт и смены за date (по умолчанию — сегодня).
+
+    Ответ несёт ETag; с If-None-Match и неизменными данными возвращается 304 без тела.
+    """
+    body, tag = bootstrap.encode(await bootstrap.collect(date, skip, limit))
+    headers = {"ETag": tag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if bootstrap.not_modified(if_none_match, tag):
+        return Response(status_code=304, headers=headers)
+    if len(body) >= bootstrap.GZIP_MIN_SIZE and bootstrap.accepts_gzip(accept_encoding):
+        body = bootstrap.compress(body)
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from app.models.schemas import Crew, CrewCreate, CrewUpdate, CrewMember, CrewMemberCreate, Employee, EmployeeCreate, EmployeeUpdate
-from app.crud import employee_crud
+from fastapi import APIRouter, HTTPException, Depends, Response
+from typing import List, Optional
+from app.models.schemas import Crew, CrewCreate, CrewUpdate, CrewMember, CrewMemberCreate, Employee, EmployeeCreate, EmployeeUpdate, CrewRoster, CrewMembersAssign, CrewMembersAssignResult
+from app.crud import employee_crud, crew_crud, multiget
 from app.database import get_db
+from app.services import cache
 from sqlalchemy.orm import Session
 from datetime import datetime
 
@@ -10,6 +11,7 @@ router = APIRouter()
 
 @router.get("/employees", response_model=List[Employee])
 async def get_employees(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     body: str = None,
@@ -18,11 +20,20 @@ async def get_employees(
     drive: bool = None,
     telemedicine: bool = None,
     access_to_auto_vc: bool = None,
+    ids: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    return employee_crud.get_employees_with_filters(
-        db, 
-        skip=skip, 
+    """Сотрудники с фильтрами; ids — выборка по списку id через запятую (ненайденные — в заголовке X-Missing-Ids)"""
+    if ids is not None:
+        try:
+            items, missing = employee_crud.get_employees_by_ids(db, multiget.parse_ids(ids))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if missing:
+            response.headers[multiget.MISSING_HEADER] = multiget.missing_header(missing)
+        return items
+    filters = dict(
+        skip=skip,
         limit=limit,
         body=body,
         crew_id=crew_id,
@@ -31,6 +42,11 @@ async def get_employees(
         telemedicine=telemedicine,
         access_to_auto_vc=access_to_auto_vc
     )
+    return cache.fetch(
+        "employees.list", filters, [cache.EMPLOYEES],
+        lambda: employee_crud.get_employees_with_filters(db, **filters),
+        schema=Employee
+    )
 
 @router.get("/employees/bodies", response_model=List[str])
 async def get_employee_bodies(db: Session = Depends(get_db)):
@@ -61,6 +77,8 @@ async def get_employee(employee_id: int, db: Session = Depends(get_db)):
 async def create_employee(employee: EmployeeCreate, db: Session = Depends(get_db)):
     try:
         return employee_crud.create_employee(db, employee)
+    except crew_crud.CrewCapacityError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -71,6 +89,8 @@ async def update_employee(employee_id: int, employee: EmployeeUpdate, db: Sessio
         if not updated_employee:
             raise HTTPException(status_code=404, detail="Сотрудник не найден")
         return updated_employee
+    except crew_crud.CrewCapacityError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -83,6 +103,9 @@ async def delete_employee(employee_id: int, db: Session = Depends(get_db)):
 
 @router.get("/crews", response_model=List[dict])
 async def get_crews_simple(db: Session = Depends(get_db)):
+    return cache.fetch("crews.list", None, [cache.CREWS], lambda: _crews_simple(db))
+
+def _crews_simple(db: Session) -> List[dict]:
     from app.models.database_models import Crew
     crews = db.query(Crew).all()
     return [
@@ -98,6 +121,47 @@ async def get_crews_simple(db: Session = Depends(get_db)):
         for crew in crews
     ]
 
+@router.get("/crews/roster", response_model=List[CrewRoster])
+async def get_crew_roster(
+    skip: int = 0,
+    limit: int = 100,
+    include_members: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Команды с количеством участников и, по запросу, самими участниками"""
+    crews, members = crew_crud.get_crew_roster(db, skip=skip, limit=limit, include_members=include_members)
+    return [
+        CrewRoster(
+            id=crew.id,
+            name=crew.name,
+            description=crew.description,
+            max_members=crew.max_members,
+            owner_id=crew.owner_id,
+            member_count=crew.member_count,
+            created_at=crew.created_at,
+            updated_at=crew.updated_at,
+            members=[Employee.model_validate(m) for m in members[crew.id]] if include_members else None
+        )
+        for crew in crews
+    ]
+
+@router.post("/crews/{crew_id}/members", response_model=CrewMembersAssignResult)
+async def assign_crew_members(crew_id: int, request: CrewMembersAssign, db: Session = Depends(get_db)):
+    """Массово перевести сотрудников в команду с проверкой вместимости"""
+    try:
+        moved, missing = crew_crud.assign_members(db, crew_id, request.employee_ids)
+    except crew_crud.CrewCapacityError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return CrewMembersAssignResult(crew_id=crew_id, moved=moved, missing=missing)
+
+@router.post("/crews/members/unassign", response_model=CrewMembersAssignResult)
+async def unassign_crew_members(request: CrewMembersAssign, db: Session = Depends(get_db)):
+    """Массово убрать сотрудников из их команд"""
+    moved, missing = crew_crud.assign_members(db, None, request.employee_ids)
+    return CrewMembersAssignResult(crew_id=None, moved=moved, missing=missing)
+
 @router.post("/crews", response_model=dict)
 async def create_crew_simple(
     crew_data: dict,
@@ -113,6 +177,7 @@ async def create_crew_simple(
     db.add(crew)
     db.commit()
     db.refresh(crew)
+    cache.invalidate(cache.CREWS)
     
     return {
         "id": crew.id,
@@ -1,66 +1,58 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from app.models.schemas import Dashboard, DashboardCreate, DashboardUpdate
+from typing import List, Optional
 from datetime import datetime
+from sqlalchemy.orm import Session
+from app.models.schemas import Dashboard, DashboardCreate, DashboardUpdate, DashboardData
+from app.crud import dashboard_crud
+from app.database import get_db
+from app.services import widgets
 
 router = APIRouter()
 
-dashboards_db = []
-dashboard_id_counter = 1
-
 @router.get("/", response_model=List[Dashboard])
-async def get_dashboards():
-    return dashboards_db
+async def get_dashboards(
+    skip: int = 0,
+    limit: int = 100,
+    owner_id: int = None,
+    db: Session = Depends(get_db)
+):
+    return dashboard_crud.get_dashboards(db, skip=skip, limit=limit, owner_id=owner_id)
 
 @router.get("/{dashboard_id}", response_model=Dashboard)
-async def get_dashboard(dashboard_id: int):
-    dashboard = next((d for d in dashboards_db if d.id == dashboard_id), None)
+async def get_dashboard(dashboard_id: int, db: Session = Depends(get_db)):
+    dashboard = dashboard_crud.get_dashboard(db, dashboard_id)
     if not dashboard:
         raise HTTPException(status_code=404, detail="Дашборд не найден")
     return dashboard
 
+@router.get("/{dashboard_id}/data", response_model=DashboardData)
+async def get_dashboard_data(
+    dashboard_id: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """Посчитать все виджеты дашборда (параллельно, с кэшем агрегатов)"""
+    dashboard = dashboard_crud.get_dashboard(db, dashboard_id)
+    if not dashboard:
+        raise HTTPException(status_code=404, detail="Дашборд не найден")
+    results = await widgets.evaluate_dashboard(dashboard.widgets or [], date_from, date_to)
+    return DashboardData(dashboard_id=dashboard.id, widgets=results)
+
 @router.post("/", response_model=Dashboard)
-async def create_dashboard(dashboard: DashboardCreate):
-    global dashboard_id_counter
-    
-    new_dashboard = Dashboard(
-        id=dashboard_id_counter,
-        name=dashboard.name,
-        description=dashboard.description,
-        dashboard_type=dashboard.dashboard_type,
-        is_public=dashboard.is_public,
-        created_at=datetime.now(),
-        updated_at=datetime.now(),
-        owner_id=1
-    )
-    
-    dashboards_db.append(new_dashboard)
-    dashboard_id_counter += 1
-    
-    return new_dashboard
+async def create_dashboard(dashboard: DashboardCreate, db: Session = Depends(get_db)):
+    return dashboard_crud.create_dashboard(db, dashboard)
 
 @router.put("/{dashboard_id}", response_model=Dashboard)
-async def update_dashboard(dashboard_id: int, dashboard_update: DashboardUpdate):
-    dashboard = next((d for d in dashboards_db if d.id == dashboard_id), None)
+async def update_dashboard(dashboard_id: int, dashboard_update: DashboardUpdate, db: Session = Depends(get_db)):
+    dashboard = dashboard_crud.update_dashboard(db, dashboard_id, dashboard_update)
     if not dashboard:
         raise HTTPException(status_code=404, detail="Дашборд не найден")
-    
-    update_data = dashboard_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(dashboard, field, value)
-    
-    dashboard.updated_at = datetime.now()
-    
     return dashboard
 
 @router.delete("/{dashboard_id}")
-async def delete_dashboard(dashboard_id: int):
-    global dashboards_db
-    
-    dashboard = next((d for d in dashboards_db if d.id == dashboard_id), None)
-    if not dashboard:
+async def delete_dashboard(dashboard_id: int, db: Session = Depends(get_db)):
+    success = dashboard_crud.delete_dashboard(db, dashboard_id)
+    if not success:
         raise HTTPException(status_code=404, detail="Дашборд не найден")
-    
-    dashboards_db = [d for d in dashboards_db if d.id != dashboard_id]
-    
     return {"message": "Дашборд успешно удален"}
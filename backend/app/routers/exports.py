@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.models.schemas import ColumnarFormat
+from app.services import columnar_export
+
+router = APIRouter()
+
+@router.get("/tasks")
+async def export_tasks(
+    format: ColumnarFormat = ColumnarFormat.PARQUET,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    batch_size: int = Query(columnar_export.DEFAULT_BATCH_SIZE, ge=1000, le=500_000),
+):
+    """Задачи со сменой, исполнителем, транспортом, роботом и метриками геометрии в Parquet / Arrow IPC.
+
+    Строки читаются серверным курсором и отдаются по мере записи групп строк,
+    поэтому объём выгрузки не ограничен памятью процесса.
+    """
+    if start_date and end_date and start_date >= end_date:
+        raise HTTPException(status_code=400, detail="start_date должен быть раньше end_date")
+    media_type, extension = columnar_export.FORMATS[format.value]
+    filename = f"tasks_{datetime.now():%Y%m%d_%H%M%S}.{extension}"
+    return StreamingResponse(
+        columnar_export.stream(format.value, start_date, end_date, batch_size),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.schemas import ImportEntity, ImportResult
+from app.services import bulk_import
+
+router = APIRouter()
+
+@router.post("/{entity}", response_model=ImportResult)
+def import_entities(
+    entity: ImportEntity,
+    file: UploadFile = File(...),
+    upsert: bool = False,
+    dry_run: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Импорт сотрудников, транспорта или роботов из CSV/XLSX.
+
+    upsert — для роботов обновлять существующие записи по name вместо ошибки.
+    dry_run — только валидация, без записи в БД.
+
+    Импорт не атомарен: файл пишется чанками по bulk_import.CHUNK_SIZE строк, каждый в своей
+    транзакции. Строку, которую отвергла БД, или место, где файл перестал
+    читаться, отчёт называет номером строки; остальные строки сохраняются,
+    поэтому после исправления повторно загружать нужно только строки из errors.
+    """
+    try:
+        return bulk_import.import_file(
+            db, entity.value, file.file, file.filename, upsert=upsert, dry_run=dry_run
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,57 @@
+import os
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse
+from celery.result import AsyncResult
+
+from app.models.schemas import JobExportEntity, JobStatus, JobSubmitted
+from app.routers.geojson_decoder import GeoJsonDecodeRequest
+from app.worker import celery_app, decode_geojson, export_entity_csv
+
+router = APIRouter()
+
+def _submitted(request: Request, result: AsyncResult) -> JSONResponse:
+    status_url = str(request.url_for("get_job", job_id=result.id))
+    body = JobSubmitted(job_id=result.id, status=result.state, status_url=status_url)
+    return JSONResponse(status_code=202, content=body.dict(), headers={"Location": status_url})
+
+@router.post("/geojson/decode", response_model=JobSubmitted, status_code=202)
+async def submit_geojson_decode(payload: GeoJsonDecodeRequest, request: Request):
+    """Поставить декодирование GeoJSON в очередь"""
+    return _submitted(request, decode_geojson.delay(payload.geojson))
+
+@router.post("/exports/{entity}", response_model=JobSubmitted, status_code=202)
+async def submit_export(entity: JobExportEntity, request: Request):
+    """Поставить CSV-выгрузку сущности в очередь; файл — GET /jobs/{id}/download"""
+    return _submitted(request, export_entity_csv.delay(entity.value))
+
+@router.get("/{job_id}", response_model=JobStatus, name="get_job")
+async def get_job(job_id: str):
+    result = AsyncResult(job_id, app=celery_app)
+    status = JobStatus(job_id=job_id, name=result.name, status=result.state)
+    if result.state == "PROGRESS":
+        status.progress = result.info
+    elif result.state == "SUCCESS":
+        status.result = result.result
+    elif result.state == "FAILURE":
+        status.error = str(result.result)
+    return status
+
+@router.get("/{job_id}/download")
+async def download_job_result(job_id: str):
+    """Скачать файл, созданный задачей выгрузки"""
+    result = AsyncResult(job_id, app=celery_app)
+    if result.state != "SUCCESS":
+        raise HTTPException(status_code=409, detail=f"Задача не завершена: {result.state}")
+    payload = result.result
+    if not isinstance(payload, dict) or "path" not in payload:
+        raise HTTPException(status_code=404, detail="У задачи нет файла результата")
+    if not os.path.exists(payload["path"]):
+        raise HTTPException(status_code=410, detail="Файл результата удалён")
+    return FileResponse(payload["path"], filename=payload.get("filename"), media_type="text/csv")
+
+@router.delete("/{job_id}")
+async def revoke_job(job_id: str):
+    """Отменить задачу, если она ещё не выполнена"""
+    celery_app.control.revoke(job_id, terminate=False)
+    return {"message": "Задача отменена"}
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.models.schemas import NotificationRequest, NotificationRun
+from app.crud import tg_scenario_crud
+from app.database import get_db
+from app.services import notifications
+
+router = APIRouter()
+
+@router.post("/shift-day", response_model=NotificationRun, status_code=202)
+async def notify_shift_day(request: NotificationRequest, db: Session = Depends(get_db)):
+    """Разослать исполнителям задачи смен за дату по шаблону TG сценария.
+
+    Сообщения рендерятся сразу, отправка идёт в Celery-воркере; статус — GET /{run_id}.
+    """
+    scenario = tg_scenario_crud.get_scenario(db, request.scenario_id)
+    if not scenario:
+        raise HTTPException(status_code=404, detail="TG сценарий не найден")
+    if not scenario.message_template:
+        raise HTTPException(status_code=400, detail="У TG сценария нет шаблона сообщения")
+    try:
+        template = notifications.compile_template(scenario.message_template)
+    except notifications.TemplateError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    messages, skipped = await run_in_threadpool(notifications.render_shift_day, db, request.date, template)
+    return await run_in_threadpool(notifications.start_run, messages, skipped, request.dry_run)
+
+@router.get("/{run_id}", response_model=NotificationRun)
+async def get_notification_run(run_id: str):
+    run = await run_in_threadpool(notifications.get_run, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Рассылка не найдена")
+    return run
@@ -1,27 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
-from app.crud import robots_crud
+from app.crud import multiget, robots_crud
+from app.services.registry import registry
+from app.services import cache
 from app.models.schemas import Robots, RobotsCreate, RobotsUpdate
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Robots])
 async def get_robots(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     series: int = None,
     has_blockers: bool = None,
+    ids: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all robots with optional filtering"""
+    """Get all robots with optional filtering; ids=1,2,3 fetches robots by id (missing ids in X-Missing-Ids)"""
+    if ids is not None:
+        try:
+            items, missing = robots_crud.get_robots_by_ids(db, multiget.parse_ids(ids))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if missing:
+            response.headers[multiget.MISSING_HEADER] = multiget.missing_header(missing)
+        return items
     if series is not None:
         return robots_crud.get_robots_by_series(db, series)
     elif has_blockers is not None and has_blockers:
         return robots_crud.get_robots_with_blockers(db)
     else:
-        return robots_crud.get_robots(db, skip=skip, limit=limit)
+        return cache.fetch(
+            "robots.list", {"skip": skip, "limit": limit}, [cache.ROBOTS],
+            lambda: robots_crud.get_robots(db, skip=skip, limit=limit),
+            schema=Robots
+        )
 
 @router.get("/{robot_id}", response_model=Robots)
 async def get_robot(robot_id: int, db: Session = Depends(get_db)):
@@ -35,22 +52,31 @@ async def get_robot(robot_id: int, db: Session = Depends(get_db)):
 async def create_robot(robot: RobotsCreate, db: Session = Depends(get_db)):
     """Create a new robot"""
     # Check if robot with this name already exists
-    existing_robot = robots_crud.get_robot_by_name(db, robot.name)
+    existing_robot = registry.robot_by_name(db, robot.name)
     if existing_robot:
         raise HTTPException(status_code=400, detail="Robot with this name already exists")
     
-    return robots_crud.create_robot(db, robot)
+    # A concurrent create with the same name slips past the check above; the unique index catches it
+    try:
+        return robots_crud.create_robot(db, robot)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Robot with this name already exists")
 
 @router.put("/{robot_id}", response_model=Robots)
 async def update_robot(robot_id: int, robot: RobotsUpdate, db: Session = Depends(get_db)):
     """Update an existing robot"""
     # Check if robot with this name already exists (if name is being updated)
     if robot.name is not None:
-        existing_robot = robots_crud.get_robot_by_name(db, robot.name)
+        existing_robot = registry.robot_by_name(db, robot.name)
         if existing_robot and existing_robot.id != robot_id:
             raise HTTPException(status_code=400, detail="Robot with this name already exists")
     
-    updated_robot = robots_crud.update_robot(db, robot_id, robot)
+    try:
+        updated_robot = robots_crud.update_robot(db, robot_id, robot)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Robot with this name already exists")
     if updated_robot is None:
         raise HTTPException(status_code=404, detail="Robot not found")
     return updated_robot
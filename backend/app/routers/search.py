@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+
+from app.database import get_db
+from app.models.schemas import SearchHit, SearchKind
+from app.services import search_index
+
+router = APIRouter()
+
+@router.get("/", response_model=List[SearchHit])
+async def search(
+    q: str = Query(..., min_length=1),
+    kind: Optional[List[SearchKind]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Typeahead-поиск по сотрудникам, роботам, транспорту и тикетам задач"""
+    # Первая загрузка читает всю БД — не на event loop
+    await run_in_threadpool(search_index.index.ensure_loaded, db)
+    kinds = [k.value for k in kind] if kind else None
+    return search_index.index.search(q, kinds=kinds, limit=limit)
+
+@router.post("/reindex")
+async def reindex(db: Session = Depends(get_db)):
+    """Перестроить поисковый индекс из БД"""
+    await run_in_threadpool(search_index.index.rebuild, db)
+    return {"message": "Индекс перестроен", "documents": len(search_index.index)}
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
-from app.database import get_db
-from app.models.schemas import Shift, ShiftCreate, ShiftUpdate, ShiftWithTasks, ShiftWithEnrichedTasks, EnrichedTaskForShift
-from app.crud import shift_crud
+from app.database import SessionLocal, get_db
+from app.models.schemas import Shift, ShiftCreate, ShiftUpdate, ShiftWithTasks, ShiftWithEnrichedTasks
+from app.crud import multiget, shift_crud
+from app.crud.row_writes import VersionConflict, etag, parse_if_match
+from app.services import cache
+from app.services.singleflight import flights
 
 router = APIRouter()
 
@@ -16,40 +19,32 @@ async def test_endpoint():
 
 @router.get("/", response_model=List[Shift])
 async def get_shifts(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    ids: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Получить список всех смен"""
+    """Получить список всех смен; ids — выборка по списку id через запятую (ненайденные — в заголовке X-Missing-Ids)"""
+    if ids is not None:
+        try:
+            items, missing = shift_crud.get_shifts_by_ids(db, multiget.parse_ids(ids))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if missing:
+            response.headers[multiget.MISSING_HEADER] = multiget.missing_header(missing)
+        return items
     return shift_crud.get_shifts(db, skip=skip, limit=limit)
 
 @router.get("/{shift_id}", response_model=ShiftWithEnrichedTasks)
-async def get_shift(shift_id: int, db: Session = Depends(get_db)):
+async def get_shift(shift_id: int, response: Response, db: Session = Depends(get_db)):
     """Получить смену по ID с задачами и дополнительной информацией"""
-    shift = shift_crud.get_shift_with_tasks(db, shift_id)
+    shift = shift_crud.get_shift_view(db, shift_id)
     if not shift:
         raise HTTPException(status_code=404, detail="Смена не найдена")
-    
-    # Обогащаем данные задач
-    enriched_tasks = []
-    for task in shift.tasks:
-        enriched_task_data = shift_crud.enrich_task_data(task, db)
-        enriched_task = EnrichedTaskForShift(**enriched_task_data)
-        enriched_tasks.append(enriched_task)
-    
-    # Создаем обогащенную смену
-    shift_data = {
-        'id': shift.id,
-        'date': shift.date,
-        'time_start': shift.time_start,
-        'time_end': shift.time_end,
-        'edited_at': shift.edited_at,
-        'created_at': shift.created_at,
-        'updated_at': shift.updated_at,
-        'tasks': enriched_tasks
-    }
-    
-    return ShiftWithEnrichedTasks(**shift_data)
+    if shift.version is not None:
+        response.headers["ETag"] = etag(shift.version)
+    return shift
 
 @router.post("/", response_model=Shift)
 async def create_shift(shift: ShiftCreate, db: Session = Depends(get_db)):
@@ -60,60 +55,55 @@ async def create_shift(shift: ShiftCreate, db: Session = Depends(get_db)):
 async def update_shift(
     shift_id: int, 
     shift_update: ShiftUpdate, 
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
-    """Обновить смену"""
-    shift = shift_crud.update_shift(db, shift_id, shift_update)
+    """Обновить смену; с If-Match — только если версия не изменилась (иначе 412)"""
+    try:
+        shift = shift_crud.update_shift(db, shift_id, shift_update, parse_if_match(if_match))
+    except VersionConflict as e:
+        raise HTTPException(status_code=412, detail=f"Смена изменена другим пользователем (версия {e.current_version})")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not shift:
         raise HTTPException(status_code=404, detail="Смена не найдена")
+    response.headers["ETag"] = etag(shift.version)
     return shift
 
 @router.delete("/{shift_id}")
-async def delete_shift(shift_id: int, db: Session = Depends(get_db)):
-    """Удалить смену"""
-    success = shift_crud.delete_shift(db, shift_id)
+async def delete_shift(shift_id: int, if_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Удалить смену; с If-Match — только если версия не изменилась (иначе 412)"""
+    try:
+        success = shift_crud.delete_shift(db, shift_id, parse_if_match(if_match))
+    except VersionConflict as e:
+        raise HTTPException(status_code=412, detail=f"Смена изменена другим пользователем (версия {e.current_version})")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not success:
         raise HTTPException(status_code=404, detail="Смена не найдена")
     return {"message": "Смена успешно удалена"}
 
+def _day_view(date: datetime) -> list:
+    """Вычисление дня для single-flight: его результат получают все ожидающие запросы,
+    поэтому оно идёт в собственной сессии, а не в сессии запроса, который его начал"""
+    db = SessionLocal()
+    try:
+        return cache.fetch(
+            cache.DAY_VIEW, date.date(), cache.DAY_VIEW_TAGS,
+            lambda: shift_crud.get_day_view(db, date),
+            schema=ShiftWithEnrichedTasks
+        )
+    finally:
+        db.close()
+
 @router.get("/date/{date}", response_model=List[ShiftWithEnrichedTasks])
-async def get_shifts_by_date(date: datetime, db: Session = Depends(get_db)):
+async def get_shifts_by_date(date: datetime):
     """Получить смены по конкретной дате с полной информацией о задачах"""
+    day = date.date()
     try:
-        print(f"Received date: {date}")
-        shifts = shift_crud.get_shifts_by_date(db, date)
-        print(f"Found {len(shifts)} shifts")
-        
-        # Обогащаем каждую смену данными о задачах
-        enriched_shifts = []
-        for shift in shifts:
-            # Получаем смену с задачами
-            shift_with_tasks = shift_crud.get_shift_with_tasks(db, shift.id)
-            if shift_with_tasks:
-                # Обогащаем данные задач
-                enriched_tasks = []
-                for task in shift_with_tasks.tasks:
-                    enriched_task_data = shift_crud.enrich_task_data(task, db)
-                    enriched_task = EnrichedTaskForShift(**enriched_task_data)
-                    enriched_tasks.append(enriched_task)
-                
-                # Создаем обогащенную смену
-                shift_data = {
-                    'id': shift_with_tasks.id,
-                    'date': shift_with_tasks.date,
-                    'time_start': shift_with_tasks.time_start,
-                    'time_end': shift_with_tasks.time_end,
-                    'edited_at': shift_with_tasks.edited_at,
-                    'created_at': shift_with_tasks.created_at,
-                    'updated_at': shift_with_tasks.updated_at,
-                    'tasks': enriched_tasks
-                }
-                
-                enriched_shift = ShiftWithEnrichedTasks(**shift_data)
-                enriched_shifts.append(enriched_shift)
-        
-        print(f"Returning {len(enriched_shifts)} enriched shifts")
-        return enriched_shifts
+        # Одновременные запросы одного дня разделяют одно вычисление
+        return await flights.do(cache.DAY_VIEW, day, lambda: _day_view(date))
     except Exception as e:
         print(f"Error in get_shifts_by_date: {e}")
         import traceback
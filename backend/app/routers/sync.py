@@ -0,0 +1,24 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.schemas import SyncResult
+from app.services import sync
+
+router = APIRouter()
+
+@router.get("/", response_model=SyncResult)
+async def get_changes(since: Optional[str] = None, db: Session = Depends(get_db)):
+    """Созданные, изменённые и удалённые сотрудники, команды, роботы, транспорт, смены и задачи с токена since.
+
+    Без since возвращается только начальный токен. Следующий запрос делается с
+    token из ответа; 410 — токен устарел, данные нужно перезагрузить целиком.
+    """
+    try:
+        return sync.changes_since(db, since)
+    except sync.SyncExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,66 +1,68 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from typing import List
-from app.models.schemas import Table, TableCreate, TableUpdate
-from datetime import datetime
+from sqlalchemy.orm import Session
+from app.models.schemas import Table, TableCreate, TableUpdate, TableRows
+from app.crud import table_crud
+from app.database import get_db
+from app.services import table_views
 
 router = APIRouter()
 
-tables_db = []
-table_id_counter = 1
-
 @router.get("/", response_model=List[Table])
-async def get_tables():
-    return tables_db
+async def get_tables(
+    skip: int = 0,
+    limit: int = 100,
+    owner_id: int = None,
+    db: Session = Depends(get_db)
+):
+    return table_crud.get_tables(db, skip=skip, limit=limit, owner_id=owner_id)
 
 @router.get("/{table_id}", response_model=Table)
-async def get_table(table_id: int):
-    table = next((t for t in tables_db if t.id == table_id), None)
+async def get_table(table_id: int, db: Session = Depends(get_db)):
+    table = table_crud.get_table(db, table_id)
     if not table:
         raise HTTPException(status_code=404, detail="Таблица не найдена")
     return table
 
-@router.post("/", response_model=Table)
-async def create_table(table: TableCreate):
-    global table_id_counter
-    
-    new_table = Table(
-        id=table_id_counter,
-        name=table.name,
-        description=table.description,
-        table_type=table.table_type,
-        columns=table.columns,
-        created_at=datetime.now(),
-        updated_at=datetime.now(),
-        owner_id=1
+@router.get("/{table_id}/rows", response_model=TableRows)
+def get_table_rows(table_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    """Страница материализованного представления (обновляется инкрементально перед чтением)"""
+    try:
+        result = table_views.get_rows(db, table_id, skip=skip, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Таблица не найдена")
+    table, rows = result
+    return TableRows(
+        table_id=table.id,
+        total=table.row_count or 0,
+        skip=skip,
+        limit=limit,
+        materialized_at=table.materialized_at,
+        rows=rows
     )
-    
-    tables_db.append(new_table)
-    table_id_counter += 1
-    
-    return new_table
+
+@router.post("/", response_model=Table)
+async def create_table(table: TableCreate, db: Session = Depends(get_db)):
+    try:
+        return table_crud.create_table(db, table)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{table_id}", response_model=Table)
-async def update_table(table_id: int, table_update: TableUpdate):
-    table = next((t for t in tables_db if t.id == table_id), None)
+async def update_table(table_id: int, table_update: TableUpdate, db: Session = Depends(get_db)):
+    try:
+        table = table_crud.update_table(db, table_id, table_update)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not table:
         raise HTTPException(status_code=404, detail="Таблица не найдена")
-    
-    update_data = table_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(table, field, value)
-    
-    table.updated_at = datetime.now()
-    
     return table
 
 @router.delete("/{table_id}")
-async def delete_table(table_id: int):
-    global tables_db
-    
-    table = next((t for t in tables_db if t.id == table_id), None)
-    if not table:
+async def delete_table(table_id: int, db: Session = Depends(get_db)):
+    success = table_crud.delete_table(db, table_id)
+    if not success:
         raise HTTPException(status_code=404, detail="Таблица не найдена")
-    
-    tables_db = [t for t in tables_db if t.id != table_id]
-    
     return {"message": "Таблица успешно удалена"}
@@ -1,29 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 from app.database import get_db
 from app.models.schemas import Task, TaskCreate, TaskUpdate, TaskType
-from app.crud import task_crud
+from app.crud import multiget, task_crud
+from app.crud.row_writes import VersionConflict, etag, parse_if_match
+from app.services import cache
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Task])
 async def get_tasks(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    ids: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Получить список всех задач"""
-    return task_crud.get_tasks(db, skip=skip, limit=limit)
+    """Получить список всех задач; ids — выборка по списку id через запятую (ненайденные — в заголовке X-Missing-Ids)"""
+    if ids is not None:
+        try:
+            items, missing = task_crud.get_tasks_by_ids(db, multiget.parse_ids(ids))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if missing:
+            response.headers[multiget.MISSING_HEADER] = multiget.missing_header(missing)
+        return items
+    return cache.fetch(
+        "tasks.list", {"skip": skip, "limit": limit}, [cache.TASKS],
+        lambda: task_crud.get_tasks(db, skip=skip, limit=limit),
+        schema=Task
+    )
 
 @router.get("/{task_id}", response_model=Task)
-async def get_task(task_id: int, db: Session = Depends(get_db)):
-    """Получить задачу по ID"""
-    task = task_crud.get_task(db, task_id)
+async def get_task(task_id: int, response: Response, db: Session = Depends(get_db)):
+    """Получить задачу по ID (в том числе архивную)"""
+    task = task_crud.get_task(db, task_id) or task_crud.get_archived_task(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Задача не найдена")
+    if getattr(task, "version", None) is not None:
+        response.headers["ETag"] = etag(task.version)
     return task
 
 @router.post("/", response_model=Task)
@@ -35,18 +53,31 @@ async def create_task(task: TaskCreate, db: Session = Depends(get_db)):
 async def update_task(
     task_id: int, 
     task_update: TaskUpdate, 
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
-    """Обновить задачу"""
-    task = task_crud.update_task(db, task_id, task_update)
+    """Обновить задачу; с If-Match — только если версия не изменилась (иначе 412)"""
+    try:
+        task = task_crud.update_task(db, task_id, task_update, parse_if_match(if_match))
+    except VersionConflict as e:
+        raise HTTPException(status_code=412, detail=f"Задача изменена другим пользователем (версия {e.current_version})")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not task:
         raise HTTPException(status_code=404, detail="Задача не найдена")
+    response.headers["ETag"] = etag(task.version)
     return task
 
 @router.delete("/{task_id}")
-async def delete_task(task_id: int, db: Session = Depends(get_db)):
-    """Удалить задачу"""
-    success = task_crud.delete_task(db, task_id)
+async def delete_task(task_id: int, if_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Удалить задачу; с If-Match — только если версия не изменилась (иначе 412)"""
+    try:
+        success = task_crud.delete_task(db, task_id, parse_if_match(if_match))
+    except VersionConflict as e:
+        raise HTTPException(status_code=412, detail=f"Задача изменена другим пользователем (версия {e.current_version})")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not success:
         raise HTTPException(status_code=404, detail="Задача не найдена")
     return {"message": "Задача успешно удалена"}
@@ -54,27 +85,54 @@ async def delete_task(task_id: int, db: Session = Depends(get_db)):
 @router.get("/shift/{shift_id}", response_model=List[Task])
 async def get_tasks_by_shift(shift_id: int, db: Session = Depends(get_db)):
     """Получить задачи по ID смены"""
-    return task_crud.get_tasks_by_shift(db, shift_id)
+    return cache.fetch("tasks.shift", shift_id, [cache.TASKS], lambda: task_crud.get_tasks_by_shift(db, shift_id), schema=Task)
 
 @router.get("/executor/{executor_id}", response_model=List[Task])
-async def get_tasks_by_executor(executor_id: int, db: Session = Depends(get_db)):
-    """Получить задачи по ID исполнителя"""
-    return task_crud.get_tasks_by_executor(db, executor_id)
+async def get_tasks_by_executor(
+    executor_id: int,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """Получить задачи по ID исполнителя; без start_date (или с ранним start_date) включает архив"""
+    return cache.fetch(
+        "tasks.executor", [executor_id, start_date, end_date], [cache.TASKS],
+        lambda: task_crud.get_tasks_by_executor(db, executor_id, start_date, end_date),
+        schema=Task
+    )
 
 @router.get("/robot/{robot_name}", response_model=List[Task])
-async def get_tasks_by_robot(robot_name: int, db: Session = Depends(get_db)):
-    """Получить задачи по номеру робота"""
-    return task_crud.get_tasks_by_robot(db, robot_name)
+async def get_tasks_by_robot(
+    robot_name: int,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """Получить задачи по номеру робота; без start_date (или с ранним start_date) включает архив"""
+    return cache.fetch(
+        "tasks.robot", [robot_name, start_date, end_date], [cache.TASKS],
+        lambda: task_crud.get_tasks_by_robot(db, robot_name, start_date, end_date),
+        schema=Task
+    )
 
 @router.get("/transport/{transport_id}", response_model=List[Task])
-async def get_tasks_by_transport(transport_id: int, db: Session = Depends(get_db)):
-    """Получить задачи по ID транспорта"""
-    return task_crud.get_tasks_by_transport(db, transport_id)
+async def get_tasks_by_transport(
+    transport_id: int,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """Получить задачи по ID транспорта; без start_date (или с ранним start_date) включает архив"""
+    return cache.fetch(
+        "tasks.transport", [transport_id, start_date, end_date], [cache.TASKS],
+        lambda: task_crud.get_tasks_by_transport(db, transport_id, start_date, end_date),
+        schema=Task
+    )
 
 @router.get("/type/{task_type}", response_model=List[Task])
 async def get_tasks_by_type(task_type: TaskType, db: Session = Depends(get_db)):
     """Получить задачи по типу"""
-    return task_crud.get_tasks_by_type(db, task_type)
+    return cache.fetch("tasks.type", task_type, [cache.TASKS], lambda: task_crud.get_tasks_by_type(db, task_type), schema=Task)
 
 @router.get("/active/", response_model=List[Task])
 async def get_active_tasks(db: Session = Depends(get_db)):
@@ -88,4 +146,8 @@ async def get_tasks_by_date_range(
     db: Session = Depends(get_db)
 ):
     """Получить задачи в заданном диапазоне дат"""
-    return task_crud.get_tasks_by_date_range(db, start_date, end_date)
+    return cache.fetch(
+        "tasks.date_range", [start_date, end_date], [cache.TASKS],
+        lambda: task_crud.get_tasks_by_date_range(db, start_date, end_date),
+        schema=Task
+    )
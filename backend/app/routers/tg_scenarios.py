@@ -1,94 +1,71 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from typing import List
-from app.models.schemas import TgScenario, TgScenarioCreate, TgScenarioUpdate
-from datetime import datetime
+from sqlalchemy.orm import Session
+from app.models.schemas import TgScenario, TgScenarioCreate, TgScenarioUpdate, ScenarioStatus, TgMatchRequest, TgBatchMatchRequest, TgMatchResult
+from app.crud import tg_scenario_crud
+from app.database import get_db
+from app.services import tg_matcher
 
 router = APIRouter()
 
-tg_scenarios_db = []
-scenario_id_counter = 1
-
 @router.get("/", response_model=List[TgScenario])
-async def get_tg_scenarios():
-    return tg_scenarios_db
+async def get_tg_scenarios(
+    skip: int = 0,
+    limit: int = 100,
+    owner_id: int = None,
+    db: Session = Depends(get_db)
+):
+    return tg_scenario_crud.get_scenarios(db, skip=skip, limit=limit, owner_id=owner_id)
+
+@router.post("/match", response_model=TgMatchResult)
+async def match_tg_scenarios(request: TgMatchRequest, db: Session = Depends(get_db)):
+    """Найти активные сценарии, ключевые слова которых встречаются в сообщении"""
+    return TgMatchResult(matches=tg_matcher.match(db, request.text))
+
+@router.post("/match/batch", response_model=List[TgMatchResult])
+async def match_tg_scenarios_batch(request: TgBatchMatchRequest, db: Session = Depends(get_db)):
+    """Сопоставить пачку сообщений за один вызов"""
+    return [TgMatchResult(matches=m) for m in tg_matcher.match_many(db, request.messages)]
 
 @router.get("/{scenario_id}", response_model=TgScenario)
-async def get_tg_scenario(scenario_id: int):
-    scenario = next((s for s in tg_scenarios_db if s.id == scenario_id), None)
+async def get_tg_scenario(scenario_id: int, db: Session = Depends(get_db)):
+    scenario = tg_scenario_crud.get_scenario(db, scenario_id)
     if not scenario:
         raise HTTPException(status_code=404, detail="TG сценарий не найден")
     return scenario
 
 @router.post("/", response_model=TgScenario)
-async def create_tg_scenario(scenario: TgScenarioCreate):
-    global scenario_id_counter
-    
-    new_scenario = TgScenario(
-        id=scenario_id_counter,
-        name=scenario.name,
-        description=scenario.description,
-        trigger_keywords=scenario.trigger_keywords,
-        message_template=scenario.message_template,
-        status=scenario.status,
-        created_at=datetime.now(),
-        updated_at=datetime.now(),
-        owner_id=1
-    )
-    
-    tg_scenarios_db.append(new_scenario)
-    scenario_id_counter += 1
-    
-    return new_scenario
+async def create_tg_scenario(scenario: TgScenarioCreate, db: Session = Depends(get_db)):
+    return tg_scenario_crud.create_scenario(db, scenario)
 
 @router.put("/{scenario_id}", response_model=TgScenario)
-async def update_tg_scenario(scenario_id: int, scenario_update: TgScenarioUpdate):
-    scenario = next((s for s in tg_scenarios_db if s.id == scenario_id), None)
+async def update_tg_scenario(scenario_id: int, scenario_update: TgScenarioUpdate, db: Session = Depends(get_db)):
+    scenario = tg_scenario_crud.update_scenario(db, scenario_id, scenario_update)
     if not scenario:
         raise HTTPException(status_code=404, detail="TG сценарий не найден")
-    
-    update_data = scenario_update.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(scenario, field, value)
-    
-    scenario.updated_at = datetime.now()
-    
     return scenario
 
 @router.delete("/{scenario_id}")
-async def delete_tg_scenario(scenario_id: int):
-    global tg_scenarios_db
-    
-    scenario = next((s for s in tg_scenarios_db if s.id == scenario_id), None)
-    if not scenario:
+async def delete_tg_scenario(scenario_id: int, db: Session = Depends(get_db)):
+    success = tg_scenario_crud.delete_scenario(db, scenario_id)
+    if not success:
         raise HTTPException(status_code=404, detail="TG сценарий не найден")
-    
-    tg_scenarios_db = [s for s in tg_scenarios_db if s.id != scenario_id]
-    
     return {"message": "TG сценарий успешно удален"}
 
 @router.get("/status/{status}", response_model=List[TgScenario])
-async def get_tg_scenarios_by_status(status: str):
-    scenarios = [s for s in tg_scenarios_db if s.status == status]
-    return scenarios
+async def get_tg_scenarios_by_status(status: str, db: Session = Depends(get_db)):
+    return tg_scenario_crud.get_scenarios_by_status(db, status)
 
 @router.post("/{scenario_id}/activate")
-async def activate_tg_scenario(scenario_id: int):
-    scenario = next((s for s in tg_scenarios_db if s.id == scenario_id), None)
+async def activate_tg_scenario(scenario_id: int, db: Session = Depends(get_db)):
+    scenario = tg_scenario_crud.set_scenario_status(db, scenario_id, ScenarioStatus.ACTIVE)
     if not scenario:
         raise HTTPException(status_code=404, detail="TG сценарий не найден")
-    
-    scenario.status = "active"
-    scenario.updated_at = datetime.now()
-    
     return {"message": "TG сценарий активирован"}
 
 @router.post("/{scenario_id}/deactivate")
-async def deactivate_tg_scenario(scenario_id: int):
-    scenario = next((s for s in tg_scenarios_db if s.id == scenario_id), None)
+async def deactivate_tg_scenario(scenario_id: int, db: Session = Depends(get_db)):
+    scenario = tg_scenario_crud.set_scenario_status(db, scenario_id, ScenarioStatus.DRAFT)
     if not scenario:
         raise HTTPException(status_code=404, detail="TG сценарий не найден")
-    
-    scenario.status = "draft"
-    scenario.updated_at = datetime.now()
-    
     return {"message": "TG сценарий деактивирован"}
@@ -1,30 +1,41 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from typing import List, Optional
 from app.models.schemas import Transport, TransportCreate, TransportUpdate
-from app.crud import transport_crud
+from app.crud import multiget, transport_crud
 from app.database import get_db
+from app.services import cache
 from sqlalchemy.orm import Session
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Transport])
 async def get_transports(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     carsharing: Optional[bool] = None,
     corporate: Optional[bool] = None,
     auto_vc: Optional[bool] = None,
+    ids: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all transports with optional filtering"""
+    """Get all transports with optional filtering; ids=1,2,3 fetches transports by id (missing ids in X-Missing-Ids)"""
+    if ids is not None:
+        try:
+            items, missing = transport_crud.get_transports_by_ids(db, multiget.parse_ids(ids))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if missing:
+            response.headers[multiget.MISSING_HEADER] = multiget.missing_header(missing)
+        return items
     try:
         if carsharing is not None or corporate is not None or auto_vc is not None:
-            transports = transport_crud.get_transports_by_type(
-                db, carsharing=carsharing, corporate=corporate, auto_vc=auto_vc
-            )
+            params = {"carsharing": carsharing, "corporate": corporate, "auto_vc": auto_vc}
+            loader = lambda: transport_crud.get_transports_by_type(db, **params)
         else:
-            transports = transport_crud.get_transports(db, skip=skip, limit=limit)
-        return transports
+            params = {"skip": skip, "limit": limit}
+            loader = lambda: transport_crud.get_transports(db, skip=skip, limit=limit)
+        return cache.fetch("transports.list", params, [cache.TRANSPORTS], loader, schema=Transport)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching transports: {str(e)}")
 
@@ -0,0 +1 @@
+# Сервисный слой: индексы, кэши и фоновые механизмы поверх CRUD
@@ -0,0 +1,156 @@
+"""Архив старых смен и задач.
+
+Смены с date раньше границы (cutoff) переносятся вместе с задачами в
+shifts_archive/tasks_archive пачками по ARCHIVE_BATCH_SIZE смен: INSERT ...
+SELECT в архив и DELETE из горячих таблиц в одной транзакции на пачку, id
+сохраняются. Горячие shifts/tasks остаются маленькими, поэтому активные
+задачи, листинги и представления не читают всю историю.
+
+Граница архива (watermark) — максимальный cutoff в archive_runs; она
+кэшируется в процессе на ARCHIVE_WATERMARK_TTL секунд и сбрасывается через
+шину инвалидации (архивация в Celery-воркере и CLI тоже подключается к шине). Запросы по
+диапазону дат идут в архив, только если диапазон начинается раньше границы
+(для задач — с запасом в сутки: ночная смена, начатая до границы,
+заканчивается после неё). Запуск записывается до переноса строк, так что в
+любой момент строка видна либо в горячей таблице, либо через архив.
+
+Запуск: python archive.py (по умолчанию — старше ARCHIVE_HORIZON_DAYS дней)
+или Celery-задача archive.shifts.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.database_models import ArchiveRun, Shift, ShiftArchive, Task, TaskArchive
+
+# Задача архивной смены может начаться позже даты смены не больше чем на это
+TASK_SPILLOVER = timedelta(days=1)
+
+_lock = threading.Lock()
+_watermark = {"value": None, "expires": 0.0, "generation": 0}
+
+
+def invalidate() -> None:
+    """Сбросить кэш границы архива (после архивации, в том числе в другом воркере)"""
+    with _lock:
+        _watermark["expires"] = 0.0
+        _watermark["generation"] += 1
+
+
+def watermark(db: Session) -> Optional[datetime]:
+    """Всё, что раньше этой даты, может лежать в архиве; None — архив пуст.
+
+    Значение кэшируется на ARCHIVE_WATERMARK_TTL секунд: сообщение шины об
+    архивации может не дойти, и тогда граница перечитывается по истечении TTL.
+    """
+    with _lock:
+        if _watermark["expires"] > time.monotonic():
+            return _watermark["value"]
+        generation = _watermark["generation"]
+    value = db.query(func.max(ArchiveRun.cutoff)).scalar()
+    with _lock:
+        # Не кэшируем значение, прочитанное до сброса
+        if generation == _watermark["generation"]:
+            _watermark["value"] = value
+            _watermark["expires"] = time.monotonic() + settings.ARCHIVE_WATERMARK_TTL
+    return value
+
+
+def _naive(value: datetime) -> datetime:
+    return value.replace(tzinfo=None) if value.tzinfo else value
+
+
+def reaches_shifts(db: Session, start: Optional[datetime]) -> bool:
+    """Нужен ли архив смен для диапазона, начинающегося в start (None — без нижней границы)"""
+    boundary = watermark(db)
+    if boundary is None:
+        return False
+    return start is None or _naive(start) < _naive(boundary)
+
+
+def reaches_tasks(db: Session, start: Optional[datetime]) -> bool:
+    """Нужен ли архив задач для диапазона по time_start, начинающегося в start"""
+    boundary = watermark(db)
+    if boundary is None:
+        return False
+    return start is None or _naive(start) < _naive(boundary) + TASK_SPILLOVER
+
+
+def default_cutoff(horizon_days: Optional[int] = None) -> datetime:
+    """Полночь horizon_days (по умолчанию ARCHIVE_HORIZON_DAYS) дней назад"""
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=settings.ARCHIVE_HORIZON_DAYS if horizon_days is None else horizon_days)
+
+
+def pending(db: Session, cutoff: datetime) -> dict:
+    """Сколько смен и задач перенесёт архивация с этой границей"""
+    shift_ids = select(Shift.id).where(Shift.date < cutoff)
+    return {
+        "cutoff": cutoff,
+        "shifts": db.query(func.count(Shift.id)).filter(Shift.date < cutoff).scalar() or 0,
+        "tasks": db.query(func.count(Task.id)).filter(Task.shift_id.in_(shift_ids)).scalar() or 0,
+    }
+
+
+def _notify() -> None:
+    """Сбросить кэши, зависящие от горячих таблиц и границы архива, здесь и в других воркерах"""
+    from app.services import cache, invalidation, search_index, widgets
+
+    invalidate()
+    widgets.invalidate()
+    search_index.index.clear()
+    cache.invalidate(cache.TASKS, cache.SHIFTS)
+    invalidation.publish(invalidation.ARCHIVE)
+    invalidation.publish(invalidation.TASKS)
+    invalidation.publish(invalidation.SHIFTS)
+
+
+def archive_before(db: Session, cutoff: datetime, batch_size: Optional[int] = None,
+                   log: Callable[[str], None] = print) -> dict:
+    """Перенести смены с date < cutoff и их задачи в архив"""
+    from app.services import table_views, task_projection
+
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    run = ArchiveRun(cutoff=cutoff, shifts=0, tasks=0, started_at=datetime.now())
+    db.add(run)
+    db.commit()
+    # Граница поднимается до переноса: читатели уже идут в архив за этим диапазоном
+    _notify()
+
+    shift_columns = [c.key for c in ShiftArchive.__table__.columns if c.key != "archived_at"]
+    task_columns = [c.key for c in TaskArchive.__table__.columns if c.key != "archived_at"]
+    shifts_table, tasks_table = Shift.__table__, Task.__table__
+    try:
+        while True:
+            ids = [shift_id for (shift_id,) in db.query(Shift.id).filter(Shift.date < cutoff).order_by(Shift.id).limit(batch_size)]
+            if not ids:
+                break
+            db.execute(insert(ShiftArchive).from_select(
+                shift_columns, select(*[shifts_table.c[c] for c in shift_columns]).where(shifts_table.c.id.in_(ids))
+            ))
+            db.execute(insert(TaskArchive).from_select(
+                task_columns, select(*[tasks_table.c[c] for c in task_columns]).where(tasks_table.c.shift_id.in_(ids))
+            ))
+            moved_tasks = db.execute(delete(Task).where(Task.shift_id.in_(ids)).execution_options(synchronize_session=False)).rowcount
+            db.execute(delete(Shift).where(Shift.id.in_(ids)).execution_options(synchronize_session=False))
+            task_projection.remove_shifts(db, ids)
+            run.shifts += len(ids)
+            run.tasks += moved_tasks
+            db.commit()
+            log(f"Archived {run.shifts} shifts, {run.tasks} tasks")
+        # Представления над задачами и сменами перестраиваются целиком
+        table_views.record_change(db, table_views.TASKS, None)
+        table_views.record_change(db, table_views.SHIFTS, None)
+        run.finished_at = datetime.now()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        _notify()
+    return {"cutoff": cutoff, "shifts": run.shifts, "tasks": run.tasks}
@@ -0,0 +1,152 @@
+"""Снимок данных для холодного старта планировщика (GET /api/v1/bootstrap).
+
+Раньше интерфейс при запуске делал отдельные запросы: проверку связи
+(/shifts/test и /), сотрудников, должности, команды, роботов, транспорт и
+смены на сегодня. Снимок собирает те же разделы на сервере параллельно —
+каждый в своей сессии в пуле потоков — через те же ключи кэша, что и
+отдельные ручки, поэтому снимок и ручки разделяют закэшированные данные.
+
+ETag снимка — хэш его JSON: клиент присылает его в If-None-Match и при
+неизменных данных получает 304 без тела. Тело сжимается gzip, если клиент
+его принимает.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal, engine
+from app.models.schemas import Employee, Robots, ShiftWithEnrichedTasks, Transport
+from app.services import cache
+
+API_INFO = {"message": "R&D Planner API", "version": "1.0.0", "status": "ok"}
+# Меньшие тела сжатие почти не уменьшает
+GZIP_MIN_SIZE = 500
+GZIP_LEVEL = 6
+
+
+def _employees(db: Session, skip: int, limit: int) -> list:
+    from app.crud import employee_crud
+
+    # Тот же набор фильтров, что у GET /crews/employees без параметров — общий ключ кэша
+    filters = dict(skip=skip, limit=limit, body=None, crew_id=None, parking=None,
+                   drive=None, telemedicine=None, access_to_auto_vc=None)
+    return cache.fetch(
+        "employees.list", filters, [cache.EMPLOYEES],
+        lambda: employee_crud.get_employees_with_filters(db, **filters),
+        schema=Employee
+    )
+
+
+def _bodies_and_crews(db: Session) -> Tuple[List[str], List[int]]:
+    """Должности и номера команд сотрудников (как /crews/employees/bodies и /crews) одним запросом"""
+    from app.crud import employee_crud
+
+    employees = employee_crud.get_employees(db)
+    bodies = {e.body.strip() for e in employees if e.body and e.body.strip()}
+    crews = {e.crew for e in employees if e.crew is not None}
+    return sorted(bodies), sorted(crews)
+
+
+def _robots(db: Session, skip: int, limit: int) -> list:
+    from app.crud import robots_crud
+
+    return cache.fetch(
+        "robots.list", {"skip": skip, "limit": limit}, [cache.ROBOTS],
+        lambda: robots_crud.get_robots(db, skip=skip, limit=limit),
+        schema=Robots
+    )
+
+
+def _transports(db: Session, skip: int, limit: int) -> list:
+    from app.crud import transport_crud
+
+    return cache.fetch(
+        "transports.list", {"skip": skip, "limit": limit}, [cache.TRANSPORTS],
+        lambda: transport_crud.get_transports(db, skip=skip, limit=limit),
+        schema=Transport
+    )
+
+
+def _shifts(db: Session, date: datetime) -> list:
+    from app.crud import shift_crud
+
+    return cache.fetch(
+        cache.DAY_VIEW, date.date(), cache.DAY_VIEW_TAGS,
+        lambda: shift_crud.get_day_view(db, date),
+        schema=ShiftWithEnrichedTasks
+    )
+
+
+def _in_session(loader: Callable[[Session], object]):
+    db = SessionLocal()
+    try:
+        return loader(db)
+    finally:
+        db.close()
+
+
+async def collect(date: Optional[datetime] = None, skip: int = 0, limit: int = 100) -> Dict[str, object]:
+    """Все разделы снимка; независимые разделы читаются параллельно"""
+    date = (date or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    loaders = [
+        lambda db: _employees(db, skip, limit),
+        _bodies_and_crews,
+        lambda db: _robots(db, skip, limit),
+        lambda db: _transports(db, skip, limit),
+        lambda db: _shifts(db, date),
+    ]
+    if isinstance(engine.pool, StaticPool):
+        # Одно общее соединение — параллелить нельзя
+        results = [_in_session(loader) for loader in loaders]
+    else:
+        results = await asyncio.gather(*[run_in_threadpool(_in_session, loader) for loader in loaders])
+    employees, (bodies, crews), robots, transports, shifts = results
+    return {
+        "api": API_INFO,
+        "date": date.isoformat(),
+        "employees": employees,
+        "bodies": bodies,
+        "crews": crews,
+        "robots": robots,
+        "transports": transports,
+        "shifts": shifts,
+    }
+
+
+def encode(snapshot: Dict[str, object]) -> Tuple[bytes, str]:
+    """JSON снимка и его ETag (слабый: одно значение для сжатого и несжатого тела)"""
+    body = json.dumps(snapshot, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return body, f'W/"{hashlib.sha1(body).hexdigest()}"'
+
+
+def not_modified(if_none_match: Optional[str], tag: str) -> bool:
+    """Совпадает ли ETag с одним из значений If-None-Match (сравнение слабое, как требует RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = tag[2:] if tag.startswith("W/") else tag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def compress(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
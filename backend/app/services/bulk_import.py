@@ -0,0 +1,361 @@
+"""Потоковый импорт сотрудников, транспорта и роботов из CSV/XLSX.
+
+Файл читается построчно и обрабатывается чанками: строки валидируются
+существующими pydantic-схемами, ссылки (команды, имена роботов) проверяются
+одним запросом на чанк, а валидные строки вставляются multi-row INSERT'ом.
+Каждый чанк коммитится отдельно, ошибки возвращаются по номерам строк. Если
+БД отвергла чанк целиком, он откатывается и записывается заново по одной
+строке: ошибка попадает в отчёт с номером своей строки, остальные строки
+сохраняются. Файл, который перестал читаться посередине, тоже не обрывает
+импорт: прочитанное записывается, а ошибка чтения возвращается в отчёте.
+"""
+import csv
+import io
+from itertools import count
+from collections import Counter
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.crud import crew_crud
+from app.models.database_models import Crew, Employee, Robots, Transport
+from app.models.schemas import EmployeeCreate, RobotsCreate, TransportCreate
+from app.services import cache, invalidation, search_index, table_views, task_projection
+from app.services.registry import registry
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+ENTITIES = {
+    "employees": (Employee, EmployeeCreate),
+    "transports": (Transport, TransportCreate),
+    "robots": (Robots, RobotsCreate),
+}
+
+# Теги кэша чтений, которые сбрасывает импорт сущности
+CACHE_TAGS = {
+    "employees": (cache.EMPLOYEES, cache.CREWS),
+    "transports": (cache.TRANSPORTS,),
+    "robots": (cache.ROBOTS,),
+}
+
+
+class ImportReport:
+    def __init__(self, entity: str, dry_run: bool):
+        self.entity = entity
+        self.dry_run = dry_run
+        self.total_rows = 0
+        self.imported = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def add_error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": [message]})
+
+    def mark(self) -> Tuple[int, int]:
+        return self.failed, len(self.errors)
+
+    def restore(self, mark: Tuple[int, int]) -> None:
+        """Забыть ошибки, добавленные после mark (чанк откатился и будет проверен заново)"""
+        self.failed, size = mark
+        del self.errors[size:]
+
+    def to_dict(self) -> dict:
+        return {
+            "entity": self.entity,
+            "dry_run": self.dry_run,
+            "total_rows": self.total_rows,
+            "imported": self.imported,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+# --- чтение файлов ---
+
+def _iter_csv(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.DictReader(text, dialect=dialect)
+
+
+def _iter_xlsx(stream: BinaryIO) -> Iterator[Dict[str, Any]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Для импорта XLSX требуется пакет openpyxl")
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c).strip() if c is not None else "" for c in header]
+        for values in rows:
+            if values is None or all(v is None for v in values):
+                continue
+            yield dict(zip(columns, values))
+    finally:
+        workbook.close()
+
+
+def iter_rows(stream: BinaryIO, filename: str) -> Iterator[Dict[str, Any]]:
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return _iter_csv(stream)
+    if name.endswith(".xlsx"):
+        return _iter_xlsx(stream)
+    raise ValueError("Поддерживаются только файлы .csv и .xlsx")
+
+
+def _clean(row: Dict[str, Any], fields) -> Dict[str, Any]:
+    cleaned = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        key = key.strip()
+        if key not in fields:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if value == "":
+                value = None
+        if value is not None:
+            cleaned[key] = value
+    return cleaned
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in error.errors()
+    )
+
+
+def _format_database_error(error: SQLAlchemyError) -> str:
+    message = str(getattr(error, "orig", None) or error)
+    return f"database: {message.splitlines()[0] if message else type(error).__name__}"
+
+
+# --- проверки ссылок по чанку ---
+
+def _check_employees(db: Session, chunk: List[Tuple[int, dict]], report: ImportReport) -> List[Tuple[int, dict]]:
+    crew_ids = {row["crew"] for _, row in chunk if row.get("crew") is not None}
+    if not crew_ids:
+        return chunk
+
+    existing = {crew_id for (crew_id,) in db.query(Crew.id).filter(Crew.id.in_(crew_ids)).all()}
+    valid = []
+    for line, row in chunk:
+        if row.get("crew") is not None and row["crew"] not in existing:
+            report.add_error(line, f"crew: Crew with id {row['crew']} does not exist")
+        else:
+            valid.append((line, row))
+
+    if report.dry_run:
+        return valid
+
+    # Места в командах резервируем одним условным UPDATE на команду; если мест
+    # на весь чанк не хватает — занимаем оставшиеся, лишние строки отклоняем
+    accepted: Dict[int, int] = {}
+    for crew_id, count in Counter(row["crew"] for _, row in valid if row.get("crew") is not None).items():
+        try:
+            crew_crud.reserve_seats(db, crew_id, count)
+            accepted[crew_id] = count
+        except crew_crud.CrewCapacityError:
+            crew = crew_crud.get_crew(db, crew_id)
+            free = max(crew.max_members - crew.member_count, 0)
+            try:
+                crew_crud.reserve_seats(db, crew_id, free)
+                accepted[crew_id] = free
+            except crew_crud.CrewCapacityError:
+                accepted[crew_id] = 0
+
+    result = []
+    for line, row in valid:
+        crew_id = row.get("crew")
+        if crew_id is None:
+            result.append((line, row))
+        elif accepted[crew_id] > 0:
+            accepted[crew_id] -= 1
+            result.append((line, row))
+        else:
+            report.add_error(line, f"crew: Crew with id {crew_id} is full")
+    return result
+
+
+def _check_robots(
+    db: Session,
+    chunk: List[Tuple[int, dict]],
+    report: ImportReport,
+    upsert: bool,
+    seen_names: set
+) -> Tuple[List[Tuple[int, dict]], List[dict]]:
+    """Разделить чанк роботов на новые строки и обновления существующих (по name)"""
+    fresh = []
+    for line, row in chunk:
+        if row["name"] in seen_names:
+            report.add_error(line, f"name: Robot {row['name']} is duplicated in the file")
+        else:
+            seen_names.add(row["name"])
+            fresh.append((line, row))
+
+    names = [row["name"] for _, row in fresh]
+    existing = dict(db.query(Robots.name, Robots.id).filter(Robots.name.in_(names)).all()) if names else {}
+
+    inserts, updates = [], []
+    for line, row in fresh:
+        robot_id = existing.get(row["name"])
+        if robot_id is None:
+            inserts.append((line, row))
+        elif upsert:
+            updates.append({"id": robot_id, **row})
+        else:
+            report.add_error(line, f"name: Robot with name {row['name']} already exists")
+    return inserts, updates
+
+
+# --- основной цикл ---
+
+def _flush_chunk(
+    db: Session,
+    entity: str,
+    chunk: List[Tuple[int, dict]],
+    report: ImportReport,
+    upsert: bool,
+    seen_names: set
+) -> None:
+    model = ENTITIES[entity][0]
+    updates: List[dict] = []
+    # Ошибки проверок и увиденные имена учитываются, только если чанк записан
+    mark = report.mark()
+    names = set(seen_names)
+    try:
+        if entity == "employees":
+            chunk = _check_employees(db, chunk, report)
+        elif entity == "robots":
+            chunk, updates = _check_robots(db, chunk, report, upsert, names)
+
+        if not report.dry_run:
+            _write_chunk(db, entity, model, chunk, updates)
+    except Exception:
+        db.rollback()
+        report.restore(mark)
+        raise
+    seen_names |= names
+    report.imported += len(chunk)
+    report.updated += len(updates)
+
+
+def _write_chunk(db: Session, entity: str, model, chunk: List[Tuple[int, dict]], updates: List[dict]) -> None:
+    if chunk:
+        db.execute(insert(model), [row for _, row in chunk])
+        if entity in (table_views.EMPLOYEES, table_views.TRANSPORTS):
+            # id вставленных строк неизвестны — представления перестроятся целиком
+            table_views.record_change(db, entity, None)
+    if updates:
+        # Bulk UPDATE по первичному ключу (executemany)
+        db.execute(update(model), updates)
+    if entity == "robots" and (chunk or updates):
+        # Новые роботы могут совпасть по id со ссылками задач; их id неизвестны — пересчёт всех ссылок
+        task_projection.refresh_robots(db, None if chunk else [row["id"] for row in updates])
+    db.commit()
+
+
+def _import_chunk(
+    db: Session,
+    entity: str,
+    chunk: List[Tuple[int, dict]],
+    report: ImportReport,
+    upsert: bool,
+    seen_names: set
+) -> None:
+    """Записать чанк; если БД его отвергла — по одной строке, чтобы ошибка
+    досталась своей строке, а остальные строки чанка сохранились"""
+    try:
+        _flush_chunk(db, entity, chunk, report, upsert, seen_names)
+        return
+    except SQLAlchemyError as e:
+        if len(chunk) == 1:
+            report.add_error(chunk[0][0], _format_database_error(e))
+            return
+    for line, row in chunk:
+        try:
+            _flush_chunk(db, entity, [(line, row)], report, upsert, seen_names)
+        except SQLAlchemyError as e:
+            report.add_error(line, _format_database_error(e))
+
+
+def import_rows(
+    db: Session,
+    entity: str,
+    rows: Iterator[Dict[str, Any]],
+    upsert: bool = False,
+    dry_run: bool = False,
+    chunk_size: int = CHUNK_SIZE
+) -> dict:
+    if entity not in ENTITIES:
+        raise ValueError(f"Unknown import entity: {entity}")
+    rows = iter(rows)
+    schema = ENTITIES[entity][1]
+    fields = set(schema.model_fields)
+    report = ImportReport(entity, dry_run)
+    seen_names: set = set()
+    chunk: List[Tuple[int, dict]] = []
+
+    # Первая строка файла — заголовок, данные начинаются со второй
+    for line in count(2):
+        try:
+            raw = next(rows, None)
+        except (csv.Error, UnicodeDecodeError) as e:
+            # Прочитанные строки записываются, остаток файла — одна ошибка в отчёте
+            report.add_error(line, f"file: cannot read the rest of the file: {e}")
+            break
+        if raw is None:
+            break
+        report.total_rows += 1
+        try:
+            item: BaseModel = schema(**_clean(raw, fields))
+        except ValidationError as e:
+            report.add_error(line, _format_validation_error(e))
+            continue
+        chunk.append((line, item.dict()))
+        if len(chunk) >= chunk_size:
+            _import_chunk(db, entity, chunk, report, upsert, seen_names)
+            chunk = []
+
+    if chunk:
+        _import_chunk(db, entity, chunk, report, upsert, seen_names)
+
+    if not dry_run and (report.imported or report.updated):
+        # id вставленных строк не возвращаются multi-row INSERT'ом —
+        # индекс и реестр перезагрузятся лениво при следующем обращении
+        search_index.index.clear()
+        registry.invalidate()
+        cache.invalidate(*CACHE_TAGS[entity])
+        invalidation.publish(entity)
+    return report.to_dict()
+
+
+def import_file(
+    db: Session,
+    entity: str,
+    stream: BinaryIO,
+    filename: str,
+    upsert: bool = False,
+    dry_run: bool = False
+) -> dict:
+    return import_rows(db, entity, iter_rows(stream, filename), upsert=upsert, dry_run=dry_run)
@@ -0,0 +1,253 @@
+"""Общий для всех воркеров кэш чтений в Redis (cache-aside с тегами).
+
+Результат чтения сериализуется по схеме ответа в JSON и кладётся в Redis под
+ключом, в который входят версии тегов (сущностей), от которых он зависит.
+Запись в сущность увеличивает версию её тега (invalidate), и все ключи со
+старой версией перестают читаться — сбрасываются ровно зависимые записи, а
+сами они доживают до TTL. Версии читаются до запроса в БД, поэтому результат,
+посчитанный параллельно с записью, сохраняется под устаревшим ключом и не
+будет отдан.
+
+Недоступность Redis не ломает чтения: после ошибки кэш на RETRY_INTERVAL
+секунд переходит в режим «мимо кэша», а неотправленные инвалидации
+досылаются при восстановлении. Для тестов есть MemoryBackend
+(CACHE_BACKEND=memory) с тем же подмножеством API, что и redis.Redis.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import redis
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+from app.services.outages import OutageLog
+from app.services.singleflight import flights
+
+logger = logging.getLogger(__name__)
+
+RETRY_INTERVAL = 5.0
+
+EMPLOYEES = "employees"
+CREWS = "crews"
+ROBOTS = "robots"
+TRANSPORTS = "transports"
+TASKS = "tasks"
+SHIFTS = "shifts"
+
+# Дневное представление смен и теги, от которых оно зависит
+DAY_VIEW = "shifts.day"
+DAY_VIEW_TAGS = (SHIFTS, TASKS, EMPLOYEES, TRANSPORTS, ROBOTS)
+
+
+class MemoryBackend:
+    """Локальная замена Redis для тестов и разработки без сервера"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+
+    def _alive(self, key: str) -> bool:
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+            return False
+        return key in self._data
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._data[key] if self._alive(key) else None
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            return [self._data[key] if self._alive(key) else None for key in keys]
+
+    def set(self, key: str, value, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._data[key] = value if isinstance(value, bytes) else str(value).encode()
+            if ex:
+                self._expires[key] = time.monotonic() + ex
+            else:
+                self._expires.pop(key, None)
+        return True
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._data[key]) + 1 if self._alive(key) else 1
+            self._data[key] = str(value).encode()
+            return value
+
+    def flushdb(self) -> bool:
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+        return True
+
+
+def _create_backend():
+    if settings.CACHE_BACKEND == "redis":
+        return redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.CACHE_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.CACHE_SOCKET_TIMEOUT
+        )
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryBackend()
+    return None
+
+
+class Cache:
+    def __init__(self, backend=None, prefix: str = "", ttl: int = 300):
+        self.backend = backend
+        self.prefix = prefix
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+        self._pending_tags: set = set()
+        self._outage = OutageLog(logger, "Cache backend")
+        self.stats = {"hits": 0, "misses": 0, "errors": 0, "bypassed": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _available(self) -> bool:
+        if self.backend is None:
+            return False
+        if self._down_until and time.monotonic() < self._down_until:
+            return False
+        if self._pending_tags:
+            self._flush_pending()
+        return not self._down_until or time.monotonic() >= self._down_until
+
+    def _failed(self, error: Exception) -> None:
+        with self._lock:
+            self.stats["errors"] += 1
+            self._down_until = time.monotonic() + RETRY_INTERVAL
+        self._outage.failed(error)
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _flush_pending(self) -> None:
+        with self._lock:
+            tags, self._pending_tags = self._pending_tags, set()
+        try:
+            for tag in tags:
+                self.backend.incr(self._tag_key(tag))
+        except redis.RedisError as e:
+            with self._lock:
+                self._pending_tags |= tags
+            self._failed(e)
+            return
+        self._outage.recovered()
+
+    def invalidate(self, *tags: str) -> None:
+        """Сбросить все записи, помеченные любым из тегов"""
+        if self.backend is None or not tags:
+            return
+        if not self._available():
+            # Досылаем при восстановлении; до этого записи ограничены TTL
+            with self._lock:
+                self._pending_tags.update(tags)
+            return
+        try:
+            for tag in tags:
+                self.backend.incr(self._tag_key(tag))
+        except redis.RedisError as e:
+            with self._lock:
+                self._pending_tags.update(tags)
+            self._failed(e)
+
+    def _key(self, namespace: str, params: Any, versions: List[Optional[bytes]]) -> str:
+        raw = json.dumps(jsonable_encoder(params), sort_keys=True, ensure_ascii=False)
+        digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+        stamp = ".".join((v or b"0").decode() for v in versions)
+        return f"{self.prefix}{namespace}:{digest}:{stamp}"
+
+    def fetch(
+        self,
+        namespace: str,
+        params: Any,
+        tags: Iterable[str],
+        loader: Callable[[], Any],
+        schema=None,
+        ttl: Optional[int] = None
+    ) -> Any:
+        """Вернуть данные из кэша или вызвать loader и сохранить результат.
+
+        loader возвращает ORM-объект(ы) или уже сериализуемые данные; schema —
+        pydantic-модель ответа, по которой ORM-объекты превращаются в JSON.
+        Возвращается всегда JSON-совместимое значение.
+        """
+        if not self._available():
+            with self._lock:
+                self.stats["bypassed"] += 1
+            return _serialize(loader(), schema)
+
+        tags = list(tags)
+        try:
+            versions = self.backend.mget([self._tag_key(tag) for tag in tags]) if tags else []
+            key = self._key(namespace, params, versions)
+            payload = self.backend.get(key)
+        except redis.RedisError as e:
+            self._failed(e)
+            return _serialize(loader(), schema)
+        self._outage.recovered()
+
+        if payload is not None:
+            with self._lock:
+                self.stats["hits"] += 1
+            return json.loads(payload)
+
+        with self._lock:
+            self.stats["misses"] += 1
+        data = _serialize(loader(), schema)
+        try:
+            self.backend.set(key, json.dumps(data, ensure_ascii=False).encode("utf-8"), ex=ttl or self.ttl)
+        except redis.RedisError as e:
+            self._failed(e)
+        return data
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                "backend": settings.CACHE_BACKEND if self.backend is not None else "off",
+                "available": self.backend is not None and time.monotonic() >= self._down_until,
+                "pending_invalidations": len(self._pending_tags),
+                "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+                **self.stats,
+            }
+
+
+def _serialize(value: Any, schema) -> Any:
+    if schema is not None and value is not None:
+        if isinstance(value, list):
+            value = [schema.model_validate(item) for item in value]
+        else:
+            value = schema.model_validate(value)
+    return jsonable_encoder(value)
+
+
+cache = Cache(_create_backend(), prefix=settings.CACHE_PREFIX, ttl=settings.CACHE_TTL)
+
+
+def fetch(namespace: str, params: Any, tags: Iterable[str], loader: Callable[[], Any], schema=None, ttl: Optional[int] = None) -> Any:
+    return cache.fetch(namespace, params, tags, loader, schema=schema, ttl=ttl)
+
+
+def invalidate(*tags: str) -> None:
+    cache.invalidate(*tags)
+    if set(tags) & set(DAY_VIEW_TAGS):
+        forget_day_view()
+
+
+def forget_day_view() -> None:
+    """Сбросить дни, сохранённые single-flight: иначе они переживают инвалидацию Redis на SINGLEFLIGHT_TTL"""
+    flights.forget(DAY_VIEW)
@@ -0,0 +1,280 @@
+"""Колоночная выгрузка задач (Parquet / Arrow IPC) для аналитики.
+
+Задачи выгружаются плоскими строками вместе со сменой, исполнителем,
+транспортом и роботом, плюс метрики геометрии маршрута из geojson (число
+точек, длина линий в км, охватывающий прямоугольник). Строки читаются
+серверным курсором (stream_results) пачками по batch_size и сразу пишутся
+отдельной группой строк Parquet / батчем Arrow, поэтому память не зависит от
+объёма выгрузки. Если диапазон дотягивается до архива, после горячих задач
+выгружаются архивные (колонка archived).
+
+Используется ручкой GET /api/v1/exports/tasks и скриптом export_tasks.py.
+"""
+import math
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+
+from app.database import engine
+from app.models.database_models import (
+    Employee, Robots, Shift, ShiftArchive, Task, TaskArchive, Transport
+)
+
+PARQUET = "parquet"
+ARROW = "arrow"
+FORMATS = {
+    PARQUET: ("application/vnd.apache.parquet", "parquet"),
+    ARROW: ("application/vnd.apache.arrow.stream", "arrow"),
+}
+DEFAULT_BATCH_SIZE = 50_000
+EARTH_RADIUS_KM = 6371.0088
+
+SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("archived", pa.bool_()),
+    ("type", pa.string()),
+    ("time_start", pa.timestamp("us")),
+    ("time_end", pa.timestamp("us")),
+    ("duration_minutes", pa.float64()),
+    ("shift_id", pa.int64()),
+    ("shift_date", pa.timestamp("us")),
+    ("shift_start", pa.timestamp("us")),
+    ("shift_end", pa.timestamp("us")),
+    ("executor_id", pa.int64()),
+    ("executor_name", pa.string()),
+    ("executor_tg", pa.string()),
+    ("executor_crew", pa.int64()),
+    ("transport_id", pa.int64()),
+    ("transport_name", pa.string()),
+    ("transport_gov_number", pa.string()),
+    ("robot_name", pa.int64()),
+    ("robot_series", pa.int64()),
+    ("tickets", pa.list_(pa.string())),
+    ("ticket_count", pa.int32()),
+    ("geojson_filename", pa.string()),
+    ("geometry_points", pa.int32()),
+    ("route_length_km", pa.float64()),
+    ("bbox_min_lon", pa.float64()),
+    ("bbox_min_lat", pa.float64()),
+    ("bbox_max_lon", pa.float64()),
+    ("bbox_max_lat", pa.float64()),
+])
+
+
+# --- метрики геометрии ---
+
+def _haversine_km(a, b) -> float:
+    lon1, lat1, lon2, lat2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+
+
+def _lines(geometry: dict) -> List[list]:
+    kind = geometry.get("type")
+    coordinates = geometry.get("coordinates") or []
+    if kind == "LineString":
+        return [coordinates]
+    if kind in ("MultiLineString", "Polygon"):
+        return list(coordinates)
+    if kind == "MultiPolygon":
+        return [ring for polygon in coordinates for ring in polygon]
+    if kind == "Point":
+        return [[coordinates]] if coordinates else []
+    if kind == "MultiPoint":
+        return [[point] for point in coordinates]
+    if kind == "GeometryCollection":
+        return [line for g in geometry.get("geometries") or [] for line in _lines(g)]
+    return []
+
+
+def geometry_metrics(geojson: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Число точек, суммарная длина линий (км) и bbox GeoJSON; None-поля, если геометрии нет"""
+    metrics = {"geometry_points": 0, "route_length_km": None,
+               "bbox_min_lon": None, "bbox_min_lat": None, "bbox_max_lon": None, "bbox_max_lat": None}
+    if not isinstance(geojson, dict):
+        return metrics
+    if geojson.get("type") == "FeatureCollection":
+        geometries = [f.get("geometry") for f in geojson.get("features") or [] if isinstance(f, dict)]
+    elif geojson.get("type") == "Feature":
+        geometries = [geojson.get("geometry")]
+    else:
+        geometries = [geojson]
+
+    points, length = 0, 0.0
+    min_lon = min_lat = math.inf
+    max_lon = max_lat = -math.inf
+    for geometry in geometries:
+        if not isinstance(geometry, dict):
+            continue
+        for line in _lines(geometry):
+            previous = None
+            for point in line:
+                if not isinstance(point, (list, tuple)) or len(point) < 2:
+                    continue
+                lon, lat = float(point[0]), float(point[1])
+                points += 1
+                min_lon, max_lon = min(min_lon, lon), max(max_lon, lon)
+                min_lat, max_lat = min(min_lat, lat), max(max_lat, lat)
+                if previous is not None and geometry.get("type") not in ("Point", "MultiPoint"):
+                    length += _haversine_km(previous, (lon, lat))
+                previous = (lon, lat)
+    if points:
+        metrics.update(geometry_points=points, route_length_km=round(length, 4),
+                       bbox_min_lon=min_lon, bbox_min_lat=min_lat, bbox_max_lon=max_lon, bbox_max_lat=max_lat)
+    return metrics
+
+
+# --- чтение ---
+
+def _query(task_model, shift_model, start_date: Optional[datetime], end_date: Optional[datetime]):
+    query = (
+        select(
+            task_model.id, task_model.type, task_model.time_start, task_model.time_end,
+            task_model.shift_id, shift_model.date.label("shift_date"),
+            shift_model.time_start.label("shift_start"), shift_model.time_end.label("shift_end"),
+            task_model.executor, Employee.firstname, Employee.lastname, Employee.patronymic,
+            Employee.tg, Employee.crew, task_model.transport_id, Transport.name.label("transport_name"),
+            Transport.gov_number, task_model.robot_name, Robots.series.label("robot_series"),
+            task_model.tickets, task_model.geojson_filename, task_model.geojson,
+        )
+        .select_from(task_model)
+        .join(shift_model, shift_model.id == task_model.shift_id)
+        .outerjoin(Employee, Employee.id == task_model.executor)
+        .outerjoin(Transport, Transport.id == task_model.transport_id)
+        .outerjoin(Robots, Robots.name == task_model.robot_name)
+        .order_by(task_model.id)
+    )
+    conditions = []
+    if start_date is not None:
+        conditions.append(task_model.time_start >= start_date)
+    if end_date is not None:
+        conditions.append(task_model.time_start < end_date)
+    return query.where(and_(*conditions)) if conditions else query
+
+
+def _record(row, archived: bool) -> dict:
+    name = " ".join(p for p in (row.firstname, row.lastname, row.patronymic) if p) or None
+    tickets = list(row.tickets or [])
+    duration = (row.time_end - row.time_start).total_seconds() / 60 if row.time_start and row.time_end else None
+    return {
+        "id": row.id,
+        "archived": archived,
+        "type": getattr(row.type, "value", row.type),
+        "time_start": row.time_start,
+        "time_end": row.time_end,
+        "duration_minutes": duration,
+        "shift_id": row.shift_id,
+        "shift_date": row.shift_date,
+        "shift_start": row.shift_start,
+        "shift_end": row.shift_end,
+        "executor_id": row.executor,
+        "executor_name": name,
+        "executor_tg": row.tg,
+        "executor_crew": row.crew,
+        "transport_id": row.transport_id,
+        "transport_name": row.transport_name,
+        "transport_gov_number": row.gov_number,
+        "robot_name": row.robot_name,
+        "robot_series": row.robot_series,
+        "tickets": tickets,
+        "ticket_count": len(tickets),
+        "geojson_filename": row.geojson_filename,
+        **geometry_metrics(row.geojson),
+    }
+
+
+def iter_batches(start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[pa.RecordBatch]:
+    """RecordBatch'и задач (горячих, затем архивных, если диапазон до них дотягивается)"""
+    from app.services import archive
+
+    with engine.connect() as conn:
+        sources = [(Task, Shift, False)]
+        with Session(bind=conn) as db:
+            if archive.reaches_tasks(db, start_date):
+                sources.append((TaskArchive, ShiftArchive, True))
+        for task_model, shift_model, archived in sources:
+            result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(
+                _query(task_model, shift_model, start_date, end_date)
+            )
+            for rows in result.partitions(batch_size):
+                yield pa.RecordBatch.from_pylist([_record(row, archived) for row in rows], schema=SCHEMA)
+
+
+# --- запись ---
+
+def _writer(sink, fmt: str, compression: str):
+    if fmt == PARQUET:
+        return pq.ParquetWriter(sink, SCHEMA, compression=compression)
+    return pa.ipc.new_stream(sink, SCHEMA)
+
+
+def _write_batch(writer, batch: pa.RecordBatch, fmt: str, batch_size: int) -> None:
+    if fmt == PARQUET:
+        writer.write_batch(batch, row_group_size=batch_size)
+    else:
+        writer.write_batch(batch)
+
+
+def write(sink: BinaryIO, fmt: str = PARQUET, start_date: Optional[datetime] = None,
+          end_date: Optional[datetime] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+          compression: str = "zstd") -> int:
+    """Записать выгрузку в файл или поток; каждая пачка — группа строк Parquet / батч Arrow"""
+    rows = 0
+    writer = _writer(sink, fmt, compression)
+    try:
+        for batch in iter_batches(start_date, end_date, batch_size):
+            _write_batch(writer, batch, fmt, batch_size)
+            rows += batch.num_rows
+    finally:
+        writer.close()
+    return rows
+
+
+class _ChunkSink:
+    """Файлоподобный приёмник, из которого stream() забирает уже записанные байты"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def stream(fmt: str = PARQUET, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+           batch_size: int = DEFAULT_BATCH_SIZE, compression: str = "zstd") -> Iterator[bytes]:
+    """Байты выгрузки по мере записи пачек (для StreamingResponse)"""
+    sink = _ChunkSink()
+    writer = _writer(sink, fmt, compression)
+    try:
+        for batch in iter_batches(start_date, end_date, batch_size):
+            _write_batch(writer, batch, fmt, batch_size)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -0,0 +1,29 @@
+"""Извлечение тикетов из GeoJSON (используется ручкой /geojson/decode и фоновой задачей)"""
+import re
+from typing import Any, List
+
+TICKET_PATTERN = re.compile(r'([A-Z]{2,}-?\d+)', re.IGNORECASE)
+
+
+def extract_tickets_from_json(data: Any, tickets: set) -> None:
+    """
+    Рекурсивно извлекает тикеты из JSON структуры.
+    Ищет строки в формате 'PREFIX-числа', например 'SDGLOGISTICS-482874'
+    """
+    if isinstance(data, dict):
+        for value in data.values():
+            extract_tickets_from_json(value, tickets)
+    elif isinstance(data, list):
+        for item in data:
+            extract_tickets_from_json(item, tickets)
+    elif isinstance(data, str):
+        # Ищем паттерн: буквы-дефис-цифры (например, SDGLOGISTICS-482874)
+        for match in TICKET_PATTERN.findall(data):
+            tickets.add(match)
+
+
+def decode_tickets(geojson: Any) -> List[str]:
+    """Список тикетов в формате 'st.yandex-team.ru/TICKET'"""
+    tickets = set()
+    extract_tickets_from_json(geojson, tickets)
+    return [f"st.yandex-team.ru/{ticket}" for ticket in sorted(tickets)]
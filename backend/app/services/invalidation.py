@@ -0,0 +1,455 @@
+"""Шина инвалидации in-process кэшей между воркерами.
+
+Пути записи после commit публикуют короткое сообщение «сущность + id»
+(publish). Каждый воркер подписан на канал и в фоновом потоке обновляет свои
+локальные структуры: реестр справочников, поисковый индекс, кэш виджетов,
+автомат TG сценариев. Собственные сообщения воркер пропускает — локальное
+состояние уже обновлено write-through хуками CRUD.
+
+Транспорт:
+- redis — Redis pub/sub (INVALIDATION_BUS=redis, по умолчанию);
+- socket — локальный TCP брокер (LocalBroker) для тестов и запуска без Redis;
+- off — шина выключена (один воркер).
+
+Сообщение: {"o": id процесса, "e": сущность, "i": [id] или null}. null
+означает «изменилось неизвестно что» (массовый импорт) — сбрасывается всё
+состояние сущности. После переподключения к брокеру сообщения могли быть
+потеряны, поэтому сбрасывается всё локальное состояние.
+
+Если публикация не удалась, следующие RETRY_INTERVAL секунд публикации
+пропускаются (пути записи не ждут таймаута брокера), а по пропущенным
+сущностям после восстановления рассылается сброс целиком.
+"""
+import json
+import logging
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional
+
+import redis
+
+from app.config import settings
+from app.services.outages import OutageLog
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "rnd:invalidation"
+RECONNECT_DELAY = 1.0
+# После ошибки публикации шина столько секунд пропускается, а не ждёт таймаута брокера
+RETRY_INTERVAL = 5.0
+
+EMPLOYEES = "employees"
+ROBOTS = "robots"
+TRANSPORTS = "transports"
+TASKS = "tasks"
+SHIFTS = "shifts"
+TG_SCENARIOS = "tg_scenarios"
+ARCHIVE = "archive"
+
+origin = uuid.uuid4().hex[:12]
+# Один сбой брокера на процесс: его видят и поток подписки, и публикации
+broker_outage = OutageLog(logger, "Invalidation broker")
+stats = {"published": 0, "received": 0, "applied": 0, "errors": 0, "resets": 0, "bypassed": 0}
+
+
+def encode(entity: str, ids: Optional[Iterable[int]]) -> bytes:
+    return json.dumps(
+        {"o": origin, "e": entity, "i": None if ids is None else list(ids)},
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+# --- обработчики на стороне подписчика ---
+
+def _forget_day_view() -> None:
+    """Кэш в Redis общий и уже сброшен писателем; локально остаются только дни в single-flight"""
+    from app.services import cache
+    cache.forget_day_view()
+
+
+def _refresh(model, ids: Optional[List[int]], put: Callable, remove: Callable, reset: Callable) -> None:
+    _forget_day_view()
+    if ids is None:
+        reset()
+        return
+    from app.database import SessionLocal
+    db = SessionLocal()
+    try:
+        found = {obj.id: obj for obj in db.query(model).filter(model.id.in_(ids)).all()}
+        for obj_id in ids:
+            if obj_id in found:
+                put(found[obj_id])
+            else:
+                remove(obj_id)
+    finally:
+        db.close()
+
+
+def _handle_employees(ids: Optional[List[int]]) -> None:
+    from app.models.database_models import Employee
+    from app.services import search_index
+    from app.services.registry import registry
+
+    def put(employee):
+        registry.put_employee(employee)
+        search_index.index_employee(employee)
+
+    def remove(employee_id):
+        registry.remove_employee(employee_id)
+        search_index.remove(search_index.EMPLOYEE, employee_id)
+
+    _refresh(Employee, ids, put, remove, lambda: (registry.invalidate(), search_index.index.clear()))
+
+
+def _handle_robots(ids: Optional[List[int]]) -> None:
+    from app.models.database_models import Robots
+    from app.services import search_index
+    from app.services.registry import registry
+
+    def put(robot):
+        registry.put_robot(robot)
+        search_index.index_robot(robot)
+
+    def remove(robot_id):
+        registry.remove_robot(robot_id)
+        search_index.remove(search_index.ROBOT, robot_id)
+
+    _refresh(Robots, ids, put, remove, lambda: (registry.invalidate(), search_index.index.clear()))
+
+
+def _handle_transports(ids: Optional[List[int]]) -> None:
+    from app.models.database_models import Transport
+    from app.services import search_index
+    from app.services.registry import registry
+
+    def put(transport):
+        registry.put_transport(transport)
+        search_index.index_transport(transport)
+
+    def remove(transport_id):
+        registry.remove_transport(transport_id)
+        search_index.remove(search_index.TRANSPORT, transport_id)
+
+    _refresh(Transport, ids, put, remove, lambda: (registry.invalidate(), search_index.index.clear()))
+
+
+def _handle_tasks(ids: Optional[List[int]]) -> None:
+    from app.models.database_models import Task
+    from app.services import search_index, widgets
+
+    widgets.invalidate()
+    _refresh(
+        Task, ids,
+        search_index.index_task,
+        lambda task_id: search_index.remove(search_index.TASK, task_id),
+        search_index.index.clear
+    )
+
+
+def _handle_shifts(ids: Optional[List[int]]) -> None:
+    from app.services import widgets
+    widgets.invalidate()
+    _forget_day_view()
+
+
+def _handle_tg_scenarios(ids: Optional[List[int]]) -> None:
+    from app.services import tg_matcher
+    tg_matcher.invalidate()
+
+
+def _handle_archive(ids: Optional[List[int]]) -> None:
+    from app.services import archive
+    archive.invalidate()
+    _forget_day_view()
+
+
+HANDLERS: Dict[str, Callable[[Optional[List[int]]], None]] = {
+    EMPLOYEES: _handle_employees,
+    ROBOTS: _handle_robots,
+    TRANSPORTS: _handle_transports,
+    TASKS: _handle_tasks,
+    SHIFTS: _handle_shifts,
+    TG_SCENARIOS: _handle_tg_scenarios,
+    ARCHIVE: _handle_archive,
+}
+
+
+def reset_local_state() -> None:
+    """Сбросить всё локальное состояние (после потери связи с брокером)"""
+    stats["resets"] += 1
+    for handler in HANDLERS.values():
+        try:
+            handler(None)
+        except Exception as e:
+            stats["errors"] += 1
+            logger.exception("Invalidation reset failed: %s", e)
+
+
+def apply(payload: bytes) -> None:
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        stats["errors"] += 1
+        return
+    stats["received"] += 1
+    if message.get("o") == origin:
+        return
+    handler = HANDLERS.get(message.get("e"))
+    if handler is None:
+        return
+    try:
+        handler(message.get("i"))
+        stats["applied"] += 1
+    except Exception as e:
+        stats["errors"] += 1
+        logger.exception("Invalidation handler for %s failed: %s", message.get("e"), e)
+
+
+# --- транспорт: Redis pub/sub ---
+
+class RedisBus:
+    def __init__(self, url: str):
+        self._client = redis.Redis.from_url(url, socket_connect_timeout=1, socket_timeout=1)
+        self._listener = redis.Redis.from_url(url, socket_connect_timeout=1)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self, payload: bytes) -> None:
+        self._client.publish(CHANNEL, payload)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="invalidation-bus", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        connected_before = False
+        while not self._stop.is_set():
+            pubsub = self._listener.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(CHANNEL)
+                broker_outage.recovered()
+                if connected_before:
+                    reset_local_state()
+                connected_before = True
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        apply(message["data"])
+            except redis.RedisError as e:
+                stats["errors"] += 1
+                broker_outage.failed(e)
+                self._stop.wait(RECONNECT_DELAY)
+            finally:
+                pubsub.close()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+
+# --- транспорт: локальный TCP брокер ---
+
+class LocalBroker:
+    """Минимальный брокер: пересылает каждую строку всем подключённым клиентам"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._clients: List[socket.socket] = []
+        self._lock = threading.Lock()
+        clients, lock = self._clients, self._lock
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                with lock:
+                    clients.append(self.connection)
+                try:
+                    for line in self.rfile:
+                        with lock:
+                            targets = list(clients)
+                        for client in targets:
+                            try:
+                                client.sendall(line)
+                            except OSError:
+                                pass
+                finally:
+                    with lock:
+                        clients.remove(self.connection)
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self._server = Server((host, port), Handler)
+        self.address = "%s:%d" % self._server.server_address
+        self._thread = threading.Thread(target=self._server.serve_forever, name="invalidation-broker", daemon=True)
+
+    def start(self) -> "LocalBroker":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            for client in self._clients:
+                try:
+                    client.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+class SocketBus:
+    def __init__(self, address: str):
+        host, port = address.rsplit(":", 1)
+        self._address = (host, int(port))
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._connected = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self, payload: bytes) -> None:
+        with self._lock:
+            if self._sock is None:
+                raise ConnectionError("invalidation broker is not connected")
+            self._sock.sendall(payload + b"\n")
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="invalidation-bus", daemon=True)
+        self._thread.start()
+        self._connected.wait(timeout=2)
+
+    def _run(self) -> None:
+        connected_before = False
+        while not self._stop.is_set():
+            try:
+                sock = socket.create_connection(self._address, timeout=2)
+                sock.settimeout(1.0)
+            except OSError as e:
+                stats["errors"] += 1
+                broker_outage.failed(e)
+                self._stop.wait(RECONNECT_DELAY)
+                continue
+            broker_outage.recovered()
+            with self._lock:
+                self._sock = sock
+            if connected_before:
+                reset_local_state()
+            connected_before = True
+            self._connected.set()
+            buffer = b""
+            try:
+                while not self._stop.is_set():
+                    try:
+                        chunk = sock.recv(65536)
+                    except socket.timeout:
+                        continue
+                    if not chunk:
+                        break
+                    buffer += chunk
+                    *lines, buffer = buffer.split(b"\n")
+                    for line in lines:
+                        if line:
+                            apply(line)
+            except OSError as e:
+                stats["errors"] += 1
+                broker_outage.failed(e)
+            finally:
+                with self._lock:
+                    self._sock = None
+                sock.close()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._lock:
+            if self._sock is not None:
+                try:
+                    self._sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+
+# --- публичный интерфейс ---
+
+_bus = None
+_publish_lock = threading.Lock()
+_down_until = 0.0
+# Сущности, изменения которых не удалось опубликовать: после восстановления
+# по ним рассылается сброс целиком (ids неизвестны — их могло быть много)
+_pending: set = set()
+
+
+def start() -> None:
+    """Подключиться к шине (вызывается при старте приложения)"""
+    global _bus
+    if _bus is not None or settings.INVALIDATION_BUS == "off":
+        return
+    if settings.INVALIDATION_BUS == "socket":
+        _bus = SocketBus(settings.INVALIDATION_SOCKET)
+    else:
+        _bus = RedisBus(settings.REDIS_URL)
+    _bus.start()
+
+
+def stop() -> None:
+    global _bus, _down_until
+    if _bus is not None:
+        _bus.stop()
+        _bus = None
+    with _publish_lock:
+        _down_until = 0.0
+        _pending.clear()
+
+
+def _send(entity: str, ids: Optional[Iterable[int]]) -> None:
+    global _down_until
+    try:
+        _bus.publish(encode(entity, ids))
+        stats["published"] += 1
+    except (redis.RedisError, OSError) as e:
+        with _publish_lock:
+            stats["errors"] += 1
+            _down_until = time.monotonic() + RETRY_INTERVAL
+        broker_outage.failed(e)
+        raise
+    broker_outage.recovered()
+
+
+def publish(entity: str, ids: Optional[Iterable[int]] = None) -> None:
+    """Сообщить остальным воркерам об изменении сущностей (после commit)"""
+    if _bus is None:
+        return
+    if _down_until and time.monotonic() < _down_until:
+        with _publish_lock:
+            stats["bypassed"] += 1
+            _pending.add(entity)
+        return
+    try:
+        with _publish_lock:
+            pending = sorted(_pending)
+            _pending.clear()
+        for missed in pending:
+            _send(missed, None)
+        if entity not in pending:
+            _send(entity, ids)
+    except (redis.RedisError, OSError):
+        # Брокер недоступен: подписчики тоже могли потерять соединение и сбросят состояние
+        # при переподключении; на случай, если отвалился только издатель, сущности досылаются
+        with _publish_lock:
+            _pending.update(pending)
+            _pending.add(entity)
+
+
+def get_stats() -> dict:
+    return {
+        "origin": origin,
+        "bus": settings.INVALIDATION_BUS if _bus is not None else "off",
+        "available": _bus is not None and time.monotonic() >= _down_until,
+        "pending": len(_pending),
+        **stats,
+    }
@@ -0,0 +1,175 @@
+"""Метрики Prometheus для API.
+
+MetricsMiddleware — ASGI middleware без буферизации ответа: считает время
+запроса, размер тела ответа, запросы в работе и число SQL-запросов за запрос
+(по событию before_cursor_execute движка). Метка route — шаблон пути
+(/api/v1/shifts/date/{date}), поэтому число рядов не зависит от параметров.
+
+Состояние пула соединений и статистика кэшей (Redis-кэш, реестр, виджеты,
+single-flight) снимаются в момент опроса /metrics коллектором.
+
+При нескольких воркерах задайте PROMETHEUS_MULTIPROC_DIR: метрики запросов
+агрегируются по всем процессам, а метрики коллектора отражают процесс,
+ответивший на опрос.
+"""
+import os
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from starlette.routing import Match
+
+from app.database import engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency", ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being processed", ["method", "route"], multiprocess_mode="livesum"
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body size", ["method", "route"], buckets=SIZE_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request", ["method", "route"], buckets=QUERY_BUCKETS
+)
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed", ["route"])
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out from the pool")
+DB_POOL_CONNECTS = Counter("db_pool_connections_created_total", "New DB connections opened by the pool")
+
+# Счётчик SQL-запросов текущего запроса; список, чтобы его видели потоки run_in_threadpool
+_query_counter: ContextVar[Optional[List[int]]] = ContextVar("query_counter", default=None)
+_current_route: ContextVar[str] = ContextVar("current_route", default="background")
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+    DB_QUERIES.labels(_current_route.get()).inc()
+
+
+@event.listens_for(engine.pool, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKOUTS.inc()
+
+
+@event.listens_for(engine.pool, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    DB_POOL_CONNECTS.inc()
+
+
+ROUTE_CACHE_SIZE = 4096
+
+
+class MetricsMiddleware:
+    def __init__(self, app, router, skip_paths=("/metrics",)):
+        self.app = app
+        self.router = router
+        self.skip_paths = set(skip_paths)
+        self._routes = {}
+
+    def _route_template(self, scope) -> str:
+        """Шаблон пути маршрута (определяется до вызова приложения, с кэшем по пути)"""
+        key = (scope["method"], scope["path"])
+        template = self._routes.get(key)
+        if template is None:
+            template = "unmatched"
+            for route in self.router.routes:
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    template = getattr(route, "path", template)
+                    break
+            if len(self._routes) >= ROUTE_CACHE_SIZE:
+                self._routes.clear()
+            self._routes[key] = template
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route_template(scope)
+        status = [500]
+        size = [0]
+        counter = [0]
+        counter_token = _query_counter.set(counter)
+        route_token = _current_route.set(route)
+        in_progress = REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                size[0] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            REQUEST_LATENCY.labels(method, route, str(status[0])).observe(time.perf_counter() - start)
+            RESPONSE_SIZE.labels(method, route).observe(size[0])
+            REQUEST_QUERIES.labels(method, route).observe(counter[0])
+            _query_counter.reset(counter_token)
+            _current_route.reset(route_token)
+
+
+# --- метрики, снимаемые в момент опроса ---
+
+class StateCollector:
+    """Пул соединений и статистика in-process кэшей"""
+
+    def collect(self):
+        pool = engine.pool
+        pool_gauge = GaugeMetricFamily("db_pool_connections", "DB pool connections by state", labels=["state"])
+        for state in ("checkedout", "checkedin", "overflow", "size"):
+            method = getattr(pool, state, None)
+            if method is not None:
+                pool_gauge.add_metric([state], method())
+        yield pool_gauge
+
+        from app.services import cache, widgets
+        from app.services.registry import registry
+        from app.services.singleflight import flights
+
+        lookups = CounterMetricFamily("cache_lookups", "Cache lookups by cache and result", labels=["cache", "result"])
+        for result in ("hits", "misses", "errors", "bypassed"):
+            lookups.add_metric(["redis", result], cache.cache.stats[result])
+        for result in ("hits", "misses"):
+            lookups.add_metric(["widgets", result], widgets.stats[result])
+        lookups.add_metric(["registry", "hits"], sum(registry.hits.values()))
+        lookups.add_metric(["registry", "misses"], sum(registry.misses.values()))
+        for namespace, values in flights.stats().items():
+            lookups.add_metric([f"singleflight:{namespace}", "executions"], values["executions"])
+            lookups.add_metric([f"singleflight:{namespace}", "shared"], values["shared"])
+            lookups.add_metric([f"singleflight:{namespace}", "ttl_hits"], values["ttl_hits"])
+        yield lookups
+
+
+REGISTRY.register(StateCollector())
+
+
+def render() -> bytes:
+    """Текст экспозиции Prometheus (с агрегацией по процессам в multiprocess режиме)"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(StateCollector())
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
@@ -0,0 +1,328 @@
+"""Рассылка исполнителям сообщений о задачах смены.
+
+Конвейер из трёх шагов:
+1. шаблон TgScenario.message_template компилируется один раз (CompiledTemplate);
+2. сообщения для всех исполнителей дня рендерятся пачкой из данных смен;
+3. отправка идёт в Celery-воркере (задача notifications.send) асинхронно с
+   ограничением параллелизма, лимитом скорости и повторами с экспоненциальной
+   задержкой; состояние запуска хранится в result backend.
+
+Транспорт подключаемый: LogTransport (по умолчанию, пишет в stdout) и
+TelegramTransport (Bot API по HTTP). Для локальной проверки TelegramTransport
+можно направить на заглушку app.services.notify_stub (TELEGRAM_API_URL).
+"""
+import asyncio
+import itertools
+import string
+import time
+import uuid
+from functools import lru_cache
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.crud import shift_crud
+from app.services.registry import registry
+
+# Как часто воркер сохраняет прогресс рассылки в result backend, секунд
+PROGRESS_INTERVAL = 1.0
+
+
+# --- шаблоны ---
+
+class TemplateError(ValueError):
+    pass
+
+
+class CompiledTemplate:
+    """Шаблон вида 'Привет, {firstname}! Задачи на {shift_date}:\\n{tasks}'.
+
+    Разбор выполняется один раз; render только склеивает готовые части.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self._parts: List[Tuple[str, Optional[str]]] = []
+        try:
+            for literal, field, spec, conversion in string.Formatter().parse(source):
+                if spec or conversion:
+                    raise TemplateError(f"Форматирование полей не поддерживается: {{{field}}}")
+                self._parts.append((literal, field))
+        except ValueError as e:
+            raise TemplateError(f"Некорректный шаблон: {e}")
+        self.fields = {field for _, field in self._parts if field}
+
+    def render(self, context: Dict[str, Any]) -> str:
+        out = []
+        for literal, field in self._parts:
+            out.append(literal)
+            if field:
+                value = context.get(field)
+                out.append("" if value is None else str(value))
+        return "".join(out)
+
+
+@lru_cache(maxsize=128)
+def compile_template(source: str) -> CompiledTemplate:
+    """Скомпилированный шаблон из кэша (ключ — текст шаблона)"""
+    return CompiledTemplate(source)
+
+
+# --- подготовка сообщений ---
+
+def _fmt_time(value: datetime) -> str:
+    return value.strftime("%H:%M") if value else ""
+
+
+def _task_line(db: Session, task) -> str:
+    robot = registry.robot(db, task.robot_name) if task.robot_name is not None else None
+    transport = registry.transport(db, task.transport_id) if task.transport_id is not None else None
+    parts = [f"{_fmt_time(task.time_start)}–{_fmt_time(task.time_end)}", getattr(task.type, "value", task.type)]
+    if robot is not None:
+        parts.append(f"робот {robot.name}")
+    if transport is not None:
+        parts.append(" ".join(p for p in (transport.name, transport.gov_number) if p))
+    if task.tickets:
+        parts.append(", ".join(task.tickets))
+    return " · ".join(parts)
+
+
+def render_shift_day(db: Session, date: datetime, template: CompiledTemplate) -> Tuple[List[dict], List[dict]]:
+    """Отрендерить сообщения всем исполнителям смен за дату.
+
+    Возвращает (сообщения, пропущенные исполнители без tg).
+    """
+    shifts = shift_crud.get_shifts_with_tasks_by_date(db, date)
+
+    by_executor: Dict[int, List[Tuple[Any, Any]]] = {}
+    for shift in shifts:
+        for task in sorted(shift.tasks, key=lambda t: t.time_start):
+            by_executor.setdefault(task.executor, []).append((shift, task))
+
+    tasks = [task for items in by_executor.values() for _, task in items]
+    registry.prefetch(
+        db,
+        robot_ids=[task.robot_name for task in tasks],
+        transport_ids=[task.transport_id for task in tasks],
+        employee_ids=by_executor,
+    )
+
+    messages, skipped = [], []
+    for executor_id, items in sorted(by_executor.items()):
+        employee = registry.employee(db, executor_id)
+        if employee is None or not employee.tg:
+            skipped.append({"executor": executor_id, "reason": "no tg"})
+            continue
+        shift = items[0][0]
+        context = {
+            "executor_name": " ".join(p for p in (employee.firstname, employee.lastname, employee.patronymic) if p),
+            "firstname": employee.firstname,
+            "lastname": employee.lastname,
+            "tg": employee.tg,
+            "shift_date": shift.date.strftime("%d.%m.%Y"),
+            "shift_start": _fmt_time(shift.time_start),
+            "shift_end": _fmt_time(shift.time_end),
+            "task_count": len(items),
+            "tasks": "\n".join(_task_line(db, task) for _, task in items),
+        }
+        messages.append({"executor": executor_id, "chat": employee.tg, "text": template.render(context)})
+    return messages, skipped
+
+
+# --- транспорт ---
+
+class TransientSendError(Exception):
+    """Временная ошибка отправки: сообщение можно повторить"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LogTransport:
+    async def send(self, chat: str, text: str) -> None:
+        print(f"[notify] -> {chat}: {text!r}")
+
+    async def aclose(self) -> None:
+        pass
+
+
+class TelegramTransport:
+    def __init__(self, token: str, base_url: str, timeout: float = 10.0):
+        self._url = f"{base_url.rstrip('/')}/bot{token}/sendMessage"
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def send(self, chat: str, text: str) -> None:
+        try:
+            response = await self._client.post(self._url, json={"chat_id": chat, "text": text})
+        except httpx.TransportError as e:
+            raise TransientSendError(str(e))
+        if response.status_code == 429 or response.status_code >= 500:
+            retry_after = None
+            try:
+                retry_after = response.json().get("parameters", {}).get("retry_after")
+            except ValueError:
+                pass
+            raise TransientSendError(f"HTTP {response.status_code}", retry_after)
+        if response.status_code >= 400:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+def get_transport():
+    if settings.NOTIFY_TRANSPORT == "telegram":
+        return TelegramTransport(settings.TELEGRAM_BOT_TOKEN, settings.TELEGRAM_API_URL)
+    return LogTransport()
+
+
+# --- отправка ---
+
+class RateLimiter:
+    """Token bucket: не больше rate сообщений в секунду в среднем"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+async def dispatch(
+    messages: List[dict],
+    transport=None,
+    concurrency: Optional[int] = None,
+    rate: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    base_delay: float = 0.5,
+    progress: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Отправить сообщения параллельно с ограничениями; вернуть сводку"""
+    own_transport = transport is None
+    transport = transport or get_transport()
+    semaphore = asyncio.Semaphore(concurrency or settings.NOTIFY_CONCURRENCY)
+    limiter = RateLimiter(settings.NOTIFY_RATE_PER_SEC if rate is None else rate)
+    retries = settings.NOTIFY_MAX_RETRIES if max_retries is None else max_retries
+    result = progress if progress is not None else {}
+    result.update({"total": len(messages), "sent": 0, "failed": 0, "retries": 0, "errors": []})
+
+    async def send_one(message: dict) -> None:
+        async with semaphore:
+            for attempt in itertools.count():
+                await limiter.acquire()
+                try:
+                    await transport.send(message["chat"], message["text"])
+                    result["sent"] += 1
+                    return
+                except TransientSendError as e:
+                    if attempt >= retries:
+                        error = str(e)
+                    else:
+                        result["retries"] += 1
+                        await asyncio.sleep(e.retry_after or base_delay * 2 ** attempt)
+                        continue
+                except Exception as e:
+                    error = str(e)
+                result["failed"] += 1
+                result["errors"].append({"executor": message.get("executor"), "chat": message["chat"], "error": error})
+                return
+
+    try:
+        await asyncio.gather(*[send_one(m) for m in messages])
+    finally:
+        if own_transport:
+            await transport.aclose()
+    return result
+
+
+# --- запуски рассылки ---
+
+def start_run(messages: List[dict], skipped: List[dict], dry_run: bool = False) -> Dict[str, Any]:
+    """Поставить отправку в очередь Celery и вернуть состояние запуска.
+
+    run_id — id задачи; состояние хранится в result backend, поэтому статус
+    читается из любого воркера API и переживает их перезапуск. Вызывать из
+    пула потоков: в режиме CELERY_TASK_ALWAYS_EAGER задача выполняется сразу.
+    """
+    from app.worker import celery_app, send_notifications
+
+    run_id = uuid.uuid4().hex
+    run = {
+        "run_id": run_id,
+        "status": "completed" if dry_run or not messages else "queued",
+        "created_at": datetime.now().isoformat(),
+        "total": len(messages),
+        "sent": 0,
+        "failed": 0,
+        "retries": 0,
+        "skipped": skipped,
+        "errors": [],
+        "messages": messages if dry_run else [],
+    }
+    if run["status"] == "completed":
+        celery_app.backend.store_result(run_id, run, "SUCCESS")
+        return run
+    # Начальное состояние сохраняется до постановки в очередь: PENDING без него — «нет такого запуска»
+    celery_app.backend.store_result(run_id, run, "PENDING")
+    send_notifications.apply_async((run, messages), task_id=run_id)
+    return get_run(run_id) or run
+
+
+def execute_run(run: Dict[str, Any], messages: List[dict], report=None) -> Dict[str, Any]:
+    """Отправить сообщения запуска (в Celery-воркере); report(run) периодически сохраняет прогресс"""
+
+    async def reporter():
+        while True:
+            report(run)
+            await asyncio.sleep(PROGRESS_INTERVAL)
+
+    async def main():
+        task = asyncio.ensure_future(reporter()) if report else None
+        try:
+            await dispatch(messages, progress=run)
+        finally:
+            if task:
+                task.cancel()
+
+    run["status"] = "running"
+    try:
+        asyncio.run(main())
+        run["status"] = "completed"
+    except Exception as e:
+        run["status"] = "failed"
+        run["errors"].append({"error": str(e)})
+    return run
+
+
+def get_run(run_id: str) -> Optional[Dict[str, Any]]:
+    """Состояние запуска из result backend; None — запуск не найден"""
+    from celery.result import AsyncResult
+    from app.worker import celery_app
+
+    result = AsyncResult(run_id, app=celery_app)
+    info = result.info
+    if isinstance(info, dict) and info.get("run_id") == run_id:
+        return info
+    if result.state == "FAILURE":
+        # Воркер упал, не вернув состояние запуска
+        return {"run_id": run_id, "status": "failed", "created_at": datetime.now(), "total": 0, "sent": 0,
+                "failed": 0, "retries": 0, "errors": [{"error": str(info)}]}
+    return None
@@ -0,0 +1,45 @@
+"""Локальная заглушка Telegram Bot API для проверки рассылок.
+
+Запуск:
+    uvicorn app.services.notify_stub:app --port 8081
+
+и в окружении бекенда:
+    NOTIFY_TRANSPORT=telegram TELEGRAM_API_URL=http://localhost:8081 TELEGRAM_BOT_TOKEN=test
+
+Заглушка принимает sendMessage, сохраняет сообщения в памяти (GET /messages)
+и может имитировать 429 для каждого N-го запроса (STUB_FAIL_EVERY).
+"""
+import os
+import itertools
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Telegram Bot API stub")
+
+messages = []
+_counter = itertools.count(1)
+FAIL_EVERY = int(os.getenv("STUB_FAIL_EVERY", "0"))
+
+
+@app.post("/bot{token}/sendMessage")
+async def send_message(token: str, payload: dict):
+    n = next(_counter)
+    if FAIL_EVERY and n % FAIL_EVERY == 0:
+        return JSONResponse(
+            status_code=429,
+            content={"ok": False, "error_code": 429, "parameters": {"retry_after": 0.05}}
+        )
+    messages.append({"chat_id": payload.get("chat_id"), "text": payload.get("text")})
+    return {"ok": True, "result": {"message_id": len(messages)}}
+
+
+@app.get("/messages")
+async def get_messages():
+    return messages
+
+
+@app.delete("/messages")
+async def clear_messages():
+    messages.clear()
+    return {"ok": True}
@@ -0,0 +1,61 @@
+"""Лог недоступности внешних сервисов (Redis, брокер шины) без спама.
+
+Пока сервис лежит, попытки переподключения идут каждые несколько секунд, и
+лог каждой из них забивал бы вывод. OutageLog пишет начало сбоя один раз,
+пока он длится — не чаще раза в OUTAGE_LOG_INTERVAL секунд с числом неудачных
+попыток, и один раз — восстановление с длительностью сбоя.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+OUTAGE_LOG_INTERVAL = 60.0
+
+
+class OutageLog:
+    def __init__(self, logger: logging.Logger, what: str, interval: float = OUTAGE_LOG_INTERVAL):
+        self.logger = logger
+        self.what = what
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._since: Optional[float] = None
+        self._failures = 0
+        self._next_report = 0.0
+
+    @property
+    def down(self) -> bool:
+        return self._since is not None
+
+    def failed(self, error: BaseException) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._failures += 1
+            if self._since is None:
+                self._since = now
+                self._next_report = now + self.interval
+                first = True
+            elif now >= self._next_report:
+                self._next_report = now + self.interval
+                first = False
+            else:
+                return
+            since, failures = self._since, self._failures
+        if first:
+            self.logger.warning("%s unavailable: %s", self.what, error)
+        else:
+            self.logger.warning(
+                "%s still unavailable after %.0f s (%d failed attempts): %s", self.what, now - since, failures, error
+            )
+
+    def recovered(self) -> None:
+        if self._since is None:
+            return
+        with self._lock:
+            if self._since is None:
+                return
+            since, failures = self._since, self._failures
+            self._since, self._failures = None, 0
+        self.logger.info(
+            "%s is back after %.0f s (%d failed attempts)", self.what, time.monotonic() - since, failures
+        )
@@ -0,0 +1,221 @@
+"""Профилирование отдельного запроса по требованию.
+
+Включается PROFILING_ENABLED=true; конкретный запрос профилируется, если в нём
+есть заголовок X-Profile или параметр ?profile= (при заданном PROFILING_TOKEN
+значение должно с ним совпадать; иначе подойдёт любое непустое, например 1).
+
+Пока запрос выполняется, поток-сэмплер каждые PROFILING_INTERVAL_MS снимает
+стеки потока event loop и потоков пула (туда уходят синхронные CRUD-вызовы) и
+складывает их в формат folded stacks («кадр;кадр;кадр N»), который читают
+flamegraph.pl, speedscope и inferno. Снимаются все активные потоки процесса,
+так что параллельные запросы попадут в профиль как шум. Кадры помечены категорией — [handler],
+[crud], [service], [orm], [db], [serialization], [framework] — чтобы
+ORM, сериализация и код ручки были видны на графе сразу.
+
+Профиль сохраняется в PROFILE_DIR, его id возвращается в заголовке
+X-Profile-Id (скачать: GET /profiles/{id}). С ?profile_inline=1 вместо
+ответа ручки возвращается сам профиль. Одновременно профилируется не больше
+одного запроса; остальные выполняются как обычно с X-Profile: busy.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Листовые кадры простаивающих потоков — такие сэмплы не несут информации
+IDLE_LEAVES = {
+    ("threading", "wait"),
+    ("selectors", "select"),
+    ("queue", "get"),
+    ("socket", "accept"),
+}
+
+CATEGORIES = (
+    ("app.routers", "handler"),
+    ("app.crud", "crud"),
+    ("app.services", "service"),
+    ("app.", "app"),
+    ("main", "app"),
+    ("sqlalchemy.orm", "orm"),
+    ("sqlalchemy", "db"),
+    ("pymysql", "db"),
+    ("sqlite3", "db"),
+    ("pydantic", "serialization"),
+    ("fastapi.encoders", "serialization"),
+    ("json", "serialization"),
+    ("fastapi", "framework"),
+    ("starlette", "framework"),
+    ("anyio", "framework"),
+)
+
+MAX_STACK_DEPTH = 200
+
+
+def _category(module: str) -> Optional[str]:
+    for prefix, category in CATEGORIES:
+        if module == prefix or module.startswith(prefix):
+            return category
+    return None
+
+
+def _frame_label(frame) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    label = f"{module}:{frame.f_code.co_name}"
+    category = _category(module)
+    return f"[{category}] {label}" if category else label
+
+
+class Sampler:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> float:
+        self._stop.set()
+        self._thread.join()
+        return time.perf_counter() - self.started
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                module = frame.f_globals.get("__name__", "")
+                if (module, frame.f_code.co_name) in IDLE_LEAVES:
+                    continue
+                stack: List[str] = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack.append(f"thread:{names.get(thread_id, thread_id)}")
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+
+def _requested(scope) -> Dict[str, str]:
+    headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    value = headers.get("x-profile") or (query.get("profile") or [""])[0]
+    inline = (query.get("profile_inline") or [""])[0] in ("1", "true")
+    return {"value": value, "inline": inline}
+
+
+def _allowed(value: str) -> bool:
+    if not value:
+        return False
+    if settings.PROFILING_TOKEN:
+        return value == settings.PROFILING_TOKEN
+    return True
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    if not profile_id.replace("-", "").isalnum():
+        return None
+    path = os.path.join(settings.PROFILE_DIR, f"{profile_id}.folded")
+    return path if os.path.exists(path) else None
+
+
+def list_profiles() -> List[dict]:
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(settings.PROFILE_DIR), reverse=True):
+        if name.endswith(".folded"):
+            path = os.path.join(settings.PROFILE_DIR, name)
+            profiles.append({"id": name[:-len(".folded")], "size": os.path.getsize(path)})
+    return profiles
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = _requested(scope)
+        if not _allowed(request["value"]):
+            await self.app(scope, receive, send)
+            return
+        if not self._lock.acquire(blocking=False):
+            await self.app(scope, receive, self._with_headers(send, [(b"x-profile", b"busy")]))
+            return
+
+        profile_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:8]
+        sampler = Sampler(settings.PROFILING_INTERVAL_MS / 1000)
+        status = [None]
+        try:
+            sampler.start()
+            if request["inline"]:
+                # Ответ ручки отбрасываем: клиент просил сам профиль
+                async def discard(message):
+                    if message["type"] == "http.response.start":
+                        status[0] = message["status"]
+                await self.app(scope, receive, discard)
+            else:
+                await self.app(scope, receive, self._with_headers(send, [(b"x-profile-id", profile_id.encode())]))
+        finally:
+            elapsed = sampler.stop()
+            self._lock.release()
+            body = self._save(profile_id, scope, sampler, elapsed)
+
+        if request["inline"]:
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"x-profile-id", profile_id.encode()),
+                    (b"x-profiled-status", str(status[0]).encode()),
+                    (b"x-profile-elapsed-ms", f"{elapsed * 1000:.1f}".encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _with_headers(send, extra):
+        async def wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + extra}
+            await send(message)
+        return wrapper
+
+    @staticmethod
+    def _save(profile_id: str, scope, sampler: Sampler, elapsed: float) -> bytes:
+        logger.info(
+            "Profiled %s %s: %.1f ms, %d samples -> %s",
+            scope["method"], scope["path"], elapsed * 1000, sampler.samples, profile_id
+        )
+        body = sampler.folded().encode("utf-8")
+        try:
+            os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+            with open(os.path.join(settings.PROFILE_DIR, f"{profile_id}.folded"), "wb") as f:
+                f.write(body)
+        except OSError as e:
+            logger.warning("Failed to store profile %s: %s", profile_id, e)
+        return body
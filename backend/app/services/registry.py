@@ -0,0 +1,264 @@
+"""In-process реестр справочных данных: роботы, транспорт, сотрудники.
+
+Таблицы небольшие, а читаются постоянно (обогащение задач, проверка уникальности
+имени робота), поэтому реестр держит их снимки в памяти с O(1) поиском по id,
+имени и серии робота. Реестр загружается при старте приложения (или лениво при
+первом обращении) и поддерживается write-through хуками из CRUD-функций записи.
+Строки, записанные в обход хуков (другим процессом, скриптом), дочитываются
+из БД при промахе; отсутствие ключа в БД запоминается на MISS_TTL секунд.
+
+Снимки — SimpleNamespace с полями колонок, они не привязаны к сессии и
+безопасно переживают её закрытие.
+"""
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.models.database_models import Employee, Robots, Transport
+
+# Сколько секунд помнить, что ключа нет в БД: задачи ссылаются на удалённые
+# строки, и без этого каждая такая ссылка стоила бы запроса
+MISS_TTL = 5.0
+
+
+def snapshot(obj) -> SimpleNamespace:
+    return SimpleNamespace(**{c.key: getattr(obj, c.key) for c in obj.__table__.columns})
+
+
+class ReferenceRegistry:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.robots: Dict[int, SimpleNamespace] = {}
+        self.robot_ids_by_name: Dict[int, int] = {}
+        self.robot_ids_by_series: Dict[int, Set[int]] = {}
+        self.transports: Dict[int, SimpleNamespace] = {}
+        self.employees: Dict[int, SimpleNamespace] = {}
+        self.loaded = False
+        self._absent: Dict[tuple, float] = {}
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+
+    # --- загрузка ---
+
+    def load(self, db: Session) -> None:
+        robots = [snapshot(r) for r in db.query(Robots).all()]
+        transports = [snapshot(t) for t in db.query(Transport).all()]
+        employees = [snapshot(e) for e in db.query(Employee).all()]
+        with self._lock:
+            self.robots.clear()
+            self.robot_ids_by_name.clear()
+            self.robot_ids_by_series.clear()
+            for robot in robots:
+                self._put_robot(robot)
+            self.transports = {t.id: t for t in transports}
+            self.employees = {e.id: e for e in employees}
+            self._absent.clear()
+            self.loaded = True
+
+    def ensure_loaded(self, db: Session) -> None:
+        if not self.loaded:
+            self.load(db)
+
+    def invalidate(self) -> None:
+        """Сбросить реестр; он перезагрузится при следующем обращении"""
+        with self._lock:
+            self.loaded = False
+
+    # --- write-through ---
+
+    def _put_robot(self, robot: SimpleNamespace) -> None:
+        self._remove_robot(robot.id)
+        self._absent.pop(("robot", robot.id), None)
+        self._absent.pop(("robot_by_name", robot.name), None)
+        self._absent.pop(("robots_by_series", robot.series), None)
+        self.robots[robot.id] = robot
+        self.robot_ids_by_name[robot.name] = robot.id
+        self.robot_ids_by_series.setdefault(robot.series, set()).add(robot.id)
+
+    def _remove_robot(self, robot_id: int) -> None:
+        old = self.robots.pop(robot_id, None)
+        if old is None:
+            return
+        if self.robot_ids_by_name.get(old.name) == robot_id:
+            del self.robot_ids_by_name[old.name]
+        series = self.robot_ids_by_series.get(old.series)
+        if series is not None:
+            series.discard(robot_id)
+            if not series:
+                del self.robot_ids_by_series[old.series]
+
+    def put_robot(self, robot: Robots) -> None:
+        with self._lock:
+            if self.loaded:
+                self._put_robot(snapshot(robot))
+
+    def remove_robot(self, robot_id: int) -> None:
+        with self._lock:
+            if self.loaded:
+                self._remove_robot(robot_id)
+
+    def put_transport(self, transport: Transport) -> None:
+        with self._lock:
+            if self.loaded:
+                self.transports[transport.id] = snapshot(transport)
+                self._absent.pop(("transport", transport.id), None)
+
+    def remove_transport(self, transport_id: int) -> None:
+        with self._lock:
+            if self.loaded:
+                self.transports.pop(transport_id, None)
+
+    def put_employee(self, employee: Employee) -> None:
+        with self._lock:
+            if self.loaded:
+                self.employees[employee.id] = snapshot(employee)
+                self._absent.pop(("employee", employee.id), None)
+
+    def remove_employee(self, employee_id: int) -> None:
+        with self._lock:
+            if self.loaded:
+                self.employees.pop(employee_id, None)
+
+    def set_employees_crew(self, employee_ids: Iterable[int], crew_id: Optional[int]) -> None:
+        with self._lock:
+            if not self.loaded:
+                return
+            for employee_id in employee_ids:
+                employee = self.employees.get(employee_id)
+                if employee is not None:
+                    self.employees[employee_id] = SimpleNamespace(**{**vars(employee), "crew": crew_id})
+
+    # --- чтение ---
+
+    def _count(self, kind: str, value):
+        if value is None:
+            self.misses[kind] += 1
+        else:
+            self.hits[kind] += 1
+        return value
+
+    def _fallback(self, kind: str, key, query, put):
+        """Промах реестра: строка могла появиться в обход write-through хуков
+        (другой процесс, скрипт) — читаем её из БД одним запросом и кладём в реестр"""
+        self.misses[kind] += 1
+        if self._absent.get((kind, key), 0.0) > time.monotonic():
+            return None
+        row = query.first()
+        if row is None:
+            with self._lock:
+                self._absent[(kind, key)] = time.monotonic() + MISS_TTL
+            return None
+        put(row)
+        return snapshot(row)
+
+    def prefetch(
+        self,
+        db: Session,
+        robot_ids: Iterable[Optional[int]] = (),
+        transport_ids: Iterable[Optional[int]] = (),
+        employee_ids: Iterable[Optional[int]] = (),
+    ) -> None:
+        """Дочитать отсутствующие в реестре id одним запросом на справочник.
+
+        Вызывается перед обходом строк, чтобы промахи не стоили запроса на строку.
+        """
+        self.ensure_loaded(db)
+        for kind, model, store, keys, put in (
+            ("robot", Robots, self.robots, robot_ids, self.put_robot),
+            ("transport", Transport, self.transports, transport_ids, self.put_transport),
+            ("employee", Employee, self.employees, employee_ids, self.put_employee),
+        ):
+            now = time.monotonic()
+            missing = {
+                key for key in keys
+                if key is not None and key not in store and self._absent.get((kind, key), 0.0) <= now
+            }
+            if not missing:
+                continue
+            rows = db.query(model).filter(model.id.in_(missing)).all()
+            for row in rows:
+                put(row)
+            with self._lock:
+                for key in missing - {row.id for row in rows}:
+                    self._absent[(kind, key)] = now + MISS_TTL
+
+    def robot(self, db: Session, robot_id: Optional[int]) -> Optional[SimpleNamespace]:
+        self.ensure_loaded(db)
+        robot = self.robots.get(robot_id)
+        if robot is not None or robot_id is None:
+            return self._count("robot", robot)
+        return self._fallback("robot", robot_id, db.query(Robots).filter(Robots.id == robot_id), self.put_robot)
+
+    def robot_by_name(self, db: Session, name: int) -> Optional[SimpleNamespace]:
+        self.ensure_loaded(db)
+        robot_id = self.robot_ids_by_name.get(name)
+        if robot_id is not None and robot_id in self.robots:
+            return self._count("robot_by_name", self.robots[robot_id])
+        return self._fallback("robot_by_name", name, db.query(Robots).filter(Robots.name == name), self.put_robot)
+
+    def robots_by_series(self, db: Session, series: int) -> List[SimpleNamespace]:
+        self.ensure_loaded(db)
+        ids = self.robot_ids_by_series.get(series, ())
+        robots = [self.robots.get(robot_id) for robot_id in sorted(ids)]
+        if robots and None not in robots:
+            return self._count("robots_by_series", robots)
+        # Серии нет или индекс разошёлся со снимками — как в _fallback, читаем серию из БД
+        self.misses["robots_by_series"] += 1
+        if not robots and self._absent.get(("robots_by_series", series), 0.0) > time.monotonic():
+            return []
+        rows = db.query(Robots).filter(Robots.series == series).order_by(Robots.id).all()
+        with self._lock:
+            if not rows:
+                self._absent[("robots_by_series", series)] = time.monotonic() + MISS_TTL
+            stale = set(ids) - {row.id for row in rows}
+            for robot_id in stale:
+                self._remove_robot(robot_id)
+            if stale and series in self.robot_ids_by_series:
+                self.robot_ids_by_series[series] -= stale
+        for row in rows:
+            self.put_robot(row)
+        return [snapshot(row) for row in rows]
+
+    def transport(self, db: Session, transport_id: Optional[int]) -> Optional[SimpleNamespace]:
+        self.ensure_loaded(db)
+        transport = self.transports.get(transport_id)
+        if transport is not None or transport_id is None:
+            return self._count("transport", transport)
+        return self._fallback(
+            "transport", transport_id, db.query(Transport).filter(Transport.id == transport_id), self.put_transport
+        )
+
+    def employee(self, db: Session, employee_id: Optional[int]) -> Optional[SimpleNamespace]:
+        self.ensure_loaded(db)
+        employee = self.employees.get(employee_id)
+        if employee is not None or employee_id is None:
+            return self._count("employee", employee)
+        return self._fallback(
+            "employee", employee_id, db.query(Employee).filter(Employee.id == employee_id), self.put_employee
+        )
+
+    def stats(self) -> dict:
+        kinds = sorted(set(self.hits) | set(self.misses))
+        return {
+            "loaded": self.loaded,
+            "sizes": {
+                "robots": len(self.robots),
+                "transports": len(self.transports),
+                "employees": len(self.employees),
+            },
+            "lookups": {
+                kind: {
+                    "hits": self.hits[kind],
+                    "misses": self.misses[kind],
+                    "hit_rate": self.hits[kind] / ((self.hits[kind] + self.misses[kind]) or 1),
+                }
+                for kind in kinds
+            },
+        }
+
+
+registry = ReferenceRegistry()
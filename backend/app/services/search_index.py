@@ -0,0 +1,510 @@
+"""In-process индекс для typeahead-поиска по сотрудникам, роботам, транспорту и тикетам.
+
+Индекс держит два представления одних и тех же документов:
+- отсортированный список токенов + постинги для поиска по префиксу (bisect);
+- триграммы для поиска подстроки внутри поля (например, часть гос номера или тикета).
+
+Постинги токенов и триграмм — списки, отсортированные в порядке выдачи
+(заголовок, вид, id) и разбитые по видам документов. Поэтому для одного
+терма первые limit записей постинга уже дают top-k своего веса: поиск
+проходит веса по убыванию и останавливается, набрав limit документов. В
+многословном запросе кандидаты берутся из самого редкого терма целиком, а
+остальные термы проверяются по документам (AND).
+
+Новые токены копятся в небольшом отсортированном буфере и вливаются в
+основной список пачкой, чтобы вставка не сдвигала весь список токенов.
+
+Индекс загружается лениво при первом запросе и поддерживается инкрементально
+из CRUD-функций записи (index_* / remove). Записи, пришедшие во время
+перестроения, буферизуются и применяются поверх нового индекса.
+"""
+import heapq
+import re
+import threading
+from collections import OrderedDict
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.database_models import Employee, Robots, Transport, Task
+
+EMPLOYEE = "employee"
+ROBOT = "robot"
+TRANSPORT = "transport"
+TASK = "task"
+
+KINDS = (EMPLOYEE, ROBOT, TRANSPORT, TASK)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Веса совпадений: точный токен > префикс токена > подстрока
+_EXACT, _PREFIX, _SUBSTRING = 3, 2, 1
+
+# Сколько новых токенов копить в буфере до слияния с основным списком
+_TOKEN_BUFFER = 512
+
+# Префикс, под который попадает больше токенов, ищется по объединённому постингу:
+# он строится при первом запросе и поддерживается при записи, а слияние тысяч
+# постингов токенов (запросы «1», «user1») стоило бы десятки миллисекунд
+_WIDE_PREFIX = 64
+# Объединённых постингов держим не больше этого числа записей на документ индекса
+_WIDE_CACHE_FACTOR = 4
+
+_MAX_CHAR = "\U0010ffff"
+
+DocKey = Tuple[str, int]
+# Позиция документа в выдаче: (заголовок, вид, id)
+Order = Tuple[str, str, int]
+# Постинг: вид документа -> позиции документов в порядке выдачи
+Postings = Dict[str, List[Order]]
+
+
+def normalize(text: str) -> str:
+    return text.lower().replace("ё", "е")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _Document:
+    __slots__ = ("kind", "id", "title", "subtitle", "text", "tokens", "grams", "order")
+
+    def __init__(self, kind: str, doc_id: int, title: str, subtitle: Optional[str], fields: Iterable[Optional[str]]):
+        values = [normalize(str(f)) for f in fields if f not in (None, "")]
+        self.kind = kind
+        self.id = doc_id
+        self.title = title
+        self.subtitle = subtitle
+        # Поля разделяем символом, который не встречается в запросах, чтобы
+        # подстрока не «склеивала» соседние поля
+        self.text = "\x1f".join(values)
+        self.tokens = {t for v in values for t in tokenize(v)}
+        self.grams = set().union(*(trigrams(v) for v in values)) if values else set()
+        self.order: Order = (title or "", kind, doc_id)
+
+    def match(self, term: str) -> int:
+        if term in self.tokens:
+            return _EXACT
+        if any(token.startswith(term) for token in self.tokens):
+            return _PREFIX
+        if len(term) >= 3 and term in self.text:
+            return _SUBSTRING
+        return 0
+
+
+def _insert(index: Dict[str, Postings], name: str, doc: _Document) -> bool:
+    """Добавить документ в постинг name; True, если постинг новый"""
+    postings = index.get(name)
+    created = postings is None
+    if created:
+        postings = index[name] = {}
+    insort(postings.setdefault(doc.kind, []), doc.order)
+    return created
+
+
+def _delete(index: Dict[str, Postings], name: str, doc: _Document) -> None:
+    postings = index.get(name)
+    if postings is None:
+        return
+    entries = postings.get(doc.kind)
+    if entries:
+        i = bisect_left(entries, doc.order)
+        if i < len(entries) and entries[i] == doc.order:
+            del entries[i]
+        if not entries:
+            del postings[doc.kind]
+    if not postings:
+        del index[name]
+
+
+def _lists(postings: Optional[Postings], allowed: Optional[Set[str]]) -> List[List[Order]]:
+    if not postings:
+        return []
+    return [entries for kind, entries in postings.items() if allowed is None or kind in allowed]
+
+
+def _size(postings: Optional[Postings], allowed: Optional[Set[str]]) -> int:
+    return sum(len(entries) for entries in _lists(postings, allowed))
+
+
+def _ordered(lists: List[List[Order]]) -> Iterator[Order]:
+    """Слияние отсортированных списков в порядке выдачи (лениво)"""
+    if len(lists) == 1:
+        return iter(lists[0])
+    return heapq.merge(*lists)
+
+
+class SearchIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._docs: Dict[DocKey, _Document] = {}
+        self._postings: Dict[str, Postings] = {}
+        self._grams: Dict[str, Postings] = {}
+        # Токены: основной отсортированный список + буфер новых; удалённые
+        # токены вычищаются из списков при слиянии
+        self._sorted_tokens: List[str] = []
+        self._new_tokens: List[str] = []
+        self._listed: Set[str] = set()
+        # Объединённые постинги широких префиксов (LRU)
+        self._wide: "OrderedDict[str, Postings]" = OrderedDict()
+        self._wide_entries = 0
+        # Записи, пришедшие во время перестроения (документ или ключ удаления)
+        self._backlog: Optional[list] = None
+        self._rebuilds = 0
+        self._generation = 0
+        self.loaded = False
+
+    # --- поддержка индекса ---
+
+    def _list_token(self, token: str) -> None:
+        if token in self._listed:
+            return
+        self._listed.add(token)
+        insort(self._new_tokens, token)
+        if len(self._new_tokens) > _TOKEN_BUFFER:
+            self._merge_tokens()
+
+    def _merge_tokens(self) -> None:
+        self._sorted_tokens = [
+            token for token in heapq.merge(self._sorted_tokens, self._new_tokens) if token in self._postings
+        ]
+        self._new_tokens = []
+        self._listed = set(self._sorted_tokens)
+
+    def _add(self, doc: _Document) -> None:
+        key = (doc.kind, doc.id)
+        self._remove(key)
+        self._docs[key] = doc
+        for token in doc.tokens:
+            if _insert(self._postings, token, doc):
+                self._list_token(token)
+        for gram in doc.grams:
+            _insert(self._grams, gram, doc)
+        for prefix in self._wide_prefixes(doc):
+            insort(self._wide[prefix].setdefault(doc.kind, []), doc.order)
+            self._wide_entries += 1
+
+    def _remove(self, key: DocKey) -> None:
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        for token in doc.tokens:
+            _delete(self._postings, token, doc)
+        for gram in doc.grams:
+            _delete(self._grams, gram, doc)
+        for prefix in self._wide_prefixes(doc):
+            entries = self._wide[prefix].get(doc.kind, [])
+            i = bisect_left(entries, doc.order)
+            if i < len(entries) and entries[i] == doc.order:
+                del entries[i]
+                self._wide_entries -= 1
+
+    def _wide_prefixes(self, doc: _Document) -> Set[str]:
+        if not self._wide:
+            return set()
+        prefixes = {token[:i] for token in doc.tokens for i in range(1, len(token) + 1)}
+        return prefixes & self._wide.keys()
+
+    def _load(self, docs: Iterable[_Document]) -> None:
+        """Заполнить пустой индекс пачкой документов (каждый постинг сортируется один раз)"""
+        for doc in docs:
+            self._docs[(doc.kind, doc.id)] = doc
+            for token in doc.tokens:
+                self._postings.setdefault(token, {}).setdefault(doc.kind, []).append(doc.order)
+            for gram in doc.grams:
+                self._grams.setdefault(gram, {}).setdefault(doc.kind, []).append(doc.order)
+        for index in (self._postings, self._grams):
+            for postings in index.values():
+                for entries in postings.values():
+                    entries.sort()
+        self._sorted_tokens = sorted(self._postings)
+        self._listed = set(self._sorted_tokens)
+
+    def put(self, doc: _Document) -> None:
+        with self._lock:
+            if self._backlog is not None:
+                self._backlog.append(doc)
+            if self.loaded:
+                self._add(doc)
+
+    def remove(self, kind: str, doc_id: int) -> None:
+        with self._lock:
+            if self._backlog is not None:
+                self._backlog.append((kind, doc_id))
+            if self.loaded:
+                self._remove((kind, doc_id))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            self._sorted_tokens = []
+            self._new_tokens = []
+            self._listed = set()
+            self._grams.clear()
+            self._wide = OrderedDict()
+            self._wide_entries = 0
+            # Перестроение, начатое до сброса, могло прочитать устаревшие данные
+            self._generation += 1
+            self.loaded = False
+
+    def rebuild(self, db: Session) -> None:
+        """Полностью перестроить индекс из БД.
+
+        БД читается без блокировки: записи, пришедшие за это время, копятся в
+        буфере и применяются поверх нового индекса при подмене.
+        """
+        with self._lock:
+            self._rebuilds += 1
+            if self._backlog is None:
+                self._backlog = []
+            generation = self._generation
+        try:
+            docs = [employee_document(e) for e in db.query(Employee).all()]
+            docs += [robot_document(r) for r in db.query(Robots).all()]
+            docs += [transport_document(t) for t in db.query(Transport).all()]
+            docs += [
+                task_document(task_id, tickets)
+                for task_id, tickets in db.query(Task.id, Task.tickets).all()
+            ]
+            fresh = SearchIndex()
+            fresh._load(docs)
+            with self._lock:
+                if generation != self._generation:
+                    return
+                self._docs, self._postings, self._grams = fresh._docs, fresh._postings, fresh._grams
+                self._sorted_tokens, self._new_tokens, self._listed = (
+                    fresh._sorted_tokens, fresh._new_tokens, fresh._listed
+                )
+                self._wide, self._wide_entries = OrderedDict(), 0
+                for item in self._backlog:
+                    if isinstance(item, _Document):
+                        self._add(item)
+                    else:
+                        self._remove(item)
+                self.loaded = True
+        finally:
+            with self._lock:
+                self._rebuilds -= 1
+                if not self._rebuilds:
+                    self._backlog = None
+
+    def ensure_loaded(self, db: Session) -> None:
+        if self.loaded:
+            return
+        # Одновременные первые запросы строят индекс один раз
+        with self._load_lock:
+            if not self.loaded:
+                self.rebuild(db)
+
+    # --- поиск ---
+
+    def _token_count(self, prefix: str) -> int:
+        return sum(
+            bisect_left(listed, prefix + _MAX_CHAR) - bisect_left(listed, prefix)
+            for listed in (self._sorted_tokens, self._new_tokens)
+        )
+
+    def _prefix_tokens(self, prefix: str) -> List[str]:
+        tokens = []
+        for listed in (self._sorted_tokens, self._new_tokens):
+            i = bisect_left(listed, prefix)
+            while i < len(listed) and listed[i].startswith(prefix):
+                if listed[i] in self._postings:
+                    tokens.append(listed[i])
+                i += 1
+        return tokens
+
+    def _wide_postings(self, prefix: str) -> Optional[Postings]:
+        """Объединённый постинг префикса, если под него попадает много токенов"""
+        postings = self._wide.get(prefix)
+        if postings is not None:
+            self._wide.move_to_end(prefix)
+            return postings
+        if self._token_count(prefix) <= _WIDE_PREFIX:
+            return None
+        merged: Dict[str, Set[Order]] = {}
+        for token in self._prefix_tokens(prefix):
+            for kind, entries in self._postings[token].items():
+                merged.setdefault(kind, set()).update(entries)
+        postings = self._wide[prefix] = {kind: sorted(orders) for kind, orders in merged.items()}
+        self._wide_entries += _size(postings, None)
+        while len(self._wide) > 1 and self._wide_entries > _WIDE_CACHE_FACTOR * len(self._docs):
+            _, evicted = self._wide.popitem(last=False)
+            self._wide_entries -= _size(evicted, None)
+        return postings
+
+    def _prefix_lists(self, prefix: str, allowed: Optional[Set[str]]) -> List[List[Order]]:
+        """Постинги документов с токеном, начинающимся с prefix (документ может повторяться)"""
+        wide = self._wide_postings(prefix)
+        if wide is not None:
+            return _lists(wide, allowed)
+        return [
+            entries
+            for token in self._prefix_tokens(prefix)
+            for entries in _lists(self._postings[token], allowed)
+        ]
+
+    def _substring_matches(self, term: str, allowed: Optional[Set[str]]) -> Iterator[Order]:
+        """Документы, содержащие term внутри поля, в порядке выдачи"""
+        grams = trigrams(term)
+        if not grams:
+            return
+        postings = [self._grams.get(g) for g in grams]
+        if not all(postings):
+            return
+        rarest = min(postings, key=lambda p: _size(p, allowed))
+        for order in _ordered(_lists(rarest, allowed)):
+            if term in self._docs[order[1:]].text:
+                yield order
+
+    def _tiers(self, term: str, allowed: Optional[Set[str]]) -> Iterator[Tuple[int, Iterator[Order]]]:
+        """Совпадения терма по весам в порядке убывания, внутри веса — в порядке выдачи"""
+        yield _EXACT, _ordered(_lists(self._postings.get(term), allowed))
+        yield _PREFIX, _ordered(self._prefix_lists(term, allowed))
+        if len(term) >= 3:
+            yield _SUBSTRING, self._substring_matches(term, allowed)
+
+    def _estimate(self, term: str, allowed: Optional[Set[str]]) -> int:
+        """Верхняя оценка числа документов, совпадающих с термом"""
+        count = sum(len(entries) for entries in self._prefix_lists(term, allowed))
+        grams = trigrams(term)
+        if len(term) >= 3 and grams:
+            count += min(_size(self._grams.get(g), allowed) for g in grams)
+        return count
+
+    def _best_weight(self, term: str, allowed: Optional[Set[str]]) -> int:
+        """Наибольший вес, который терм может дать документу"""
+        if _lists(self._postings.get(term), allowed):
+            return _EXACT
+        if self._token_count(term):
+            return _PREFIX
+        return _SUBSTRING
+
+    def _top(self, terms: List[str], allowed: Optional[Set[str]], limit: int) -> List[Tuple[Order, int]]:
+        """Top-k по (-score, порядок выдачи); все термы обязательны (AND).
+
+        Кандидаты — совпадения самого редкого терма по уровням веса, остальные
+        термы проверяются по документу. Документ уровня набирает не больше
+        ceiling = вес уровня + наибольшие веса остальных термов, поэтому обход
+        останавливается, как только limit найденных документов опережают все
+        оставшиеся: их счёт выше ceiling или равен ему, но они раньше в том же уровне.
+        """
+        if len(terms) > 1:
+            estimates = {term: self._estimate(term, allowed) for term in set(terms)}
+            terms = sorted(terms, key=estimates.__getitem__)
+        driver, rest = terms[0], terms[1:]
+        rest_ceiling = sum(self._best_weight(term, allowed) for term in rest)
+        found: List[Tuple[Order, int]] = []
+        seen: Set[Order] = set()
+        for weight, orders in self._tiers(driver, allowed):
+            ceiling = weight + rest_ceiling
+            ahead = sum(1 for _, score in found if score > ceiling)
+            if ahead >= limit:
+                break
+            for order in orders:
+                if order in seen:
+                    continue
+                seen.add(order)
+                doc = self._docs[order[1:]]
+                score = weight
+                for term in rest:
+                    matched = doc.match(term)
+                    if not matched:
+                        break
+                    score += matched
+                else:
+                    found.append((order, score))
+                    if score == ceiling:
+                        ahead += 1
+                        if ahead >= limit:
+                            break
+            if ahead >= limit:
+                break
+        return heapq.nsmallest(limit, found, key=lambda item: (-item[1], item[0]))
+
+    def search(self, query: str, kinds: Optional[Iterable[str]] = None, limit: int = 20) -> List[dict]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+        allowed = set(kinds) if kinds else None
+
+        with self._lock:
+            best = self._top(terms, allowed, limit)
+            return [
+                {
+                    "kind": doc.kind,
+                    "id": doc.id,
+                    "title": doc.title,
+                    "subtitle": doc.subtitle,
+                    "score": score,
+                }
+                for doc, score in ((self._docs[order[1:]], score) for order, score in best)
+            ]
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+
+# --- построение документов из ORM-объектов ---
+
+def employee_document(employee: Employee) -> _Document:
+    name_parts = [employee.firstname, employee.lastname]
+    if employee.patronymic:
+        name_parts.append(employee.patronymic)
+    return _Document(
+        EMPLOYEE,
+        employee.id,
+        " ".join(name_parts),
+        employee.tg or employee.staff,
+        [employee.firstname, employee.lastname, employee.patronymic, employee.tg, employee.staff, employee.body]
+    )
+
+
+def robot_document(robot: Robots) -> _Document:
+    return _Document(ROBOT, robot.id, str(robot.name), f"series {robot.series}", [robot.name, robot.series])
+
+
+def transport_document(transport: Transport) -> _Document:
+    return _Document(
+        TRANSPORT,
+        transport.id,
+        transport.name,
+        " ".join(p for p in (transport.model, transport.gov_number) if p) or None,
+        [transport.name, transport.model, transport.gov_number]
+    )
+
+
+def task_document(task_id: int, tickets: Optional[List[str]]) -> _Document:
+    tickets = tickets or []
+    return _Document(TASK, task_id, ", ".join(tickets), None, tickets)
+
+
+index = SearchIndex()
+
+
+def index_employee(employee: Employee) -> None:
+    index.put(employee_document(employee))
+
+
+def index_robot(robot: Robots) -> None:
+    index.put(robot_document(robot))
+
+
+def index_transport(transport: Transport) -> None:
+    index.put(transport_document(transport))
+
+
+def index_task(task: Task) -> None:
+    index.put(task_document(task.id, task.tickets))
+
+
+def remove(kind: str, doc_id: int) -> None:
+    index.remove(kind, doc_id)
@@ -0,0 +1,96 @@
+"""Объединение одинаковых одновременных запросов на чтение (single-flight).
+
+Первый запрос с данным ключом запускает вычисление в пуле потоков, остальные
+запросы с тем же ключом, пришедшие до его окончания, ждут тот же результат.
+По желанию результат ещё ttl секунд отдаётся без пересчёта. Ошибки не
+кэшируются: их получают все ожидающие, следующий запрос считает заново.
+
+Вычисление запускается отдельной asyncio-задачей, поэтому отключение клиента,
+который его начал, не отменяет его для остальных.
+"""
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+
+class SingleFlight:
+    def __init__(self, default_ttl: float = 0.0):
+        self.default_ttl = default_ttl
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._results: Dict[Hashable, Tuple[float, Any]] = {}
+        self.calls: Counter = Counter()
+        self.executions: Counter = Counter()
+        self.shared: Counter = Counter()
+        self.ttl_hits: Counter = Counter()
+        self.errors: Counter = Counter()
+
+    async def do(self, namespace: str, params: Hashable, fn: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Выполнить fn (синхронную) один раз на все одновременные вызовы с тем же ключом"""
+        key = (namespace, params)
+        ttl = self.default_ttl if ttl is None else ttl
+        self.calls[namespace] += 1
+
+        cached = self._results.get(key)
+        if cached is not None:
+            if cached[0] > time.monotonic():
+                self.ttl_hits[namespace] += 1
+                return cached[1]
+            del self._results[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.shared[namespace] += 1
+        else:
+            self.executions[namespace] += 1
+            task = asyncio.ensure_future(self._run(key, namespace, fn, ttl))
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, namespace: str, fn: Callable[[], Any], ttl: float) -> Any:
+        task = asyncio.current_task()
+        try:
+            result = await run_in_threadpool(fn)
+        except Exception:
+            self.errors[namespace] += 1
+            raise
+        finally:
+            current = self._inflight.get(key) is task
+            if current:
+                del self._inflight[key]
+        # Вычисление, отвязанное forget, могло прочитать данные до записи — его не сохраняем
+        if ttl > 0 and current:
+            self._results[key] = (time.monotonic() + ttl, result)
+        return result
+
+    def forget(self, namespace: Optional[str] = None) -> None:
+        """Сбросить сохранённые результаты (всех или одного пространства имён).
+
+        Идущие вычисления дорабатывают для тех, кто их уже ждёт, но новые
+        запросы к ним не присоединяются и начинают вычисление заново.
+        """
+        for store in (self._results, self._inflight):
+            for key in [k for k in list(store) if namespace is None or k[0] == namespace]:
+                store.pop(key, None)
+
+    def stats(self) -> dict:
+        namespaces = sorted(set(self.calls))
+        return {
+            namespace: {
+                "calls": self.calls[namespace],
+                "executions": self.executions[namespace],
+                "shared": self.shared[namespace],
+                "ttl_hits": self.ttl_hits[namespace],
+                "saved": self.shared[namespace] + self.ttl_hits[namespace],
+                "errors": self.errors[namespace],
+                "in_flight": sum(1 for key in self._inflight if key[0] == namespace),
+            }
+            for namespace in namespaces
+        }
+
+
+flights = SingleFlight(default_ttl=settings.SINGLEFLIGHT_TTL)
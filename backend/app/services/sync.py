@@ -0,0 +1,146 @@
+"""Инкрементальная синхронизация клиентов (GET /api/v1/sync?since=<token>).
+
+Клиент, открытый весь день, раз в минуту запрашивает изменения с прошлого
+токена и получает по каждой сущности планировщика созданные и изменённые
+строки (по индексу updated_at) и id удалённых (из таблицы tombstones, в
+которую пишут пути удаления в той же транзакции). Запрос без since
+возвращает только начальный токен: данные целиком клиент берёт из
+/bootstrap и списков, а дальше синхронизируется по токену.
+
+Токен — время часов БД в UTC (микросекунды от эпохи), до которого изменения
+уже отданы. updated_at ставит NOW() пишущей сессии, а часы читаются NOW()
+читающей; сессии MySQL работают в DB_TIME_ZONE (UTC, см. app.database), так
+что сравнение не зависит от часового пояса сервера.
+
+Токен отстаёт от текущего времени БД на SYNC_OVERLAP_SECONDS: строка,
+изменённая в ещё не закоммиченной транзакции, получает updated_at раньше
+момента чтения и иначе была бы пропущена. Поэтому недавние строки могут
+прийти повторно — клиент применяет изменения по id, повтор безопасен.
+Ограничение: строка, закоммиченная позже чем через SYNC_OVERLAP_SECONDS после
+своего updated_at (долгая транзакция, массовый импорт, ожидание блокировки),
+попадает в уже выданный интервал и клиентам не придёт до полной перезагрузки.
+Пишущие транзакции должны быть короче этого запаса; при долгих фоновых
+записях увеличьте SYNC_OVERLAP_SECONDS.
+
+Токен старше SYNC_TOMBSTONE_DAYS (записи об удалениях уже вычищены) или
+больше SYNC_MAX_CHANGES изменений одной сущности — SyncExpired: клиенту
+дешевле перезагрузить данные целиком. Перенос смен и задач в архив
+удалением не считается: архивные строки по-прежнему читаются по id.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import schemas
+from app.models.database_models import Crew, Employee, Robots, Shift, Task, Tombstone, Transport
+
+EMPLOYEES = "employees"
+CREWS = "crews"
+ROBOTS = "robots"
+TRANSPORTS = "transports"
+SHIFTS = "shifts"
+TASKS = "tasks"
+
+# Сущность -> (модель, схема ответа)
+ENTITIES = {
+    EMPLOYEES: (Employee, schemas.Employee),
+    CREWS: (Crew, schemas.CrewRoster),
+    ROBOTS: (Robots, schemas.Robots),
+    TRANSPORTS: (Transport, schemas.Transport),
+    SHIFTS: (Shift, schemas.Shift),
+    TASKS: (Task, schemas.Task),
+}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class SyncExpired(Exception):
+    """Инкрементальная синхронизация невозможна — нужна полная перезагрузка"""
+
+
+# --- токен ---
+
+def _naive(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def encode_token(moment: datetime) -> str:
+    return str((_naive(moment) - _EPOCH) // timedelta(microseconds=1))
+
+
+def decode_token(token: str) -> datetime:
+    try:
+        return _EPOCH + timedelta(microseconds=int(token))
+    except (ValueError, OverflowError):
+        raise ValueError("Некорректный токен синхронизации")
+
+
+# --- пути удаления (вызываются до commit) ---
+
+def record_deletes(db: Session, entity: str, ids: Iterable[int]) -> None:
+    """Записать удаление строк сущности; время ставит БД, как и updated_at"""
+    rows = [{"entity": entity, "entity_id": entity_id} for entity_id in ids]
+    if rows:
+        db.execute(insert(Tombstone), rows)
+
+
+def purge_tombstones(db: Session, days: Optional[int] = None) -> int:
+    """Удалить записи об удалениях старше days (по умолчанию SYNC_TOMBSTONE_DAYS) дней"""
+    days = settings.SYNC_TOMBSTONE_DAYS if days is None else days
+    before = _db_now(db) - timedelta(days=days)
+    removed = db.execute(delete(Tombstone).where(Tombstone.deleted_at < before)).rowcount
+    db.commit()
+    return removed
+
+
+# --- чтение ---
+
+def _db_now(db: Session) -> datetime:
+    return _naive(db.execute(select(func.now())).scalar())
+
+
+def _columns(obj) -> dict:
+    """Значения колонок строки без обращения к связям (иначе схема подгрузила бы их по строке)"""
+    return {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+
+
+def _entity_changes(db: Session, model, schema, since: datetime) -> dict:
+    rows = db.query(model).filter(model.updated_at >= since).order_by(model.updated_at, model.id).limit(
+        settings.SYNC_MAX_CHANGES + 1
+    ).all()
+    if len(rows) > settings.SYNC_MAX_CHANGES:
+        raise SyncExpired(f"Изменений больше {settings.SYNC_MAX_CHANGES} — перезагрузите данные целиком")
+    changes = {"created": [], "updated": [], "deleted": []}
+    for row in rows:
+        created = row.created_at is not None and _naive(row.created_at) >= since
+        changes["created" if created else "updated"].append(
+            jsonable_encoder(schema.model_validate(_columns(row)))
+        )
+    return changes
+
+
+def changes_since(db: Session, token: Optional[str]) -> dict:
+    """Изменения всех сущностей с токена и следующий токен"""
+    now = _db_now(db)
+    horizon = now - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+    if token is None:
+        return {"token": encode_token(horizon), "changes": {}}
+
+    since = decode_token(token)
+    if since < now - timedelta(days=settings.SYNC_TOMBSTONE_DAYS):
+        raise SyncExpired("Токен синхронизации устарел — перезагрузите данные целиком")
+
+    changes: Dict[str, dict] = {
+        entity: _entity_changes(db, model, schema, since) for entity, (model, schema) in ENTITIES.items()
+    }
+    tombstones = db.query(Tombstone.entity, Tombstone.entity_id).filter(
+        Tombstone.deleted_at >= since
+    ).order_by(Tombstone.id).all()
+    for entity, entity_id in tombstones:
+        if entity in changes:
+            changes[entity]["deleted"].append(entity_id)
+    return {"token": encode_token(max(since, horizon)), "changes": changes}
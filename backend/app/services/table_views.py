@@ -0,0 +1,421 @@
+"""Материализованные сохранённые представления для роутера tables.
+
+Представление (UserTable с заполненным source) — выбранные колонки, фильтры и
+сортировка над задачами, сменами, сотрудниками или транспортом. Результат
+хранится в table_view_rows вместе с sort_key, поэтому страница читается одним
+индексным запросом без джойнов. Представления над задачами и сменами
+включают и архивные строки (id при архивации сохраняются), так что перенос в
+архив не меняет их содержимое; колонки, которых в архиве нет, там равны NULL.
+
+Пути записи в CRUD добавляют id изменённых строк в журнал table_view_changes
+в той же транзакции. При чтении представление догоняет журнал: пересчитываются
+только затронутые строки. Журнал в БД, поэтому схема работает с несколькими
+воркерами.
+
+id записи журнала выдаётся до commit, поэтому запись с меньшим id может стать
+видна позже записи с большим. last_change_id сдвигается только по записям
+старше TABLE_VIEW_CHANGE_LAG секунд; более молодые уже учтённые записи
+хранятся в applied_change_ids и при следующем чтении не применяются повторно,
+а поздно закоммиченные — применяются. Журнал чистится при чтении и в ночной
+задаче архивации (prune_changes).
+"""
+import struct
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import DateTime, func, insert, null, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.database_models import (
+    Employee, Shift, ShiftArchive, Task, TaskArchive, Transport, TableViewChange, TableViewRow, UserTable
+)
+from app.services import archive
+from app.services.registry import registry
+
+FULL_REBUILD_THRESHOLD = 5000
+INSERT_CHUNK_SIZE = 1000
+SORT_KEY_BYTES = 256
+
+TASKS = "tasks"
+SHIFTS = "shifts"
+EMPLOYEES = "employees"
+TRANSPORTS = "transports"
+
+MODELS = {
+    TASKS: Task,
+    SHIFTS: Shift,
+    EMPLOYEES: Employee,
+    TRANSPORTS: Transport,
+}
+
+# Архивные таблицы источников (читаются, если архив не пуст)
+ARCHIVE_MODELS = {
+    TASKS: TaskArchive,
+    SHIFTS: ShiftArchive,
+}
+
+# Вычисляемые колонки (из реестра справочников) и от каких сущностей они зависят
+DERIVED_COLUMNS = {
+    TASKS: {
+        "executor_name": EMPLOYEES,
+        "transport_name": TRANSPORTS,
+        "transport_gov_number": TRANSPORTS,
+    },
+}
+
+# Колонка сущности-источника со ссылкой на зависимую сущность
+DEPENDENCY_KEYS = {
+    (TASKS, EMPLOYEES): "executor",
+    (TASKS, TRANSPORTS): "transport_id",
+}
+
+
+# --- журнал изменений ---
+
+def record_change(db: Session, source: str, row_id: Optional[int]) -> None:
+    """Отметить строку изменённой (вызывается до commit в путях записи)"""
+    db.add(TableViewChange(source=source, row_id=row_id))
+
+
+def record_changes(db: Session, source: str, row_ids: Iterable[int]) -> None:
+    rows = [{"source": source, "row_id": row_id} for row_id in row_ids]
+    if rows:
+        db.execute(insert(TableViewChange), rows)
+
+
+# --- описание представления ---
+
+def base_columns(source: str) -> Set[str]:
+    return {c.key for c in MODELS[source].__table__.columns}
+
+
+def validate_view(source: Optional[str], columns: List[str], filters: List[dict], sort: List[dict]) -> None:
+    if source is None:
+        return
+    source = getattr(source, "value", source)
+    allowed = base_columns(source)
+    derived = set(DERIVED_COLUMNS.get(source, {}))
+    unknown = [c for c in columns if c not in allowed and c not in derived]
+    if unknown:
+        raise ValueError(f"Unknown columns for {source}: {', '.join(unknown)}")
+    for item in list(filters) + list(sort):
+        if item["column"] not in allowed:
+            raise ValueError(f"Cannot filter or sort {source} by {item['column']}")
+
+
+def _coerce(column, value):
+    if isinstance(column.type, DateTime) and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _column(model, name: str):
+    """Колонка модели; у архивной модели её может не быть (version) — тогда NULL"""
+    column = getattr(model, name, None)
+    return null() if column is None else column
+
+
+def _filter_clause(model, item: dict):
+    column = _column(model, item["column"])
+    op = getattr(item["op"], "value", item["op"])
+    value = item.get("value")
+    if op == "in":
+        return column.in_([_coerce(column, v) for v in (value or [])])
+    if op == "is_null":
+        return column.is_(None) if value in (None, True) else column.isnot(None)
+    if op == "contains":
+        return column.contains(value)
+    value = _coerce(column, value)
+    return {
+        "eq": column == value,
+        "ne": column != value,
+        "lt": column < value,
+        "lte": column <= value,
+        "gt": column > value,
+        "gte": column >= value,
+    }[op]
+
+
+def _models(db: Session, source: str) -> list:
+    """Горячая модель источника и, если архив не пуст, архивная"""
+    models = [MODELS[source]]
+    if source in ARCHIVE_MODELS and archive.watermark(db) is not None:
+        models.append(ARCHIVE_MODELS[source])
+    return models
+
+
+def _query(db: Session, table: UserTable, model):
+    query = db.query(model)
+    for item in table.filters or []:
+        query = query.filter(_filter_clause(model, item))
+    return query
+
+
+# --- сериализация строк ---
+
+def _json_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _derived(db: Session, obj, column: str):
+    if column == "executor_name":
+        employee = registry.employee(db, obj.executor)
+        if employee is None:
+            return None
+        return " ".join(p for p in (employee.firstname, employee.lastname, employee.patronymic) if p)
+    if column in ("transport_name", "transport_gov_number"):
+        transport = registry.transport(db, obj.transport_id) if obj.transport_id is not None else None
+        if transport is None:
+            return None
+        return transport.name if column == "transport_name" else transport.gov_number
+    return None
+
+
+def _encode_component(value, desc: bool) -> bytes:
+    """Кодирование значения в байты, сравнение которых совпадает с порядком значений"""
+    if value is None:
+        # NULL всегда в конце
+        return b"\x02"
+    value = _json_value(value)
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, (int, float)):
+        packed = struct.pack(">d", float(value))
+        # Знаковый double -> беззнаковый порядок байт
+        if packed[0] & 0x80:
+            body = bytes(b ^ 0xFF for b in packed)
+        else:
+            body = bytes([packed[0] ^ 0x80]) + packed[1:]
+    else:
+        body = str(value).encode("utf-8").replace(b"\x00", b"")
+        body = body.replace(b"\x01", b"\x01\x01") + b"\x01\x00"
+    if desc:
+        body = bytes(b ^ 0xFF for b in body)
+    return b"\x01" + body
+
+
+def sort_key(obj, sort: List[dict]) -> str:
+    key = b"".join(_encode_component(getattr(obj, s["column"], None), s.get("desc", False)) for s in sort)
+    # hex сохраняет порядок байт при любой коллации и помещается в индекс
+    return key[:SORT_KEY_BYTES].hex()
+
+
+def _row(db: Session, table: UserTable, obj) -> dict:
+    derived = DERIVED_COLUMNS.get(table.source, {})
+    data = {
+        column: _derived(db, obj, column) if column in derived else _json_value(getattr(obj, column, None))
+        for column in table.columns
+    }
+    return {
+        "table_id": table.id,
+        "row_id": obj.id,
+        "sort_key": sort_key(obj, table.sort or []),
+        "data": data,
+    }
+
+
+def _prefetch(db: Session, table: UserTable, objects: List) -> None:
+    """Справочники для производных колонок пачки строк — одним запросом на справочник"""
+    dependencies = _dependencies(table)
+    registry.prefetch(
+        db,
+        transport_ids=[obj.transport_id for obj in objects] if TRANSPORTS in dependencies else (),
+        employee_ids=[obj.executor for obj in objects] if EMPLOYEES in dependencies else (),
+    )
+
+
+def _insert_rows(db: Session, table: UserTable, objects: Iterable) -> int:
+    count, chunk = 0, []
+    for obj in objects:
+        chunk.append(obj)
+        if len(chunk) >= INSERT_CHUNK_SIZE:
+            count += _insert_chunk(db, table, chunk)
+            chunk = []
+    if chunk:
+        count += _insert_chunk(db, table, chunk)
+    return count
+
+
+def _insert_chunk(db: Session, table: UserTable, objects: List) -> int:
+    _prefetch(db, table, objects)
+    db.execute(insert(TableViewRow), [_row(db, table, obj) for obj in objects])
+    return len(objects)
+
+
+# --- материализация ---
+
+def _dependencies(table: UserTable) -> Set[str]:
+    derived = DERIVED_COLUMNS.get(table.source, {})
+    return {derived[c] for c in table.columns if c in derived}
+
+
+def _iter_source(db: Session, table: UserTable):
+    # Keyset-пагинация вместо потокового курсора: вставки идут по тому же соединению
+    for model in _models(db, table.source):
+        last_id = 0
+        while True:
+            batch = _query(db, table, model).filter(model.id > last_id).order_by(model.id).limit(INSERT_CHUNK_SIZE).all()
+            if not batch:
+                break
+            yield from batch
+            last_id = batch[-1].id
+
+
+def _latest_change_id(db: Session) -> int:
+    return db.query(func.max(TableViewChange.id)).scalar() or 0
+
+
+def _settled_before(db: Session) -> datetime:
+    """Записи журнала, созданные до этого момента, уже закоммичены (транзакции короче лага)"""
+    return db.execute(select(func.now())).scalar() - timedelta(seconds=settings.TABLE_VIEW_CHANGE_LAG)
+
+
+def _advance(table: UserTable, changes: List[Tuple[int, Optional[datetime]]], settled: datetime) -> None:
+    """Сдвинуть last_change_id по устоявшимся записям (id по возрастанию); остальные запомнить как учтённые"""
+    last_change_id = table.last_change_id or 0
+    applied: List[int] = []
+    for change_id, created_at in changes:
+        if not applied and created_at is not None and created_at <= settled:
+            last_change_id = change_id
+        else:
+            applied.append(change_id)
+    table.last_change_id = last_change_id
+    table.applied_change_ids = applied
+
+
+def materialize(db: Session, table: UserTable) -> None:
+    """Полностью перестроить представление"""
+    settled = _settled_before(db)
+    last_change_id = db.query(func.max(TableViewChange.id)).filter(
+        TableViewChange.created_at <= settled
+    ).scalar() or 0
+    recent = [change_id for (change_id,) in db.query(TableViewChange.id).filter(
+        TableViewChange.id > last_change_id
+    ).order_by(TableViewChange.id)]
+    db.query(TableViewRow).filter(TableViewRow.table_id == table.id).delete(synchronize_session=False)
+    table.row_count = _insert_rows(db, table, _iter_source(db, table))
+    table.last_change_id = last_change_id
+    table.applied_change_ids = recent
+    table.materialized_at = func.now()
+
+
+def _changed_ids(db: Session, table: UserTable, changes: List[Tuple[str, Optional[int]]]) -> Optional[Set[int]]:
+    """id строк источника, которые нужно пересчитать; None — нужна полная перестройка"""
+    own: Set[int] = set()
+    by_dependency: Dict[str, Set[int]] = {}
+    for source, row_id in changes:
+        if row_id is None:
+            return None
+        if source == table.source:
+            own.add(row_id)
+        else:
+            by_dependency.setdefault(source, set()).add(row_id)
+
+    models = _models(db, table.source)
+    for dependency, ids in by_dependency.items():
+        column = DEPENDENCY_KEYS[(table.source, dependency)]
+        for model in models:
+            own.update(row_id for (row_id,) in db.query(model.id).filter(getattr(model, column).in_(ids)).all())
+        if len(own) > FULL_REBUILD_THRESHOLD:
+            return None
+    return own if len(own) <= FULL_REBUILD_THRESHOLD else None
+
+
+def refresh(db: Session, table: UserTable) -> None:
+    """Догнать журнал изменений: пересчитать только затронутые строки"""
+    sources = {table.source} | _dependencies(table)
+    changes = db.query(
+        TableViewChange.id, TableViewChange.source, TableViewChange.row_id, TableViewChange.created_at
+    ).filter(
+        TableViewChange.source.in_(sources),
+        TableViewChange.id > (table.last_change_id or 0)
+    ).order_by(TableViewChange.id).all()
+    if not changes:
+        return
+
+    applied = set(table.applied_change_ids or [])
+    pending = [(source, row_id) for change_id, source, row_id, _ in changes if change_id not in applied]
+    if pending:
+        ids = _changed_ids(db, table, pending)
+        if ids is None:
+            materialize(db, table)
+            return
+        db.query(TableViewRow).filter(
+            TableViewRow.table_id == table.id,
+            TableViewRow.row_id.in_(ids)
+        ).delete(synchronize_session=False)
+        for model in _models(db, table.source):
+            _insert_rows(db, table, _query(db, table, model).filter(model.id.in_(ids)).all())
+        table.row_count = db.query(func.count(TableViewRow.id)).filter(TableViewRow.table_id == table.id).scalar()
+        table.materialized_at = func.now()
+    _advance(table, [(change_id, created_at) for change_id, _, _, created_at in changes], _settled_before(db))
+
+
+def prune_changes(db: Session) -> int:
+    """Удалить из журнала записи, которые уже учтены всеми материализованными представлениями.
+
+    Не материализованные представления перестраиваются целиком и журнал не держат.
+    Не делает commit.
+    """
+    db.flush()
+    horizon = db.query(func.min(UserTable.last_change_id)).filter(
+        UserTable.source.isnot(None),
+        UserTable.materialized_at.isnot(None)
+    ).scalar()
+    if horizon is None:
+        horizon = _latest_change_id(db)
+    if not horizon:
+        return 0
+    return db.query(TableViewChange).filter(TableViewChange.id <= horizon).delete(synchronize_session=False)
+
+
+def _needs_refresh(db: Session, table: UserTable) -> bool:
+    """Есть ли в журнале ещё не учтённые представлением изменения (без блокировки)"""
+    if table.materialized_at is None:
+        return True
+    query = db.query(TableViewChange.id).filter(
+        TableViewChange.source.in_({table.source} | _dependencies(table)),
+        TableViewChange.id > (table.last_change_id or 0)
+    )
+    if table.applied_change_ids:
+        query = query.filter(TableViewChange.id.notin_(table.applied_change_ids))
+    return query.limit(1).first() is not None
+
+
+def get_rows(db: Session, table_id: int, skip: int = 0, limit: int = 100) -> Optional[Tuple[UserTable, List[dict]]]:
+    table = db.query(UserTable).filter(UserTable.id == table_id).first()
+    if table is None:
+        return None
+    if table.source is None:
+        db.rollback()
+        raise ValueError("Таблица не является сохранённым представлением (source не задан)")
+
+    if _needs_refresh(db, table):
+        # Блокируем строку представления, чтобы два воркера не обновляли его одновременно;
+        # под блокировкой проверяем заново — другой воркер мог уже обновить
+        db.rollback()
+        try:
+            table = db.query(UserTable).filter(UserTable.id == table_id).with_for_update().first()
+            if table is None:
+                db.rollback()
+                return None
+            if table.materialized_at is None:
+                materialize(db, table)
+            elif _needs_refresh(db, table):
+                refresh(db, table)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        db.refresh(table)
+
+    rows = db.query(TableViewRow.data).filter(
+        TableViewRow.table_id == table_id
+    ).order_by(TableViewRow.sort_key, TableViewRow.row_id).offset(skip).limit(limit).all()
+    return table, [data for (data,) in rows]
@@ -0,0 +1,157 @@
+"""Денормализованная проекция задач tasks_enriched для чтения смен.
+
+Строка проекции — задача вместе с ФИО исполнителя, названием и госномером
+транспорта и именем робота (то же, что раньше вычислял enrich_task_data на
+каждое чтение). Смены читают задачи одним индексным запросом по shift_id без
+джойнов и обращений к реестру.
+
+Проекция обновляется в той же транзакции, что и изменение источника:
+- запись задачи пересобирает её строку (DELETE + INSERT ... SELECT с джойнами);
+- изменение сотрудника, транспорта или робота — один UPDATE зависимых строк
+  с коррелированным подзапросом к справочнику;
+- архивация удаляет строки перенесённых задач.
+
+Массовые загрузки в обход CRUD (init_db, synthetic_data) и восстановление
+после ручных правок в БД — python rebuild_projection.py (rebuild).
+"""
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import case, delete, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from app.models.database_models import Employee, Robots, Task, TaskEnriched, Transport
+
+COLUMNS = [
+    "id", "shift_id", "executor", "robot_ref", "robot_name", "transport_id", "time_start", "time_end",
+    "type", "geojson", "geojson_filename", "tickets", "executor_name", "transport_name",
+    "transport_gov_number", "created_at", "updated_at",
+]
+
+
+def _executor_name(employee):
+    """ФИО как в enrich_task_data: отчество добавляется, только если оно непустое"""
+    patronymic = case(
+        (func.coalesce(employee.patronymic, "") != "", literal(" ") + employee.patronymic),
+        else_=literal(""),
+    )
+    return employee.firstname + literal(" ") + employee.lastname + patronymic
+
+
+def _source(task_ids: Optional[Iterable[int]] = None):
+    """SELECT строк проекции из tasks и справочников в порядке COLUMNS"""
+    query = (
+        select(
+            Task.id, Task.shift_id, Task.executor, Task.robot_name,
+            # Как в enrich_task_data: tasks.robot_name ищется среди id роботов
+            func.coalesce(Robots.name, Task.robot_name),
+            Task.transport_id, Task.time_start, Task.time_end, Task.type, Task.geojson,
+            Task.geojson_filename, Task.tickets, _executor_name(Employee), Transport.name,
+            Transport.gov_number, Task.created_at, Task.updated_at,
+        )
+        .select_from(Task)
+        .outerjoin(Employee, Employee.id == Task.executor)
+        .outerjoin(Transport, Transport.id == Task.transport_id)
+        .outerjoin(Robots, Robots.id == Task.robot_name)
+    )
+    if task_ids is not None:
+        query = query.where(Task.id.in_(list(task_ids)))
+    return query
+
+
+# --- пути записи (вызываются до commit) ---
+
+def project_tasks(db: Session, task_ids: Iterable[int]) -> None:
+    """Пересобрать строки проекции для созданных или изменённых задач"""
+    task_ids = list(task_ids)
+    if not task_ids:
+        return
+    db.flush()
+    db.execute(delete(TaskEnriched).where(TaskEnriched.id.in_(task_ids)))
+    db.execute(insert(TaskEnriched).from_select(COLUMNS, _source(task_ids)))
+
+
+def remove_tasks(db: Session, task_ids: Iterable[int]) -> None:
+    task_ids = list(task_ids)
+    if task_ids:
+        db.execute(delete(TaskEnriched).where(TaskEnriched.id.in_(task_ids)))
+
+
+def remove_shifts(db: Session, shift_ids: Iterable[int]) -> None:
+    """Удалить задачи смен (после переноса в архив)"""
+    shift_ids = list(shift_ids)
+    if shift_ids:
+        db.execute(delete(TaskEnriched).where(TaskEnriched.shift_id.in_(shift_ids)))
+
+
+def refresh_employees(db: Session, employee_ids: Iterable[int]) -> None:
+    """Обновить ФИО исполнителя в задачах этих сотрудников"""
+    employee_ids = list(employee_ids)
+    if not employee_ids:
+        return
+    db.flush()
+    name = select(_executor_name(Employee)).where(Employee.id == TaskEnriched.executor).scalar_subquery()
+    db.execute(
+        update(TaskEnriched).where(TaskEnriched.executor.in_(employee_ids)).values(executor_name=name)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def refresh_transports(db: Session, transport_ids: Iterable[int]) -> None:
+    """Обновить название и госномер транспорта в задачах"""
+    transport_ids = list(transport_ids)
+    if not transport_ids:
+        return
+    db.flush()
+    transport = select(Transport).where(Transport.id == TaskEnriched.transport_id)
+    db.execute(
+        update(TaskEnriched).where(TaskEnriched.transport_id.in_(transport_ids)).values(
+            transport_name=transport.with_only_columns(Transport.name).scalar_subquery(),
+            transport_gov_number=transport.with_only_columns(Transport.gov_number).scalar_subquery(),
+        ).execution_options(synchronize_session=False)
+    )
+
+
+def refresh_robots(db: Session, robot_ids: Optional[Iterable[int]] = None) -> None:
+    """Обновить имя робота в задачах, ссылающихся на эти id (None — на любые, например после импорта)"""
+    db.flush()
+    name = select(Robots.name).where(Robots.id == TaskEnriched.robot_ref).scalar_subquery()
+    query = update(TaskEnriched).values(robot_name=func.coalesce(name, TaskEnriched.robot_ref))
+    if robot_ids is None:
+        query = query.where(TaskEnriched.robot_ref.isnot(None))
+    else:
+        robot_ids = list(robot_ids)
+        if not robot_ids:
+            return
+        query = query.where(TaskEnriched.robot_ref.in_(robot_ids))
+    db.execute(query.execution_options(synchronize_session=False))
+
+
+# --- чтение ---
+
+def tasks_by_shift(db: Session, shift_ids: Iterable[int]) -> Dict[int, List[TaskEnriched]]:
+    """Строки проекции, сгруппированные по сменам (одним запросом)"""
+    shift_ids = list(shift_ids)
+    grouped: Dict[int, List[TaskEnriched]] = {shift_id: [] for shift_id in shift_ids}
+    if not shift_ids:
+        return grouped
+    rows = db.query(TaskEnriched).filter(
+        TaskEnriched.shift_id.in_(shift_ids)
+    ).order_by(TaskEnriched.shift_id, TaskEnriched.id).all()
+    for row in rows:
+        grouped[row.shift_id].append(row)
+    return grouped
+
+
+# --- перестройка ---
+
+def rebuild(db: Session) -> int:
+    """Пересобрать проекцию с нуля в одной транзакции; читатели до commit видят прежнюю"""
+    try:
+        db.execute(delete(TaskEnriched))
+        db.execute(insert(TaskEnriched).from_select(COLUMNS, _source()))
+        count = db.query(func.count(TaskEnriched.id)).scalar() or 0
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return count
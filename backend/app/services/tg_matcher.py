@@ -0,0 +1,163 @@
+"""Сопоставление входящих сообщений с trigger_keywords активных TG сценариев.
+
+Ключевые слова всех активных сценариев компилируются в один автомат Ахо-Корасик,
+поэтому сообщение проверяется за один линейный проход независимо от количества
+сценариев и ключевых слов. Автомат перестраивается лениво: пути записи сценариев
+вызывают invalidate(), а сборка происходит при следующем сопоставлении.
+"""
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.database_models import TgScenario
+
+
+def normalize(text: str) -> str:
+    return text.lower().replace("ё", "е")
+
+
+class Automaton:
+    """Автомат Ахо-Корасик над строками (регистронезависимый)"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Номера ключевых слов, заканчивающихся в узле
+        self._out: List[List[int]] = [[]]
+        # Ближайший по fail-цепочке узел с непустым _out (или -1)
+        self._dict_link: List[int] = [-1]
+
+        seen: Dict[str, int] = {}
+        for keyword in keywords:
+            word = normalize(keyword.strip())
+            if not word or word in seen:
+                continue
+            seen[word] = len(self.keywords)
+            self._insert(word, len(self.keywords))
+            self.keywords.append(word)
+        self._build_links()
+
+    def _insert(self, word: str, index: int) -> None:
+        node = 0
+        for char in word:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._dict_link.append(-1)
+            node = nxt
+        self._out[node].append(index)
+
+    def _build_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                link = self._fail[child]
+                self._dict_link[child] = link if self._out[link] else self._dict_link[link]
+                queue.append(child)
+
+    def iter_matches(self, text: str) -> Iterable[Tuple[int, int]]:
+        """Пары (номер ключевого слова, позиция конца совпадения)"""
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+        node = 0
+        for position, char in enumerate(normalize(text)):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            hit = node if out[node] else dict_link[node]
+            while hit > 0:
+                for index in out[hit]:
+                    yield index, position + 1
+                hit = dict_link[hit]
+
+    def find(self, text: str) -> Set[int]:
+        return {index for index, _ in self.iter_matches(text)}
+
+
+class ScenarioMatcher:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._automaton: Optional[Automaton] = None
+        # Ключевое слово -> id сценариев; id -> имя сценария
+        self._scenarios_by_keyword: List[List[int]] = []
+        self._names: Dict[int, str] = {}
+        self._generation = 0
+        self.builds = 0
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._automaton = None
+
+    def _build(self, db: Session) -> Tuple[Automaton, List[List[int]], Dict[int, str]]:
+        rows = db.query(TgScenario.id, TgScenario.name, TgScenario.trigger_keywords).filter(
+            TgScenario.status == "active"
+        ).all()
+        by_word: Dict[str, List[int]] = {}
+        names: Dict[int, str] = {}
+        for scenario_id, name, keywords in rows:
+            names[scenario_id] = name
+            for keyword in keywords or []:
+                word = normalize(keyword.strip())
+                if word:
+                    by_word.setdefault(word, []).append(scenario_id)
+        automaton = Automaton(by_word.keys())
+        return automaton, [by_word[word] for word in automaton.keywords], names
+
+    def _ensure(self, db: Session) -> Tuple[Automaton, List[List[int]], Dict[int, str]]:
+        with self._lock:
+            if self._automaton is not None:
+                return self._automaton, self._scenarios_by_keyword, self._names
+            generation = self._generation
+
+        built = self._build(db)
+        with self._lock:
+            # Если за время сборки сценарии изменились — результат используем, но не кэшируем
+            if generation == self._generation:
+                self._automaton, self._scenarios_by_keyword, self._names = built
+                self.builds += 1
+        return built
+
+    def match_many(self, db: Session, texts: List[str]) -> List[List[dict]]:
+        automaton, scenarios_by_keyword, names = self._ensure(db)
+        results = []
+        for text in texts:
+            matched: Dict[int, List[str]] = {}
+            for index in sorted(automaton.find(text)):
+                for scenario_id in scenarios_by_keyword[index]:
+                    matched.setdefault(scenario_id, []).append(automaton.keywords[index])
+            results.append([
+                {"scenario_id": scenario_id, "name": names[scenario_id], "keywords": keywords}
+                for scenario_id, keywords in sorted(matched.items())
+            ])
+        return results
+
+    def match(self, db: Session, text: str) -> List[dict]:
+        return self.match_many(db, [text])[0]
+
+
+matcher = ScenarioMatcher()
+
+
+def invalidate() -> None:
+    matcher.invalidate()
+
+
+def match(db: Session, text: str) -> List[dict]:
+    return matcher.match(db, text)
+
+
+def match_many(db: Session, texts: List[str]) -> List[List[dict]]:
+    return matcher.match_many(db, texts)
@@ -0,0 +1,218 @@
+"""Движок виджетов дашбордов.
+
+Каждый виджет компилируется в один GROUP BY запрос по tasks за период; если
+период дотягивается до архива, архивные задачи добавляются через UNION ALL.
+Результаты кэшируются в памяти процесса; кэш сбрасывается записью в задачи
+и смены (invalidate() вызывается из task_crud/shift_crud), поэтому повторное
+открытие дашборда не ходит в БД, пока данные не изменились.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, literal_column, select, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal, engine
+from app.models.database_models import Task, TaskArchive
+from app.services import archive
+from app.services.registry import registry
+
+CACHE_MAX_ENTRIES = 512
+
+_lock = threading.Lock()
+_generation = 0
+_cache: "OrderedDict[tuple, Tuple[int, List[dict]]]" = OrderedDict()
+stats = {"hits": 0, "misses": 0}
+
+
+def invalidate() -> None:
+    """Сбросить кэш агрегатов (вызывается из путей записи задач и смен)"""
+    global _generation
+    with _lock:
+        _generation += 1
+        _cache.clear()
+
+
+def _duration_seconds(db: Session, start, end):
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        return func.timestampdiff(literal_column("SECOND"), start, end)
+    if dialect == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 86400
+    return func.extract("epoch", end - start)
+
+
+def _hours(value) -> float:
+    return round(float(value or 0) / 3600, 2)
+
+
+# --- виджеты ---
+
+def _tasks_in_range(db: Session, date_from: datetime, date_to: datetime):
+    """Задачи периода подзапросом: горячие и, если период дотягивается до архива, архивные"""
+    def in_range(model):
+        return select(
+            model.id, model.type, model.time_start, model.time_end,
+            model.robot_name, model.transport_id, model.executor
+        ).where(model.time_start >= date_from, model.time_start < date_to)
+
+    query = in_range(Task)
+    if archive.reaches_tasks(db, date_from):
+        query = union_all(query, in_range(TaskArchive))
+    return query.subquery("period_tasks")
+
+
+def _tasks_per_type_per_day(db: Session, date_from: datetime, date_to: datetime) -> List[dict]:
+    tasks = _tasks_in_range(db, date_from, date_to)
+    day = func.date(tasks.c.time_start)
+    rows = db.query(day, tasks.c.type, func.count(tasks.c.id)).group_by(
+        day, tasks.c.type
+    ).order_by(day, tasks.c.type).all()
+    return [
+        {"day": str(d), "type": getattr(t, "value", t), "count": count}
+        for d, t, count in rows
+    ]
+
+
+def _grouped_load(db: Session, column: str, date_from: datetime, date_to: datetime) -> List[Tuple[Any, int, float]]:
+    tasks = _tasks_in_range(db, date_from, date_to)
+    key = tasks.c[column]
+    seconds = func.sum(_duration_seconds(db, tasks.c.time_start, tasks.c.time_end))
+    rows = db.query(key, func.count(tasks.c.id), seconds).filter(
+        key.isnot(None)
+    ).group_by(key).order_by(key).all()
+    return [(key, count, _hours(total)) for key, count, total in rows]
+
+
+def _robot_hours(db: Session, date_from: datetime, date_to: datetime) -> List[dict]:
+    return [
+        {"robot_name": key, "tasks": count, "hours": hours}
+        for key, count, hours in _grouped_load(db, "robot_name", date_from, date_to)
+    ]
+
+
+def _transport_usage(db: Session, date_from: datetime, date_to: datetime) -> List[dict]:
+    return [
+        {"transport_id": key, "tasks": count, "hours": hours}
+        for key, count, hours in _grouped_load(db, "transport_id", date_from, date_to)
+    ]
+
+
+def _executor_load(db: Session, date_from: datetime, date_to: datetime) -> List[dict]:
+    return [
+        {"executor": key, "tasks": count, "hours": hours}
+        for key, count, hours in _grouped_load(db, "executor", date_from, date_to)
+    ]
+
+
+WIDGETS = {
+    "tasks_per_type_per_day": _tasks_per_type_per_day,
+    "robot_hours": _robot_hours,
+    "transport_usage": _transport_usage,
+    "executor_load": _executor_load,
+}
+
+
+def _decorate(db: Session, widget_type: str, rows: List[dict]) -> List[dict]:
+    """Добавить имена из реестра справочников (не кэшируется вместе с агрегатами)"""
+    if widget_type == "transport_usage":
+        registry.prefetch(db, transport_ids=[row["transport_id"] for row in rows])
+        result = []
+        for row in rows:
+            transport = registry.transport(db, row["transport_id"])
+            result.append({**row, "transport_name": transport.name if transport else None})
+        return result
+    if widget_type == "executor_load":
+        registry.prefetch(db, employee_ids=[row["executor"] for row in rows])
+        result = []
+        for row in rows:
+            employee = registry.employee(db, row["executor"])
+            name = " ".join(p for p in (employee.firstname, employee.lastname, employee.patronymic) if p) if employee else None
+            result.append({**row, "executor_name": name})
+        return result
+    return rows
+
+
+def resolve_range(
+    days: int,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+) -> Tuple[datetime, datetime]:
+    # Период по умолчанию выравниваем по суткам, чтобы ключ кэша был стабилен
+    if date_to is None:
+        date_to = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    if date_from is None:
+        date_from = date_to - timedelta(days=days)
+    return date_from, date_to
+
+
+def evaluate_widget(
+    widget: dict,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db: Optional[Session] = None
+) -> dict:
+    widget_type = widget["type"]
+    if widget_type not in WIDGETS:
+        raise ValueError(f"Unknown widget type: {widget_type}")
+    date_from, date_to = resolve_range(widget.get("days", 30), date_from, date_to)
+    key = (widget_type, date_from, date_to)
+
+    own_session = db is None
+    if own_session:
+        db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        with _lock:
+            generation = _generation
+            entry = _cache.get(key)
+            if entry is not None and entry[0] == generation:
+                _cache.move_to_end(key)
+                stats["hits"] += 1
+                cached, rows = True, entry[1]
+            else:
+                cached, rows = False, None
+
+        if rows is None:
+            stats["misses"] += 1
+            rows = WIDGETS[widget_type](db, date_from, date_to)
+            with _lock:
+                # Не кладём результат, если за время запроса данные уже изменились
+                if generation == _generation:
+                    _cache[key] = (generation, rows)
+                    while len(_cache) > CACHE_MAX_ENTRIES:
+                        _cache.popitem(last=False)
+
+        return {
+            "id": widget.get("id"),
+            "type": widget_type,
+            "title": widget.get("title"),
+            "date_from": date_from,
+            "date_to": date_to,
+            "cached": cached,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            "rows": _decorate(db, widget_type, rows),
+        }
+    finally:
+        if own_session:
+            db.close()
+
+
+async def evaluate_dashboard(
+    widgets: List[dict],
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+) -> List[dict]:
+    """Посчитать все виджеты дашборда параллельно (каждый в своей сессии)"""
+    if isinstance(engine.pool, StaticPool):
+        # Одно общее соединение — параллелить нельзя
+        return [evaluate_widget(w, date_from, date_to) for w in widgets]
+    return list(await asyncio.gather(*[
+        run_in_threadpool(evaluate_widget, w, date_from, date_to) for w in widgets
+    ]))
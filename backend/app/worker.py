@@ -0,0 +1,158 @@
+"""Celery-приложение и фоновые задачи для тяжёлых операций.
+
+Запуск воркера и планировщика периодических задач (ночная архивация):
+    celery -A app.worker worker --loglevel=info
+    celery -A app.worker beat --loglevel=info
+
+При CELERY_TASK_ALWAYS_EAGER=true задачи выполняются синхронно в процессе API,
+а результаты хранятся в памяти процесса — режим для тестов и локального запуска
+без брокера.
+"""
+import csv
+import json
+import os
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict
+
+from celery import Celery
+from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
+from sqlalchemy import func
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.database_models import Employee, Robots, Shift, Task, Transport
+from app.services import archive, invalidation, sync, table_views
+from app.services.geojson import decode_tickets
+
+EXPORT_CHUNK_SIZE = 1000
+
+celery_app = Celery("rnd_planner")
+
+if settings.CELERY_TASK_ALWAYS_EAGER:
+    celery_app.conf.update(
+        broker_url="memory://",
+        result_backend="cache+memory://",
+        task_always_eager=True,
+        task_eager_propagates=False,
+        task_store_eager_result=True,
+    )
+else:
+    celery_app.conf.update(
+        broker_url=settings.CELERY_BROKER_URL,
+        result_backend=settings.CELERY_RESULT_BACKEND,
+    )
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_track_started=True,
+    result_extended=True,
+    result_expires=settings.JOB_RESULT_TTL,
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    timezone=settings.CELERY_TIMEZONE,
+)
+
+_archive_hour, _archive_minute = settings.ARCHIVE_SCHEDULE.split(":")
+celery_app.conf.beat_schedule = {
+    # Архивация, чистка tombstones /sync и учтённого журнала представлений
+    "archive-nightly": {
+        "task": "archive.shifts",
+        "schedule": crontab(hour=int(_archive_hour), minute=int(_archive_minute)),
+    },
+}
+
+
+@worker_process_init.connect
+def start_invalidation_bus(**kwargs):
+    # Архивация и другие записи из воркера должны доходить до кэшей воркеров API
+    invalidation.start()
+
+
+@worker_process_shutdown.connect
+def stop_invalidation_bus(**kwargs):
+    invalidation.stop()
+
+
+EXPORT_MODELS = {
+    "tasks": Task,
+    "shifts": Shift,
+    "employees": Employee,
+    "transports": Transport,
+    "robots": Robots,
+}
+
+
+def _csv_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+@celery_app.task(bind=True, name="geojson.decode")
+def decode_geojson(self, geojson: Dict[str, Any]) -> Dict[str, Any]:
+    """Извлечь тикеты из GeoJSON"""
+    return {"tickets": decode_tickets(geojson)}
+
+
+@celery_app.task(bind=True, name="exports.entity_csv")
+def export_entity_csv(self, entity: str) -> Dict[str, Any]:
+    """Выгрузить все строки сущности в CSV; прогресс — в meta состояния PROGRESS"""
+    model = EXPORT_MODELS[entity]
+    columns = [c.key for c in model.__table__.columns]
+    os.makedirs(settings.EXPORT_DIR, exist_ok=True)
+    path = os.path.join(settings.EXPORT_DIR, f"{entity}-{self.request.id}.csv")
+
+    db = SessionLocal()
+    try:
+        total = db.query(func.count(model.id)).scalar() or 0
+        done, last_id = 0, 0
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            # Keyset-пагинация: память воркера не зависит от размера таблицы
+            while True:
+                batch = db.query(model).filter(model.id > last_id).order_by(model.id).limit(EXPORT_CHUNK_SIZE).all()
+                if not batch:
+                    break
+                writer.writerows([_csv_value(getattr(obj, c)) for c in columns] for obj in batch)
+                done += len(batch)
+                last_id = batch[-1].id
+                db.expunge_all()
+                self.update_state(state="PROGRESS", meta={"done": done, "total": total})
+    finally:
+        db.close()
+    return {"entity": entity, "rows": done, "path": path, "filename": os.path.basename(path)}
+
+
+@celery_app.task(bind=True, name="notifications.send", track_started=False)
+def send_notifications(self, run: Dict[str, Any], messages: list) -> Dict[str, Any]:
+    """Разослать сообщения запуска; прогресс — состояние запуска в meta PROGRESS"""
+    from app.services import notifications
+
+    return notifications.execute_run(run, messages, report=lambda state: self.update_state(state="PROGRESS", meta=state))
+
+
+@celery_app.task(bind=True, name="archive.shifts")
+def archive_shifts(self, before: str = None) -> Dict[str, Any]:
+    """Перенести в архив смены старше ARCHIVE_HORIZON_DAYS (или раньше before, ISO-дата)
+    и вычистить записи об удалениях старше SYNC_TOMBSTONE_DAYS и учтённый журнал представлений"""
+    cutoff = datetime.fromisoformat(before) if before else archive.default_cutoff()
+    # Пул без дочерних процессов (--pool=solo/threads) не шлёт worker_process_init; start() идемпотентен
+    invalidation.start()
+    db = SessionLocal()
+    try:
+        result = archive.archive_before(db, cutoff)
+        result["tombstones_purged"] = sync.purge_tombstones(db)
+        result["table_view_changes_pruned"] = table_views.prune_changes(db)
+        db.commit()
+    finally:
+        db.close()
+    return {**result, "cutoff": cutoff.isoformat()}
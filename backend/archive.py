@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Перенос старых смен и их задач в архивные таблицы.
+
+    python archive.py                      # старше ARCHIVE_HORIZON_DAYS дней
+    python archive.py --before 2024-01-01  # явная граница
+    python archive.py --dry-run            # только посчитать
+
+Заодно вычищаются записи об удалениях (tombstones) старше SYNC_TOMBSTONE_DAYS
+и уже учтённые всеми представлениями записи журнала table_view_changes.
+"""
+import argparse
+from datetime import datetime
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.services import archive, invalidation, sync, table_views
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Архивация смен и задач R&D Planner")
+    parser.add_argument("--horizon-days", type=int, default=settings.ARCHIVE_HORIZON_DAYS,
+                        help="архивировать смены старше стольких дней")
+    parser.add_argument("--before", type=datetime.fromisoformat, default=None,
+                        help="архивировать смены с датой раньше этой (YYYY-MM-DD), вместо --horizon-days")
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE, help="смен в одной транзакции")
+    parser.add_argument("--dry-run", action="store_true")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    cutoff = args.before or archive.default_cutoff(args.horizon_days)
+    engine.echo = False
+
+    # Воркеры API узнают о новой границе архива через шину
+    invalidation.start()
+    db = SessionLocal()
+    try:
+        plan = archive.pending(db, cutoff)
+        print(f"📦 Смены до {cutoff:%Y-%m-%d}: {plan['shifts']}, задач: {plan['tasks']}")
+        if args.dry_run:
+            exit(0)
+        if plan["shifts"]:
+            result = archive.archive_before(db, cutoff, batch_size=args.batch_size)
+            print(f"✅ В архив перенесено смен: {result['shifts']}, задач: {result['tasks']}")
+        print(f"🧹 Удалено записей об удалениях старше {settings.SYNC_TOMBSTONE_DAYS} дней: {sync.purge_tombstones(db)}")
+        pruned = table_views.prune_changes(db)
+        db.commit()
+        print(f"🧹 Удалено учтённых записей журнала представлений: {pruned}")
+    except Exception as e:
+        print(f"💥 Ошибка архивации: {e}")
+        exit(1)
+    finally:
+        db.close()
+        invalidation.stop()
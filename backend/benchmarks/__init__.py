@@ -0,0 +1 @@
+"""Нагрузочные бенчмарки API (см. benchmarks/run.py)"""
@@ -0,0 +1,66 @@
+"""Реалистичный набор данных для бенчмарков.
+
+Пустая база заполняется генератором synthetic_data (тем же, что
+init_db.py --synthetic) в уменьшенном объёме: смены на days дней подряд и
+задачи к ним. Генерация детерминирована по seed, так что прогоны с
+одинаковыми параметрами сравнимы между собой.
+
+Если в базе уже есть задачи, Dataset.load только читает идентификаторы —
+так бенчмарк может работать против базы, заполненной заранее (в том числе
+той, которую использует сервер в HTTP-режиме).
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List
+
+from sqlalchemy import func, select
+
+from app.models.database_models import Crew, Employee, Robots, Shift, Task, Transport
+from synthetic_data import Volumes, generate
+
+
+@dataclass
+class Dataset:
+    employee_ids: List[int] = field(default_factory=list)
+    shift_ids: List[int] = field(default_factory=list)
+    task_ids: List[int] = field(default_factory=list)
+    transport_ids: List[int] = field(default_factory=list)
+    robot_names: List[int] = field(default_factory=list)
+    crew_ids: List[int] = field(default_factory=list)
+    bodies: List[str] = field(default_factory=list)
+    days: List[date] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, engine) -> "Dataset":
+        with engine.connect() as conn:
+            def column(col):
+                return list(conn.execute(select(col).order_by(col)).scalars())
+            return cls(
+                employee_ids=column(Employee.id),
+                shift_ids=column(Shift.id),
+                task_ids=column(Task.id),
+                transport_ids=column(Transport.id),
+                robot_names=column(Robots.name),
+                crew_ids=column(Crew.id),
+                bodies=[b for b in conn.execute(select(Employee.body).distinct()).scalars() if b],
+                days=sorted({d.date() for d in conn.execute(select(Shift.date)).scalars()}),
+            )
+
+    def summary(self) -> str:
+        return (f"{len(self.days)} days, {len(self.shift_ids)} shifts, {len(self.task_ids)} tasks, "
+                f"{len(self.employee_ids)} employees, {len(self.crew_ids)} crews")
+
+
+def seed(engine, days: int = 14, shifts_per_day: int = 3, tasks_per_shift: int = 40,
+         employees: int = 300, crews: int = 20, robots: int = 60, transports: int = 40,
+         start: date = date(2025, 10, 1), seed: int = 42) -> Dataset:
+    """Заполнить пустую базу генератором synthetic_data; если задачи уже есть — вернуть существующий набор"""
+    with engine.connect() as conn:
+        if conn.execute(select(func.count(Task.id))).scalar():
+            return Dataset.load(engine)
+    generate(engine, Volumes(
+        crews=crews, employees=employees, robots=robots, transports=transports,
+        years=days / 365, shifts_per_day=shifts_per_day, tasks=days * shifts_per_day * tasks_per_shift,
+        start=start, seed=seed,
+    ), log=lambda message: None)
+    return Dataset.load(engine)
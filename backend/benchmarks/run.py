@@ -0,0 +1,211 @@
+"""Запуск бенчмарков и сравнение с сохранёнными базовыми значениями.
+
+Примеры (из каталога backend):
+    # в процессе, на отдельной SQLite-базе, которая заполняется при первом запуске
+    python -m benchmarks.run --database-url sqlite:///./bench.db --seed
+
+    # по HTTP против запущенного сервера; --database-url — та же база, что у сервера
+    python -m benchmarks.run --mode http --url http://localhost:8000 --database-url mysql+pymysql://...
+
+    # записать текущие результаты как базовые
+    python -m benchmarks.run --seed --update-baseline
+
+Для каждого сценария и уровня параллельности печатаются p50/p95/p99 и
+пропускная способность. Если для ключа mode/scenario/cN есть базовое значение
+в baselines.json, то рост p95 или падение пропускной способности больше чем
+на --tolerance считается регрессией: она печатается в конце и процесс
+завершается с кодом 1. Ошибки (не-2xx ответы) — код 2. Результат без базового
+значения ни с чем не сравнивается, поэтому тоже не проходит — код 3: снимите
+базу с --update-baseline (make bench-baseline) и закоммитьте baselines.json.
+
+Базовые значения зависят от машины и базы, поэтому снимайте их там же, где
+потом сравниваете (CI-раннер, стенд), и обновляйте осознанно.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+# Разница p95 меньше этой считается шумом даже при превышении допуска
+MIN_P95_DELTA_MS = 2.0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="R&D Planner API benchmarks")
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--url", default="http://localhost:8000", help="адрес сервера для --mode http")
+    parser.add_argument("--database-url", default=None,
+                        help="база для набора данных (в режиме inprocess — и для приложения); по умолчанию sqlite:///./bench.db")
+    parser.add_argument("--seed", action="store_true", help="заполнить базу, если в ней нет задач")
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--tasks-per-shift", type=int, default=40)
+    parser.add_argument("--employees", type=int, default=300)
+    parser.add_argument("--scenarios", default="all", help="через запятую; all — все")
+    parser.add_argument("--concurrency", default="1,8,32", help="уровни параллельности через запятую")
+    parser.add_argument("--requests", type=int, default=200, help="запросов на сценарий и уровень")
+    parser.add_argument("--warmup", type=int, default=10, help="запросов прогрева (не учитываются)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="допустимое ухудшение, доля")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", dest="json_path", default=None, help="сохранить результаты в файл")
+    return parser.parse_args(argv)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Перцентиль по ближайшему рангу"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(q / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_level(client, scenario, ds, concurrency: int, total: int, offset: int) -> Dict[str, float]:
+    """total запросов сценария, не больше concurrency одновременно"""
+    latencies: List[float] = []
+    errors: List[str] = []
+    counter = iter(range(total))
+
+    async def worker():
+        for n in counter:
+            method, url, payload = scenario.build(ds, offset + n)
+            start = time.perf_counter()
+            response = await client.request(method, url, json=payload)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 300:
+                errors.append(f"{method} {url} -> {response.status_code}: {response.text[:200]}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": len(errors),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "first_error": errors[0] if errors else None,
+    }
+
+
+def compare(results: Dict[str, dict], baselines: Dict[str, dict], tolerance: float) -> List[str]:
+    regressions = []
+    for key, result in results.items():
+        base = baselines.get(key)
+        if not base:
+            continue
+        p95_limit = base["p95_ms"] * (1 + tolerance)
+        if result["p95_ms"] > p95_limit and result["p95_ms"] - base["p95_ms"] > MIN_P95_DELTA_MS:
+            regressions.append(f"{key}: p95 {result['p95_ms']:.2f} ms > baseline {base['p95_ms']:.2f} ms (+{tolerance:.0%})")
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {result['rps']:.1f} rps < baseline {base['rps']:.1f} rps (-{tolerance:.0%})")
+    return regressions
+
+
+async def main_async(args) -> int:
+    import httpx
+    from app.database import engine
+    from benchmarks.dataset import Dataset, seed
+    from benchmarks.scenarios import SCENARIOS
+
+    engine.echo = False
+    if args.seed:
+        from app.database import create_tables
+        create_tables()
+        started = time.perf_counter()
+        ds = seed(engine, days=args.days, tasks_per_shift=args.tasks_per_shift, employees=args.employees)
+        print(f"Dataset ready in {time.perf_counter() - started:.1f}s")
+    else:
+        ds = Dataset.load(engine)
+    print(f"Dataset: {ds.summary()}")
+    if not ds.task_ids:
+        print("Dataset is empty: run with --seed")
+        return 2
+
+    names = list(SCENARIOS) if args.scenarios == "all" else args.scenarios.split(",")
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    if args.mode == "inprocess":
+        import main
+        client = httpx.AsyncClient(app=main.app, base_url="http://bench", timeout=60)
+    else:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60,
+                                   limits=httpx.Limits(max_connections=max(levels)))
+
+    results: Dict[str, dict] = {}
+    offset = 0
+    async with client:
+        print(f"{'scenario':<22}{'c':>4}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rps':>10}{'err':>6}")
+        for name in names:
+            scenario = SCENARIOS[name]
+            await run_level(client, scenario, ds, 1, args.warmup, offset)
+            offset += args.warmup
+            for level in levels:
+                result = await run_level(client, scenario, ds, level, args.requests, offset)
+                offset += args.requests
+                results[f"{args.mode}/{name}/c{level}"] = result
+                print(f"{name:<22}{level:>4}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+                      f"{result['p99_ms']:>10.2f}{result['rps']:>10.1f}{result['errors']:>6}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    failed = {key: r for key, r in results.items() if r["errors"]}
+    for key, result in failed.items():
+        print(f"ERRORS in {key}: {result['errors']} (first: {result['first_error']})")
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+
+    if args.update_baseline:
+        if failed:
+            print("Baseline not updated: there were errors")
+            return 2
+        for key, result in results.items():
+            baselines[key] = {"p50_ms": result["p50_ms"], "p95_ms": result["p95_ms"],
+                              "p99_ms": result["p99_ms"], "rps": result["rps"]}
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    regressions = compare(results, baselines, args.tolerance)
+    compared = sum(1 for key in results if key in baselines)
+    missing = sorted(key for key in results if key not in baselines)
+    if regressions:
+        print("\n" + "!" * 60)
+        print(f"PERFORMANCE REGRESSION ({len(regressions)} of {compared} compared):")
+        for line in regressions:
+            print(f"  {line}")
+        print("!" * 60)
+        return 1
+    if failed:
+        return 2
+    if missing:
+        print(f"\nNO BASELINE for {len(missing)} of {len(results)} results ({args.baseline}):")
+        for key in missing:
+            print(f"  {key}")
+        print("Record them with --update-baseline")
+        return 3
+    print(f"\nNo regressions ({compared} results compared)")
+    return 0
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # Настройки читаются при импорте app, поэтому база задаётся до него
+    os.environ["DATABASE_URL"] = args.database_url or os.environ.get("BENCH_DATABASE_URL", "sqlite:///./bench.db")
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Сценарии бенчмарка: ключевые ручки API.
+
+Сценарий по номеру запроса i строит (method, url, json). Параметры
+перебираются по кругу по данным из Dataset, поэтому при большом числе
+запросов в выборку попадают и «горячие», и «холодные» ключи кэша.
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from benchmarks.dataset import Dataset
+from synthetic_data import route_geojson
+
+Request = Tuple[str, str, Optional[Dict[str, Any]]]
+
+API = "/api/v1"
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[[Dataset, int], Request]
+    writes: bool = False
+
+
+def _pick(items, i):
+    return items[i % len(items)]
+
+
+def day_view(ds: Dataset, i: int) -> Request:
+    return "GET", f"{API}/shifts/date/{_pick(ds.days, i).isoformat()}T00:00:00", None
+
+
+def tasks_by_shift(ds: Dataset, i: int) -> Request:
+    return "GET", f"{API}/tasks/shift/{_pick(ds.shift_ids, i * 7)}", None
+
+
+def tasks_by_executor(ds: Dataset, i: int) -> Request:
+    return "GET", f"{API}/tasks/executor/{_pick(ds.employee_ids, i * 13)}", None
+
+
+def tasks_by_date_range(ds: Dataset, i: int) -> Request:
+    start = datetime.combine(_pick(ds.days, i), datetime.min.time())
+    end = start + timedelta(days=2)
+    return "GET", f"{API}/tasks/date-range/?start_date={start.isoformat()}&end_date={end.isoformat()}", None
+
+
+def employee_filters(ds: Dataset, i: int) -> Request:
+    variants = [
+        "drive=true",
+        "parking=true&telemedicine=true",
+        f"crew_id={_pick(ds.crew_ids, i)}",
+        f"body={_pick(ds.bodies, i)}",
+        "access_to_auto_vc=true&drive=true",
+    ]
+    return "GET", f"{API}/crews/employees?{_pick(variants, i)}&limit=100", None
+
+
+def geojson_decode(ds: Dataset, i: int) -> Request:
+    return "POST", f"{API}/geojson/decode", {"geojson": route_geojson(random.Random(i))}
+
+
+def _task_payload(ds: Dataset, i: int) -> Dict[str, Any]:
+    day = datetime.combine(_pick(ds.days, i), datetime.min.time())
+    time_start = day + timedelta(hours=8 + i % 8)
+    return {
+        "shift_id": _pick(ds.shift_ids, i),
+        "executor": _pick(ds.employee_ids, i * 3),
+        "robot_name": _pick(ds.robot_names, i),
+        "transport_id": _pick(ds.transport_ids, i),
+        "time_start": time_start.isoformat(),
+        "time_end": (time_start + timedelta(hours=2)).isoformat(),
+        "type": "carpet",
+        "tickets": [f"st.yandex-team.ru/BENCH-{i}"],
+    }
+
+
+def task_create(ds: Dataset, i: int) -> Request:
+    return "POST", f"{API}/tasks/", _task_payload(ds, i)
+
+
+def task_update(ds: Dataset, i: int) -> Request:
+    payload = _task_payload(ds, i)
+    del payload["shift_id"]
+    return "PUT", f"{API}/tasks/{_pick(ds.task_ids, i * 11)}", payload
+
+
+SCENARIOS: Dict[str, Scenario] = {s.name: s for s in [
+    Scenario("day_view", day_view),
+    Scenario("tasks_by_shift", tasks_by_shift),
+    Scenario("tasks_by_executor", tasks_by_executor),
+    Scenario("tasks_by_date_range", tasks_by_date_range),
+    Scenario("employee_filters", employee_filters),
+    Scenario("geojson_decode", geojson_decode),
+    Scenario("task_create", task_create, writes=True),
+    Scenario("task_update", task_update, writes=True),
+]}
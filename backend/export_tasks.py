@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Колоночная выгрузка задач для аналитики (Parquet / Arrow IPC).
+
+    python export_tasks.py tasks.parquet
+    python export_tasks.py tasks.arrow --format arrow --start 2025-01-01 --end 2025-02-01
+"""
+import argparse
+import time
+from datetime import datetime
+
+from app.database import engine
+from app.services import columnar_export
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Выгрузка задач R&D Planner в Parquet / Arrow")
+    parser.add_argument("output", help="путь к файлу выгрузки")
+    parser.add_argument("--format", choices=sorted(columnar_export.FORMATS), default=columnar_export.PARQUET)
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None, help="задачи с time_start не раньше (YYYY-MM-DD)")
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None, help="задачи с time_start раньше (YYYY-MM-DD)")
+    parser.add_argument("--batch-size", type=int, default=columnar_export.DEFAULT_BATCH_SIZE,
+                        help="строк в группе строк Parquet / батче Arrow")
+    parser.add_argument("--compression", default="zstd", help="кодек Parquet (zstd, snappy, gzip, none)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    engine.echo = False
+
+    started = time.perf_counter()
+    try:
+        with open(args.output, "wb") as sink:
+            rows = columnar_export.write(sink, args.format, args.start, args.end,
+                                         batch_size=args.batch_size, compression=args.compression)
+    except Exception as e:
+        print(f"💥 Ошибка выгрузки: {e}")
+        exit(1)
+    print(f"✅ Выгружено задач: {rows} в {args.output} за {time.perf_counter() - started:.1f} с")
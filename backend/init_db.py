@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 
+import time
+from datetime import date
 from sqlalchemy import create_engine
 from app.database import Base, engine
 from app.models.database_models import Employee, Transport, Robots, Shift, Crew
 from app.config import settings
+from app.services import task_projection
+from app.crud import crew_crud
 
 def init_database():
     print("Создание таблиц в базе данных...")
@@ -173,7 +177,11 @@ def create_sample_data():
         for task in tasks:
             db.add(task)
         
+        # Сотрудники добавлены в команды напрямую, минуя reserve_seats
+        db.flush()
+        crew_crud.recount_members(db)
         db.commit()
+        task_projection.rebuild(db)
         print("✅ Примеры данных успешно созданы!")
         
     except Exception as e:
@@ -183,13 +191,58 @@ def create_sample_data():
     finally:
         db.close()
 
+def parse_args():
+    import argparse
+    from synthetic_data import Volumes
+
+    defaults = Volumes()
+    parser = argparse.ArgumentParser(description="Инициализация базы данных R&D Planner")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="вместо примеров сгенерировать данные продакшен-объёма")
+    parser.add_argument("--crews", type=int, default=defaults.crews)
+    parser.add_argument("--employees", type=int, default=defaults.employees)
+    parser.add_argument("--robots", type=int, default=defaults.robots)
+    parser.add_argument("--transports", type=int, default=defaults.transports)
+    parser.add_argument("--years", type=float, default=defaults.years, help="на сколько лет создавать смены")
+    parser.add_argument("--shifts-per-day", type=int, default=defaults.shifts_per_day)
+    parser.add_argument("--tasks", type=int, default=defaults.tasks)
+    parser.add_argument("--start", type=date.fromisoformat, default=defaults.start, help="дата первой смены, YYYY-MM-DD")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--chunk-size", type=int, default=defaults.chunk_size, help="строк в одном INSERT")
+    return parser.parse_args()
+
+def create_synthetic_data(args):
+    from synthetic_data import Volumes, generate
+
+    volumes = Volumes(
+        crews=args.crews,
+        employees=args.employees,
+        robots=args.robots,
+        transports=args.transports,
+        years=args.years,
+        shifts_per_day=args.shifts_per_day,
+        tasks=args.tasks,
+        start=args.start,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+    )
+    print(f"Генерация синтетических данных (seed={volumes.seed})...")
+    started = time.perf_counter()
+    engine.echo = False
+    counts = generate(engine, volumes)
+    print(f"✅ Сгенерировано {sum(counts.values())} строк за {time.perf_counter() - started:.1f} с")
+
 if __name__ == "__main__":
+    args = parse_args()
     print("🚀 Инициализация базы данных...")
     print(f"🔗 Подключение к: {settings.DATABASE_URL}")
     
     try:
         init_database()
-        create_sample_data()
+        if args.synthetic:
+            create_synthetic_data(args)
+        else:
+            create_sample_data()
         print("🎉 База данных успешно инициализирована!")
     except Exception as e:
         print(f"💥 Ошибка при инициализации базы данных: {e}")
@@ -1,6 +1,20 @@
-from fastapi import FastAPI
+import logging
+
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import dashboards, tables, shifts, crews, tg_scenarios, robots, transport, tasks, geojson_decoder
+from app.config import settings
+from app.services.metrics import MetricsMiddleware
+from app.routers import dashboards, tables, shifts, crews, tg_scenarios, robots, transport, tasks, geojson_decoder, search, imports, notifications, jobs, exports, bootstrap, sync
+
+# uvicorn настраивает только свои логгеры, поэтому обработчик для app.* ставим сами.
+# Не на корневой логгер: echo=True движка уже пишет SQL своим обработчиком, и он задвоился бы
+logger = logging.getLogger("app")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(settings.LOG_LEVEL)
 
 app = FastAPI(
     title="R&D Planner API",
@@ -13,7 +27,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Missing-Ids"],
 )
+if settings.PROFILING_ENABLED:
+    from app.services.profiling import ProfilingMiddleware
+    app.add_middleware(ProfilingMiddleware)
+# Добавлен последним — снаружи остальных middleware, поэтому меряет полное время запроса
+app.add_middleware(MetricsMiddleware, router=app.router)
 app.include_router(dashboards.router, prefix="/api/v1/dashboards", tags=["dashboards"])
 app.include_router(tables.router, prefix="/api/v1/tables", tags=["tables"])
 app.include_router(shifts.router, prefix="/api/v1/shifts", tags=["shifts"])
@@ -23,6 +43,36 @@ app.include_router(transport.router, prefix="/api/v1/transport", tags=["transpor
 app.include_router(tasks.router, prefix="/api/v1/tasks", tags=["tasks"])
 app.include_router(tg_scenarios.router, prefix="/api/v1/tg-scenarios", tags=["tg-scenarios"])
 app.include_router(geojson_decoder.router, prefix="/api/v1/geojson", tags=["geojson"])
+app.include_router(search.router, prefix="/api/v1/search", tags=["search"])
+app.include_router(imports.router, prefix="/api/v1/import", tags=["import"])
+app.include_router(notifications.router, prefix="/api/v1/notifications", tags=["notifications"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["jobs"])
+app.include_router(exports.router, prefix="/api/v1/exports", tags=["exports"])
+app.include_router(bootstrap.router, prefix="/api/v1/bootstrap", tags=["bootstrap"])
+app.include_router(sync.router, prefix="/api/v1/sync", tags=["sync"])
+
+@app.on_event("startup")
+async def load_reference_registry():
+    from app.database import SessionLocal
+    from app.services.registry import registry
+    db = SessionLocal()
+    try:
+        registry.load(db)
+    except Exception as e:
+        # Реестр загрузится лениво при первом обращении
+        logger.warning("Failed to preload reference registry: %s", e)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+async def start_invalidation_bus():
+    from app.services import invalidation
+    invalidation.start()
+
+@app.on_event("shutdown")
+async def stop_invalidation_bus():
+    from app.services import invalidation
+    invalidation.stop()
 
 @app.get("/")
 async def root():
@@ -32,6 +82,45 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    from app.services import metrics as prometheus
+    return Response(prometheus.render(), media_type=prometheus.CONTENT_TYPE_LATEST)
+
+if settings.PROFILING_ENABLED:
+    @app.get("/profiles", include_in_schema=False)
+    async def get_profiles():
+        from app.services import profiling
+        return profiling.list_profiles()
+
+    @app.get("/profiles/{profile_id}", include_in_schema=False)
+    async def get_profile(profile_id: str):
+        from app.services import profiling
+        path = profiling.profile_path(profile_id)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
+
+@app.get("/registry/stats")
+async def registry_stats():
+    from app.services.registry import registry
+    return registry.stats()
+
+@app.get("/cache/stats")
+async def cache_stats():
+    from app.services import cache
+    return cache.cache.get_stats()
+
+@app.get("/singleflight/stats")
+async def singleflight_stats():
+    from app.services.singleflight import flights
+    return flights.stats()
+
+@app.get("/invalidation/stats")
+async def invalidation_stats():
+    from app.services import invalidation
+    return invalidation.get_stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""Перестройка проекции tasks_enriched с нуля.
+
+Нужна после массовой загрузки задач в обход CRUD или ручных правок в БД:
+
+    python rebuild_projection.py
+"""
+import time
+
+from app.database import SessionLocal, engine
+from app.services import cache, task_projection
+
+if __name__ == "__main__":
+    engine.echo = False
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        rows = task_projection.rebuild(db)
+    except Exception as e:
+        print(f"💥 Ошибка перестройки проекции: {e}")
+        exit(1)
+    finally:
+        db.close()
+    # Закэшированные представления смен могли быть собраны из старой проекции
+    cache.invalidate(cache.TASKS, cache.SHIFTS)
+    print(f"✅ tasks_enriched: {rows} строк за {time.perf_counter() - started:.1f} с")
@@ -0,0 +1,230 @@
+"""Генератор синтетических данных продакшен-объёма.
+
+Строит команды, сотрудников, роботов, транспорт, смены за несколько лет и
+задачи с маршрутами GeoJSON и тикетами. Генерация детерминирована: один и тот
+же seed и те же объёмы дают одинаковые строки. Вставка идёт через Core
+пачками по chunk_size строк (executemany одного скомпилированного INSERT;
+драйвер MySQL отправляет пачку многострочными INSERT ... VALUES (...), (...)),
+а задачи генерируются и вставляются потоком, поэтому память не зависит от
+объёма.
+
+Запуск — через init_db.py:
+    python init_db.py --synthetic --employees 2000 --robots 500 --transports 300 --years 3 --tasks 500000
+"""
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterator, List
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.database_models import Crew, Employee, Robots, Shift, Task, TaskType, Transport
+from app.services import task_projection
+
+FIRSTNAMES = ["Данил", "Илья", "Анна", "Мария", "Олег", "Сергей", "Ольга", "Павел", "Ирина", "Никита",
+              "Алексей", "Екатерина", "Дмитрий", "Татьяна", "Михаил", "Юлия", "Артём", "Светлана"]
+LASTNAMES = ["Волков", "Воронов", "Смирнов", "Кузнецов", "Попов", "Соколов", "Морозов", "Лебедев",
+             "Козлов", "Новиков", "Павлов", "Семёнов", "Голубев", "Виноградов", "Богданов"]
+PATRONYMICS = ["Сергеевич", "Андреевич", "Игоревич", "Олегович", "Павлович", None]
+BODIES = ["Полевой инженер", "Оператор", "Водитель", "Тестировщик", "Старший инженер", "Руководитель группы"]
+CAR_MODELS = ["Citroen Berlingo", "Sollers Atlant", "Lada Largus", "Hyundai Solaris", "Kia Rio"]
+PLATE_LETTERS = "АВЕКМНОРСТУХ"
+TICKET_QUEUES = ["SDGLOGISTICS", "ROBOTS", "RND", "DELIVERY", "MAPPING"]
+# Доли типов задач: маршрутов и «ковров» заметно больше, чем демо и прочего
+TASK_TYPE_WEIGHTS = [(TaskType.ROUTE, 45), (TaskType.CARPET, 40), (TaskType.DEMO, 10), (TaskType.CUSTOM, 5)]
+# Центр, вокруг которого строятся маршруты (Москва)
+ORIGIN = (37.6173, 55.7558)
+
+
+@dataclass
+class Volumes:
+    crews: int = 50
+    employees: int = 2000
+    robots: int = 500
+    transports: int = 300
+    years: float = 3
+    shifts_per_day: int = 2
+    tasks: int = 500_000
+    start: date = date(2023, 1, 1)
+    seed: int = 42
+    chunk_size: int = 1000
+
+
+def _ticket(rng: random.Random) -> str:
+    return f"{rng.choice(TICKET_QUEUES)}-{rng.randint(1000, 999999)}"
+
+
+def route_geojson(rng: random.Random) -> Dict:
+    """Маршрут: LineString случайного блуждания и точки остановок с тикетами в описании"""
+    lon = ORIGIN[0] + rng.uniform(-0.3, 0.3)
+    lat = ORIGIN[1] + rng.uniform(-0.2, 0.2)
+    heading = rng.uniform(0, 2 * math.pi)
+    coordinates = []
+    for _ in range(rng.randint(10, 60)):
+        heading += rng.uniform(-0.6, 0.6)
+        step = rng.uniform(0.0005, 0.003)
+        lon += step * math.cos(heading)
+        lat += step * math.sin(heading) * 0.6
+        coordinates.append([round(lon, 6), round(lat, 6)])
+
+    features = [{
+        "type": "Feature",
+        "geometry": {"type": "LineString", "coordinates": coordinates},
+        "properties": {"name": f"Маршрут {rng.randint(1, 9999)}"},
+    }]
+    for point in rng.sample(coordinates, k=min(len(coordinates), rng.randint(1, 5))):
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": point},
+            "properties": {"name": "Остановка", "description": f"Проверка по {_ticket(rng)}"},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def _insert_rows(conn, model, rows: List[dict]) -> None:
+    """Вставка пачки через executemany скомпилированного один раз INSERT
+    (pymysql сам склеивает её в многострочные INSERT ... VALUES)"""
+    if rows:
+        conn.execute(insert(model.__table__), rows)
+
+
+def _chunks(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _ids(conn, column) -> List:
+    return list(conn.execute(select(column).order_by(column)).scalars())
+
+
+def _employees(rng: random.Random, volumes: Volumes, crew_ids: List[int]) -> Iterator[dict]:
+    for i in range(volumes.employees):
+        yield {
+            "firstname": rng.choice(FIRSTNAMES),
+            "lastname": rng.choice(LASTNAMES),
+            "patronymic": rng.choice(PATRONYMICS),
+            "tg": f"@user{i}",
+            "staff": f"user{i}",
+            "body": rng.choice(BODIES),
+            "drive": rng.random() < 0.6,
+            "parking": rng.random() < 0.3,
+            "telemedicine": rng.random() < 0.8,
+            "attorney": rng.random() < 0.2,
+            "acces_to_auto_vc": rng.random() < 0.4,
+            "crew": rng.choice(crew_ids) if crew_ids and rng.random() < 0.9 else None,
+        }
+
+
+def _transports(rng: random.Random, volumes: Volumes) -> Iterator[dict]:
+    for i in range(volumes.transports):
+        carsharing = rng.random() < 0.3
+        plate = f"{rng.choice(PLATE_LETTERS)}{rng.randint(0, 999):03d}{rng.choice(PLATE_LETTERS)}{rng.choice(PLATE_LETTERS)}{rng.choice([77, 97, 177, 777])}"
+        yield {
+            "name": "Каршеринг" if carsharing else f"Авто {i + 1}",
+            "model": rng.choice(CAR_MODELS),
+            "gov_number": plate,
+            "carsharing": carsharing,
+            "corporate": not carsharing,
+            "auto_vc": rng.random() < 0.1,
+            "has_blockers": rng.random() < 0.05,
+        }
+
+
+def _shifts(volumes: Volumes) -> Iterator[dict]:
+    hours = 24 // volumes.shifts_per_day
+    for d in range(round(volumes.years * 365)):
+        day = datetime.combine(volumes.start + timedelta(days=d), datetime.min.time())
+        for s in range(volumes.shifts_per_day):
+            time_start = day + timedelta(hours=8 + s * hours)
+            yield {"date": day, "time_start": time_start, "time_end": time_start + timedelta(hours=hours)}
+
+
+def _tasks(rng: random.Random, volumes: Volumes, shifts: List[tuple], employee_ids: List[int],
+           robot_names: List[int], transport_ids: List[int]) -> Iterator[dict]:
+    types = [t for t, _ in TASK_TYPE_WEIGHTS]
+    weights = [w for _, w in TASK_TYPE_WEIGHTS]
+    # Задачи распределяются по сменам поровну с остатком; порядок — по сменам,
+    # как в реальной базе, где задачи создаются к ближайшим сменам
+    per_shift, extra = divmod(volumes.tasks, len(shifts))
+    for index, (shift_id, shift_start, shift_end) in enumerate(shifts):
+        span = int((shift_end - shift_start).total_seconds() // 60)
+        for _ in range(per_shift + (1 if index < extra else 0)):
+            task_type = rng.choices(types, weights)[0]
+            offset = rng.randrange(0, max(span - 60, 1), 15)
+            time_start = shift_start + timedelta(minutes=offset)
+            time_end = min(time_start + timedelta(minutes=rng.randrange(60, 361, 30)), shift_end)
+            yield {
+                "shift_id": shift_id,
+                "executor": rng.choice(employee_ids),
+                "robot_name": rng.choice(robot_names) if robot_names and rng.random() < 0.9 else None,
+                "transport_id": rng.choice(transport_ids) if transport_ids and rng.random() < 0.7 else None,
+                "time_start": time_start,
+                "time_end": time_end,
+                "type": task_type,
+                "geojson": route_geojson(rng) if task_type == TaskType.ROUTE else None,
+                "geojson_filename": f"route_{rng.randint(1, 99999)}.geojson" if task_type == TaskType.ROUTE else None,
+                "tickets": [f"st.yandex-team.ru/{_ticket(rng)}" for _ in range(rng.randint(1, 3))],
+            }
+
+
+def generate(engine, volumes: Volumes, log: Callable[[str], None] = print) -> Dict[str, int]:
+    """Заполнить пустую базу; возвращает число вставленных строк по таблицам"""
+    with engine.connect() as conn:
+        if conn.execute(select(func.count(Employee.id))).scalar():
+            raise ValueError("База уже содержит сотрудников — генератор работает только с пустой базой")
+
+    rng = random.Random(volumes.seed)
+    counts: Dict[str, int] = {}
+
+    def stream(conn, name: str, model, rows: Iterator[dict]) -> None:
+        started = time.perf_counter()
+        total = 0
+        for chunk in _chunks(rows, volumes.chunk_size):
+            _insert_rows(conn, model, chunk)
+            total += len(chunk)
+            if total % (volumes.chunk_size * 50) == 0:
+                log(f"   {name}: {total}")
+        counts[name] = total
+        elapsed = time.perf_counter() - started
+        log(f"   {name}: {total} за {elapsed:.1f} с ({total / elapsed if elapsed else 0:.0f} строк/с)")
+
+    with engine.begin() as conn:
+        stream(conn, "crews", Crew, (
+            {"name": f"Команда {i + 1}", "description": None, "max_members": max(10, volumes.employees // max(volumes.crews, 1) * 2),
+             "member_count": 0, "owner_id": 1}
+            for i in range(volumes.crews)
+        ))
+        crew_ids = _ids(conn, Crew.id)
+        stream(conn, "employees", Employee, _employees(rng, volumes, crew_ids))
+        conn.execute(update(Crew).values(member_count=(
+            select(func.count(Employee.id)).where(Employee.crew == Crew.id).scalar_subquery()
+        )))
+        stream(conn, "robots", Robots, (
+            {"name": 100 + i, "series": 1 + i % 5, "has_blockers": rng.random() < 0.05} for i in range(volumes.robots)
+        ))
+        stream(conn, "transports", Transport, _transports(rng, volumes))
+        stream(conn, "shifts", Shift, _shifts(volumes))
+
+        employee_ids = _ids(conn, Employee.id)
+        robot_names = _ids(conn, Robots.name)
+        transport_ids = _ids(conn, Transport.id)
+        shifts = list(conn.execute(select(Shift.id, Shift.time_start, Shift.time_end).order_by(Shift.id)))
+        if not shifts or not employee_ids:
+            return counts
+        stream(conn, "tasks", Task, _tasks(rng, volumes, shifts, employee_ids, robot_names, transport_ids))
+
+    # Задачи вставлены в обход CRUD — проекция для чтения смен строится одним INSERT ... SELECT
+    started = time.perf_counter()
+    with Session(engine) as db:
+        counts["tasks_enriched"] = task_projection.rebuild(db)
+    log(f"   tasks_enriched: {counts['tasks_enriched']} за {time.perf_counter() - started:.1f} с")
+    return counts
@@ -0,0 +1,155 @@
+"""Общие фикстуры тестов: приложение на in-memory SQLite без внешних сервисов.
+
+Переменные окружения задаются до импорта app, потому что настройки и движок
+создаются при импорте.
+"""
+import os
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["CACHE_BACKEND"] = "off"
+os.environ["INVALIDATION_BUS"] = "off"
+os.environ["CELERY_TASK_ALWAYS_EAGER"] = "true"
+os.environ["PROFILING_ENABLED"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import Base, SessionLocal, engine
+from app.services import task_projection
+from app.models.database_models import (
+    Crew, Dashboard, Employee, Robots, Shift, Task, TaskType, Transport, TgScenario, UserTable
+)
+
+engine.echo = False
+
+DAY = datetime(2025, 10, 1)
+
+
+def reset_local_caches() -> None:
+    """Сбросить in-process кэши, чтобы каждое измерение начиналось в одинаковом состоянии"""
+    from app.services import archive, search_index, tg_matcher, widgets
+    from app.services.registry import registry
+    from app.services.singleflight import flights
+
+    registry.invalidate()
+    widgets.invalidate()
+    tg_matcher.invalidate()
+    search_index.index.clear()
+    flights.forget()
+    archive.invalidate()
+
+
+def populate(size: int) -> None:
+    """Набор данных, растущий с size: сущностей — size, задач — size на каждую из size смен.
+
+    Сотрудник 1 и смена 1 (на следующий день) ни на что не ссылаются — их
+    можно удалять; задачи и команды ссылаются на сотрудников и смены с id от 2.
+    """
+    db = SessionLocal()
+    try:
+        db.add_all([
+            Employee(firstname="Свободный", lastname="Сотрудник", tg="@spare"),
+            Shift(date=DAY + timedelta(days=1), time_start=DAY + timedelta(days=1, hours=8),
+                  time_end=DAY + timedelta(days=1, hours=20)),
+        ])
+        crews = [Crew(name=f"Команда {i}", max_members=size * 4, member_count=2, owner_id=1) for i in range(size)]
+        db.add_all(crews)
+        db.flush()
+        employees = [
+            Employee(firstname=f"Имя{i}", lastname=f"Фамилия{i}", tg=f"@user{i}", body="Оператор",
+                     drive=i % 2 == 0, parking=i % 3 == 0, crew=crews[i % size].id)
+            for i in range(size * 2)
+        ]
+        robots = [Robots(name=100 + i, series=1 + i % 3) for i in range(size)]
+        transports = [Transport(name=f"Авто {i}", gov_number=f"А{i:03d}БВ77", corporate=True) for i in range(size)]
+        shifts = [
+            Shift(date=DAY, time_start=DAY + timedelta(hours=i), time_end=DAY + timedelta(hours=i + 8))
+            for i in range(size)
+        ]
+        db.add_all(employees + robots + transports + shifts)
+        db.flush()
+
+        types = list(TaskType)
+        for s, shift in enumerate(shifts):
+            for i in range(size):
+                task_type = types[(s + i) % len(types)]
+                db.add(Task(
+                    shift_id=shift.id,
+                    executor=employees[(s * size + i) % len(employees)].id,
+                    robot_name=robots[i % size].name,
+                    transport_id=transports[(s + i) % size].id,
+                    time_start=shift.time_start + timedelta(minutes=10 * i),
+                    time_end=shift.time_start + timedelta(hours=2, minutes=10 * i),
+                    type=task_type,
+                    geojson={"type": "FeatureCollection", "features": []} if task_type == TaskType.ROUTE else None,
+                    tickets=[f"st.yandex-team.ru/RND-{s * size + i + 1}"],
+                ))
+
+        db.add_all([
+            TgScenario(name=f"Сценарий {i}", trigger_keywords=[f"робот{i}", "смена"],
+                       message_template="Привет, {firstname}! Задач: {task_count}", status="active", owner_id=1)
+            for i in range(size)
+        ])
+        db.add(Dashboard(
+            name="Операции", dashboard_type="analytics", owner_id=1,
+            widgets=[
+                {"id": t, "type": t, "title": t, "days": 30}
+                for t in ("tasks_per_type_per_day", "robot_hours", "transport_usage", "executor_load")
+            ],
+        ))
+        db.add(UserTable(
+            name="Задачи", table_type="project_data", owner_id=1, source="tasks",
+            columns=["id", "type", "time_start", "executor_name", "transport_name"],
+            filters=[], sort=[{"column": "time_start", "desc": False}],
+        ))
+        db.commit()
+        task_projection.rebuild(db)
+    finally:
+        db.close()
+
+
+def _fresh_database(size: int) -> None:
+    """Пересоздать схему, заполнить набором размера size и сбросить кэши"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    populate(size)
+    reset_local_caches()
+
+
+@pytest.fixture(scope="session")
+def client():
+    import main
+    Base.metadata.create_all(bind=engine)
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@contextmanager
+def _count_queries():
+    """Собрать SQL-инструкции, выполненные внутри блока"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def fresh_database():
+    """fresh_database(size) — пересоздать базу с набором данных размера size"""
+    yield _fresh_database
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def count_queries():
+    """with count_queries() as statements: ... — SQL, выполненный внутри блока"""
+    return _count_queries
@@ -0,0 +1,87 @@
+"""Архив смен и задач: перенос пачками и чтение архивных строк через обычные ручки."""
+from datetime import timedelta
+
+from app.database import SessionLocal
+from app.models.database_models import Shift, ShiftArchive, Task, TaskArchive, Tombstone
+from app.services import archive
+
+from conftest import DAY
+
+
+def _archive(cutoff, batch_size=2) -> dict:
+    db = SessionLocal()
+    try:
+        return archive.archive_before(db, cutoff, batch_size=batch_size, log=lambda message: None)
+    finally:
+        db.close()
+
+
+def _counts() -> dict:
+    db = SessionLocal()
+    try:
+        return {model.__tablename__: db.query(model).count() for model in (Shift, Task, ShiftArchive, TaskArchive)}
+    finally:
+        db.close()
+
+
+def test_archive_moves_old_shifts_with_tasks(client, fresh_database):
+    fresh_database(3)
+    cutoff = DAY + timedelta(days=1)
+    db = SessionLocal()
+    try:
+        assert archive.pending(db, cutoff) == {"cutoff": cutoff, "shifts": 3, "tasks": 9}
+    finally:
+        db.close()
+
+    assert _archive(cutoff) == {"cutoff": cutoff, "shifts": 3, "tasks": 9}
+    # В горячих таблицах осталась только смена следующего дня
+    assert _counts() == {"shifts": 1, "tasks": 0, "shifts_archive": 3, "tasks_archive": 9}
+    # Перенос в архив — не удаление: клиенты синхронизации ничего не теряют
+    db = SessionLocal()
+    try:
+        assert db.query(Tombstone).count() == 0
+    finally:
+        db.close()
+
+    # Повторный запуск ничего не переносит
+    assert _archive(cutoff)["shifts"] == 0
+
+
+def test_archived_rows_are_still_readable(client, fresh_database):
+    fresh_database(3)
+    before = client.get(f"/api/v1/shifts/date/{DAY.isoformat()}").json()
+    task = client.get("/api/v1/tasks/1").json()
+
+    _archive(DAY + timedelta(days=1))
+
+    # Архивные строки только читаются, версии у них нет
+    archived = client.get("/api/v1/tasks/1").json()
+    assert archived.pop("version") is None
+    assert archived == {key: value for key, value in task.items() if key != "version"}
+    assert client.put("/api/v1/tasks/1", json={"type": "demo"}).status_code == 404
+
+    shift = client.get("/api/v1/shifts/2")
+    assert shift.status_code == 200
+    assert [t["id"] for t in shift.json()["tasks"]] == [t["id"] for t in before[0]["tasks"]]
+    assert [t["id"] for t in client.get("/api/v1/tasks/shift/2").json()] == [t["id"] for t in before[0]["tasks"]]
+
+    day = client.get(f"/api/v1/shifts/date/{DAY.isoformat()}").json()
+    assert [(s["id"], [t["id"] for t in s["tasks"]]) for s in day] == \
+        [(s["id"], [t["id"] for t in s["tasks"]]) for s in before]
+
+    tasks = client.get("/api/v1/tasks/date-range/", params={
+        "start_date": DAY.isoformat(), "end_date": (DAY + timedelta(days=1)).isoformat()
+    }).json()
+    assert sorted(t["id"] for t in tasks) == list(range(1, 10))
+
+
+def test_ranges_after_watermark_skip_archive(client, fresh_database, count_queries):
+    fresh_database(2)
+    _archive(DAY + timedelta(days=1))
+    start = DAY + timedelta(days=1)
+
+    with count_queries() as statements:
+        client.get("/api/v1/shifts/date-range/", params={
+            "start_date": start.isoformat(), "end_date": (start + timedelta(days=1)).isoformat()
+        })
+    assert not [s for s in statements if "shifts_archive" in s]
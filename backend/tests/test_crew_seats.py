@@ -0,0 +1,168 @@
+"""Вместимость команд: 409 при заполненной команде, счётчик под параллельной нагрузкой, примеры init_db."""
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import crew_crud
+from app.database import Base, SessionLocal
+from app.models.database_models import Crew, Employee
+
+
+def _crew(max_members: int) -> int:
+    db = SessionLocal()
+    try:
+        crew = Crew(name="Маленькая", max_members=max_members, member_count=0, owner_id=1)
+        db.add(crew)
+        db.commit()
+        return crew.id
+    finally:
+        db.close()
+
+
+def _member_count(crew_id: int) -> int:
+    db = SessionLocal()
+    try:
+        return db.query(Crew.member_count).filter(Crew.id == crew_id).scalar()
+    finally:
+        db.close()
+
+
+def _free_employees(count: int) -> list:
+    db = SessionLocal()
+    try:
+        employees = [Employee(firstname=f"Новый{i}", lastname="Сотрудник") for i in range(count)]
+        db.add_all(employees)
+        db.commit()
+        return [employee.id for employee in employees]
+    finally:
+        db.close()
+
+
+def test_assign_members_over_capacity_is_409_and_moves_nobody(client, fresh_database):
+    fresh_database(3)
+    crew_id = _crew(2)
+    ids = _free_employees(3)
+
+    response = client.post(f"/api/v1/crews/crews/{crew_id}/members", json={"employee_ids": ids})
+    assert response.status_code == 409
+    assert _member_count(crew_id) == 0
+
+    response = client.post(f"/api/v1/crews/crews/{crew_id}/members", json={"employee_ids": ids[:2]})
+    assert response.status_code == 200
+    assert response.json()["moved"] == ids[:2]
+    assert _member_count(crew_id) == 2
+
+    response = client.post("/api/v1/crews/employees", json={"firstname": "Лишний", "lastname": "Сотрудник", "crew": crew_id})
+    assert response.status_code == 409
+
+    response = client.post("/api/v1/crews/crews/members/unassign", json={"employee_ids": ids[:1]})
+    assert response.status_code == 200
+    assert _member_count(crew_id) == 1
+
+
+@pytest.fixture
+def file_sessions(tmp_path):
+    """Сессии к файловой SQLite: у in-memory базы тестов одно соединение на всех"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'seats.db'}", connect_args={"check_same_thread": False, "timeout": 30}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def _run_parallel(count: int, work) -> None:
+    start = threading.Barrier(count)
+    threads = [threading.Thread(target=lambda i=i: (start.wait(), work(i))) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_concurrent_reserve_never_overfills(file_sessions):
+    db = file_sessions()
+    crew = Crew(name="Гонка", max_members=5, member_count=0, owner_id=1)
+    db.add(crew)
+    db.commit()
+    crew_id = crew.id
+    db.close()
+
+    reserved, rejected = [], []
+
+    def reserve(i):
+        session = file_sessions()
+        try:
+            crew_crud.reserve_seats(session, crew_id)
+            session.commit()
+            reserved.append(i)
+        except crew_crud.CrewCapacityError:
+            session.rollback()
+            rejected.append(i)
+        finally:
+            session.close()
+
+    _run_parallel(12, reserve)
+
+    db = file_sessions()
+    assert db.query(Crew.member_count).filter(Crew.id == crew_id).scalar() == 5
+    db.close()
+    assert len(reserved) == 5
+    assert len(rejected) == 7
+
+
+def test_concurrent_reserve_and_release_keep_counter_exact(file_sessions):
+    db = file_sessions()
+    # Запаса хватает на любые чередования: освобождения не упираются в ноль
+    crew = Crew(name="Туда-обратно", max_members=100, member_count=20, owner_id=1)
+    db.add(crew)
+    db.commit()
+    crew_id = crew.id
+    db.close()
+
+    def churn(i):
+        session = file_sessions()
+        try:
+            for _ in range(5):
+                if i % 2:
+                    crew_crud.reserve_seats(session, crew_id)
+                else:
+                    crew_crud.release_seats(session, crew_id)
+                session.commit()
+        finally:
+            session.close()
+
+    _run_parallel(8, churn)
+
+    db = file_sessions()
+    # Четыре потока заняли по 5 мест, четыре — освободили по 5
+    assert db.query(Crew.member_count).filter(Crew.id == crew_id).scalar() == 20
+    db.close()
+
+
+def test_release_never_goes_below_zero(file_sessions):
+    db = file_sessions()
+    crew = Crew(name="Пустая", max_members=3, member_count=1, owner_id=1)
+    db.add(crew)
+    db.commit()
+    crew_crud.release_seats(db, crew.id, 2)
+    db.commit()
+    assert db.query(Crew.member_count).filter(Crew.id == crew.id).scalar() == 1
+    db.close()
+
+
+def test_sample_data_counts_crew_members(fresh_database):
+    import init_db
+
+    Base.metadata.create_all(bind=init_db.engine)
+    init_db.create_sample_data()
+    db = SessionLocal()
+    try:
+        for crew in db.query(Crew).all():
+            members = db.query(Employee).filter(Employee.crew == crew.id).count()
+            assert crew.member_count == members
+        assert sorted(crew.member_count for crew in db.query(Crew).all()) == [0, 2]
+    finally:
+        db.close()
@@ -0,0 +1,66 @@
+"""Выборка по списку id (?ids=): порядок, повторы, X-Missing-Ids и ошибки разбора."""
+from datetime import timedelta
+
+import pytest
+
+from app.crud import multiget
+from app.database import SessionLocal
+from app.services import archive
+
+from conftest import DAY
+
+ENDPOINTS = [
+    "/api/v1/crews/employees",
+    "/api/v1/robots/",
+    "/api/v1/transport/",
+    "/api/v1/shifts/",
+    "/api/v1/tasks/",
+]
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_found_in_request_order_and_missing_in_header(client, fresh_database, count_queries, path):
+    fresh_database(3)
+    with count_queries() as statements:
+        response = client.get(path, params={"ids": "3,999,1,3,998"})
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == [3, 1]
+    assert response.headers[multiget.MISSING_HEADER] == "999,998"
+    # Одна выборка по IN, а не запрос на каждую карточку
+    assert len([s for s in statements if " IN (" in s]) <= 2
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_no_header_when_everything_is_found(client, fresh_database, path):
+    fresh_database(3)
+    response = client.get(path, params={"ids": "2"})
+    assert [item["id"] for item in response.json()] == [2]
+    assert multiget.MISSING_HEADER not in response.headers
+
+
+@pytest.mark.parametrize("ids", ["", "1,a", ",".join(str(i) for i in range(1, multiget.MAX_IDS + 2))])
+def test_bad_ids_are_400(client, fresh_database, ids):
+    fresh_database(1)
+    assert client.get("/api/v1/tasks/", params={"ids": ids}).status_code == 400
+
+
+def test_header_is_exposed_to_browsers(client, fresh_database):
+    fresh_database(1)
+    response = client.get("/api/v1/tasks/", params={"ids": "1,999"}, headers={"Origin": "http://planner.local"})
+    assert multiget.MISSING_HEADER in response.headers["access-control-expose-headers"]
+
+
+def test_archived_rows_are_found(client, fresh_database):
+    fresh_database(2)
+    db = SessionLocal()
+    try:
+        archive.archive_before(db, DAY + timedelta(days=1), log=lambda message: None)
+    finally:
+        db.close()
+
+    response = client.get("/api/v1/tasks/", params={"ids": "4,1,999"})
+    assert [task["id"] for task in response.json()] == [4, 1]
+    assert response.headers[multiget.MISSING_HEADER] == "999"
+    response = client.get("/api/v1/shifts/", params={"ids": "1,2"})
+    assert [shift["id"] for shift in response.json()] == [1, 2]
+    assert multiget.MISSING_HEADER not in response.headers
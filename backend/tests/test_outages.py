@@ -0,0 +1,56 @@
+"""Лог сбоев внешних сервисов: начало сбоя — один раз, повторы — не чаще интервала."""
+import logging
+import socket
+import time
+
+from app.services import invalidation
+from app.services.outages import OutageLog
+
+logger = logging.getLogger("tests.outages")
+
+
+def _messages(caplog):
+    return [record.getMessage() for record in caplog.records if record.name == logger.name]
+
+
+def test_outage_is_logged_once_per_interval(caplog):
+    caplog.set_level(logging.INFO, logger=logger.name)
+    outage = OutageLog(logger, "Broker", interval=0.2)
+
+    for _ in range(50):
+        outage.failed(ConnectionError("refused"))
+    assert _messages(caplog) == ["Broker unavailable: refused"]
+
+    time.sleep(0.25)
+    outage.failed(ConnectionError("refused"))
+    assert _messages(caplog)[-1].startswith("Broker still unavailable after")
+    assert "(51 failed attempts)" in _messages(caplog)[-1]
+
+    outage.recovered()
+    outage.recovered()
+    assert len(_messages(caplog)) == 3
+    assert _messages(caplog)[-1].startswith("Broker is back after")
+    assert not outage.down
+
+
+def _closed_port() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return "127.0.0.1:%d" % sock.getsockname()[1]
+
+
+def test_bus_reconnects_quietly(caplog, monkeypatch):
+    caplog.set_level(logging.INFO, logger=invalidation.logger.name)
+    monkeypatch.setattr(invalidation, "RECONNECT_DELAY", 0.01)
+    bus = invalidation.SocketBus(_closed_port())
+    bus.start()
+    try:
+        time.sleep(0.3)
+    finally:
+        bus.stop()
+        invalidation.broker_outage.recovered()
+
+    warnings = [r for r in caplog.records if r.name == invalidation.logger.name and r.levelno == logging.WARNING]
+    assert invalidation.stats["errors"] > 5
+    assert len(warnings) == 1
+    assert warnings[0].getMessage().startswith("Invalidation broker unavailable")
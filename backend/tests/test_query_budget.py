@@ -0,0 +1,202 @@
+"""Бюджет SQL-запросов на ручку.
+
+Каждая ручка вызывается через TestClient на двух наборах данных — маленьком
+и в несколько раз большем (задач — квадратично больше). Число выполненных SQL
+инструкций не должно расти вместе с данными: N+1 (запрос на задачу, на смену,
+на сотрудника) сразу даёт разницу. Для ручек, где рост ожидаем, в Case
+задаётся budget — верхняя граница для обоих размеров.
+
+Перед каждым измерением база пересоздаётся, а in-process кэши (реестр,
+виджеты, поиск, TG-матчер) сбрасываются, так что сравниваются одинаковые
+холодные пути. Новая ручка без Case (или записи в UNBUDGETED) роняет
+test_every_route_has_a_budget.
+"""
+import io
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+import pytest
+from fastapi.routing import APIRoute
+
+from app.services import sync
+
+SMALL = 3
+LARGE = 12
+
+API = "/api/v1"
+
+
+@dataclass
+class Case:
+    method: str
+    route: str
+    path: Optional[str] = None
+    json: Any = None
+    params: Dict[str, Any] = field(default_factory=dict)
+    # files(size) — тело multipart-запроса, может зависеть от размера набора
+    files: Optional[Callable[[int], dict]] = None
+    budget: Optional[int] = None
+
+    @property
+    def id(self) -> str:
+        return f"{self.method} {self.path or self.route}"
+
+
+def _employees_csv(size: int) -> dict:
+    rows = "\n".join(f"Имя{i},Фамилия{i},@import{i},1" for i in range(size))
+    return {"file": ("employees.csv", io.BytesIO(f"firstname,lastname,tg,crew\n{rows}\n".encode()), "text/csv")}
+
+
+TASK = {
+    "shift_id": 2, "executor": 2, "robot_name": 100, "transport_id": 1,
+    "time_start": "2025-10-01T09:00:00", "time_end": "2025-10-01T11:00:00",
+    "type": "carpet", "tickets": ["st.yandex-team.ru/RND-1"],
+}
+EMPLOYEE = {"firstname": "Анна", "lastname": "Смирнова", "tg": "@anna", "crew": 1}
+DAY_RANGE = {"start_date": "2025-10-01T00:00:00", "end_date": "2025-10-02T00:00:00"}
+# Токен часовой давности: набор создаётся заново перед каждым измерением, все строки — изменения
+SYNC_SINCE = sync.encode_token(datetime.utcnow() - timedelta(hours=1))
+
+CASES = [
+    # смены
+    Case("GET", "/shifts/test"),
+    Case("GET", "/shifts/"),
+    Case("GET", "/shifts/", params={"ids": "3,2,999"}),
+    Case("GET", "/shifts/{shift_id}", "/shifts/2"),
+    Case("POST", "/shifts/", json={"date": "2025-10-02T00:00:00", "time_start": "2025-10-02T08:00:00", "time_end": "2025-10-02T20:00:00"}),
+    Case("PUT", "/shifts/{shift_id}", "/shifts/2", json={"time_end": "2025-10-01T21:00:00"}),
+    Case("DELETE", "/shifts/{shift_id}", "/shifts/1"),
+    Case("GET", "/shifts/date/{date}", "/shifts/date/2025-10-01T00:00:00"),
+    Case("GET", "/shifts/date-range/", params=DAY_RANGE),
+    Case("GET", "/shifts/active/"),
+    # задачи
+    Case("GET", "/tasks/"),
+    Case("GET", "/tasks/", params={"ids": "3,1,999"}),
+    Case("GET", "/tasks/{task_id}", "/tasks/1"),
+    Case("POST", "/tasks/", json=TASK),
+    Case("PUT", "/tasks/{task_id}", "/tasks/1", json={"executor": 3, "tickets": ["st.yandex-team.ru/RND-2"]}),
+    Case("DELETE", "/tasks/{task_id}", "/tasks/1"),
+    Case("GET", "/tasks/shift/{shift_id}", "/tasks/shift/2"),
+    Case("GET", "/tasks/executor/{executor_id}", "/tasks/executor/2"),
+    Case("GET", "/tasks/robot/{robot_name}", "/tasks/robot/100"),
+    Case("GET", "/tasks/transport/{transport_id}", "/tasks/transport/1"),
+    Case("GET", "/tasks/type/{task_type}", "/tasks/type/carpet"),
+    Case("GET", "/tasks/active/"),
+    Case("GET", "/tasks/date-range/", params=DAY_RANGE),
+    # сотрудники и команды
+    Case("GET", "/crews/employees"),
+    Case("GET", "/crews/employees", params={"drive": True, "crew_id": 1}),
+    Case("GET", "/crews/employees", params={"ids": "3,2,999"}),
+    Case("GET", "/crews/employees/bodies"),
+    Case("GET", "/crews/employees/crews"),
+    Case("GET", "/crews/employees/{employee_id}", "/crews/employees/2"),
+    Case("POST", "/crews/employees", json=EMPLOYEE),
+    Case("PUT", "/crews/employees/{employee_id}", "/crews/employees/2", json={"crew": 2}),
+    Case("DELETE", "/crews/employees/{employee_id}", "/crews/employees/1"),
+    Case("GET", "/crews/crews"),
+    Case("GET", "/crews/crews/roster"),
+    Case("GET", "/crews/crews/roster", params={"include_members": True}),
+    # По одному UPDATE счётчика на каждую исходную команду: зависит от запроса, а не от объёма данных
+    Case("POST", "/crews/crews/{crew_id}/members", "/crews/crews/1/members", json={"employee_ids": [2, 3, 4]}, budget=8),
+    Case("POST", "/crews/crews/members/unassign", json={"employee_ids": [2, 3, 4]}),
+    Case("POST", "/crews/crews", json={"name": "Новая команда", "max_members": 5}),
+    # роботы и транспорт
+    Case("GET", "/robots/"),
+    Case("GET", "/robots/", params={"ids": "2,1,999"}),
+    Case("GET", "/robots/{robot_id}", "/robots/1"),
+    Case("POST", "/robots/", json={"name": 999, "series": 2}),
+    Case("PUT", "/robots/{robot_id}", "/robots/1", json={"has_blockers": True}),
+    Case("DELETE", "/robots/{robot_id}", "/robots/1"),
+    Case("GET", "/transport/"),
+    Case("GET", "/transport/", params={"ids": "2,1,999"}),
+    Case("GET", "/transport/{transport_id}", "/transport/1"),
+    Case("POST", "/transport/", json={"name": "Каршеринг", "carsharing": True}),
+    Case("PUT", "/transport/{transport_id}", "/transport/1", json={"has_blockers": True}),
+    Case("DELETE", "/transport/{transport_id}", "/transport/1"),
+    # дашборды и таблицы
+    Case("GET", "/dashboards/"),
+    Case("GET", "/dashboards/{dashboard_id}", "/dashboards/1"),
+    Case("GET", "/dashboards/{dashboard_id}/data", "/dashboards/1/data",
+         params={"date_from": "2025-09-01T00:00:00", "date_to": "2025-10-31T00:00:00"}),
+    Case("POST", "/dashboards/", json={"name": "Новый", "dashboard_type": "research"}),
+    Case("PUT", "/dashboards/{dashboard_id}", "/dashboards/1", json={"name": "Переименован"}),
+    Case("DELETE", "/dashboards/{dashboard_id}", "/dashboards/1"),
+    Case("GET", "/tables/"),
+    Case("GET", "/tables/{table_id}", "/tables/1"),
+    Case("GET", "/tables/{table_id}/rows", "/tables/1/rows"),
+    Case("POST", "/tables/", json={"name": "Смены", "table_type": "team_data", "columns": ["id", "date"], "source": "shifts"}),
+    Case("PUT", "/tables/{table_id}", "/tables/1", json={"name": "Переименована"}),
+    Case("DELETE", "/tables/{table_id}", "/tables/1"),
+    # TG сценарии и рассылки
+    Case("GET", "/tg-scenarios/"),
+    Case("POST", "/tg-scenarios/match", json={"text": "робот1 на смене"}),
+    Case("POST", "/tg-scenarios/match/batch", json={"messages": ["робот1", "смена", "ничего"]}),
+    Case("GET", "/tg-scenarios/{scenario_id}", "/tg-scenarios/1"),
+    Case("POST", "/tg-scenarios/", json={"name": "Новый", "trigger_keywords": ["привет"], "message_template": "Привет"}),
+    Case("PUT", "/tg-scenarios/{scenario_id}", "/tg-scenarios/1", json={"name": "Переименован"}),
+    Case("DELETE", "/tg-scenarios/{scenario_id}", "/tg-scenarios/1"),
+    Case("GET", "/tg-scenarios/status/{status}", "/tg-scenarios/status/active"),
+    Case("POST", "/tg-scenarios/{scenario_id}/activate", "/tg-scenarios/1/activate"),
+    Case("POST", "/tg-scenarios/{scenario_id}/deactivate", "/tg-scenarios/1/deactivate"),
+    Case("POST", "/notifications/shift-day", json={"date": "2025-10-01T00:00:00", "scenario_id": 1, "dry_run": True}),
+    # поиск, импорт, GeoJSON, фоновые задачи
+    Case("GET", "/search/", params={"q": "Фамил"}),
+    Case("POST", "/search/reindex"),
+    Case("POST", "/import/{entity}", "/import/employees", files=_employees_csv),
+    Case("POST", "/geojson/decode", json={"geojson": {"type": "FeatureCollection", "features": [{"properties": {"name": "RND-1"}}]}}),
+    Case("POST", "/jobs/geojson/decode", json={"geojson": {"name": "RND-1"}}),
+    Case("POST", "/jobs/exports/{entity}", "/jobs/exports/tasks"),
+    Case("GET", "/exports/tasks"),
+    Case("GET", "/exports/tasks", params={"format": "arrow", **DAY_RANGE}),
+    # снимок для старта интерфейса
+    Case("GET", "/bootstrap/", params={"date": "2025-10-01T00:00:00"}),
+    # инкрементальная синхронизация
+    Case("GET", "/sync/"),
+    Case("GET", "/sync/", params={"since": SYNC_SINCE}),
+]
+
+# Ручки без бюджета: состояние процесса, а не запросы к БД по данным
+UNBUDGETED = {
+    ("GET", "/api/v1/notifications/{run_id}"): "статус рассылки из result backend Celery",
+    ("GET", "/api/v1/jobs/{job_id}"): "статус из result backend Celery",
+    ("GET", "/api/v1/jobs/{job_id}/download"): "файл выгрузки",
+    ("DELETE", "/api/v1/jobs/{job_id}"): "отмена задачи через брокер",
+}
+
+
+def _measure(client, fresh_database, count_queries, case: Case, size: int):
+    fresh_database(size)
+    files = case.files(size) if case.files else None
+    with count_queries() as statements:
+        response = client.request(
+            case.method, API + (case.path or case.route), json=case.json, params=case.params, files=files
+        )
+    assert response.status_code < 400, f"{case.id} -> {response.status_code}: {response.text}"
+    return statements
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda case: case.id)
+def test_query_count_does_not_grow_with_data(client, fresh_database, count_queries, case):
+    small = _measure(client, fresh_database, count_queries, case, SMALL)
+    large = _measure(client, fresh_database, count_queries, case, LARGE)
+
+    if case.budget is not None:
+        assert len(large) <= case.budget, f"{case.id}: {len(large)} statements, budget {case.budget}:\n" + "\n".join(large)
+        assert len(small) <= case.budget
+    else:
+        assert len(large) <= len(small), (
+            f"{case.id}: {len(small)} statements with {SMALL}x data, {len(large)} with {LARGE}x:\n" + "\n".join(large)
+        )
+
+
+def test_every_route_has_a_budget(client):
+    covered = {(case.method, API + case.route) for case in CASES}
+    missing = [
+        f"{method} {route.path}"
+        for route in client.app.routes
+        if isinstance(route, APIRoute) and route.path.startswith(API)
+        for method in route.methods
+        if (method, route.path) not in covered and (method, route.path) not in UNBUDGETED
+    ]
+    assert not missing, "Ручки без Case в CASES: " + ", ".join(sorted(missing))
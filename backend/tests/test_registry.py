@@ -0,0 +1,51 @@
+"""Реестр справочников: строки, записанные в обход хуков, дочитываются из БД."""
+from app.database import SessionLocal
+from app.models.database_models import Robots
+from app.services.registry import registry
+
+
+def _insert_robot(name: int, series: int) -> int:
+    # Сессия без CRUD-функций — как запись из другого процесса или скрипта
+    db = SessionLocal()
+    try:
+        robot = Robots(name=name, series=series)
+        db.add(robot)
+        db.commit()
+        return robot.id
+    finally:
+        db.close()
+
+
+def test_series_written_past_hooks_is_read_from_db(client, fresh_database, count_queries):
+    fresh_database(3)
+    registry.load(SessionLocal())
+    robot_id = _insert_robot(900, 42)
+
+    response = client.get("/api/v1/robots/", params={"series": 42})
+    assert [robot["id"] for robot in response.json()] == [robot_id]
+
+    # Дочитанная серия теперь в реестре
+    with count_queries() as statements:
+        assert [robot["id"] for robot in client.get("/api/v1/robots/", params={"series": 42}).json()] == [robot_id]
+    assert not [s for s in statements if "robots" in s]
+
+
+def test_missing_series_is_remembered(client, fresh_database, count_queries):
+    fresh_database(3)
+    assert client.get("/api/v1/robots/", params={"series": 77}).json() == []
+    with count_queries() as statements:
+        assert client.get("/api/v1/robots/", params={"series": 77}).json() == []
+    assert not [s for s in statements if "robots" in s]
+
+    robot = client.post("/api/v1/robots/", json={"name": 901, "series": 77}).json()
+    assert [r["id"] for r in client.get("/api/v1/robots/", params={"series": 77}).json()] == [robot["id"]]
+
+
+def test_series_with_deleted_robot_is_reread(client, fresh_database):
+    fresh_database(3)
+    series = client.get("/api/v1/robots/", params={"series": 1}).json()
+    assert series
+    # Индекс серии ссылается на робота, снимка которого уже нет
+    with registry._lock:
+        registry.robots.pop(series[0]["id"])
+    assert client.get("/api/v1/robots/", params={"series": 1}).json() == series
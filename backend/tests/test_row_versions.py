@@ -0,0 +1,61 @@
+"""Версии строк: ETag, If-Match → 412 и запись без RETURNING (как на MySQL)."""
+import pytest
+
+from app.database import engine
+
+
+@pytest.fixture(params=["returning", "fallback"])
+def dialect(request, monkeypatch):
+    if request.param == "fallback":
+        monkeypatch.setattr(engine.dialect, "update_returning", False)
+        monkeypatch.setattr(engine.dialect, "delete_returning", False)
+    return request.param
+
+
+def test_if_match_on_update(client, fresh_database, dialect):
+    fresh_database(2)
+    response = client.get("/api/v1/tasks/1")
+    assert response.headers["ETag"] == '"1"'
+
+    response = client.put("/api/v1/tasks/1", json={"type": "demo"}, headers={"If-Match": '"1"'})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+    assert (response.json()["type"], response.json()["version"]) == ("demo", 2)
+
+    # Клиент с устаревшей версией получает 412 и не затирает чужую правку
+    response = client.put("/api/v1/tasks/1", json={"type": "carpet"}, headers={"If-Match": 'W/"1"'})
+    assert response.status_code == 412
+    assert "версия 2" in response.json()["detail"]
+    assert client.get("/api/v1/tasks/1").json()["type"] == "demo"
+
+    # Без If-Match и с * — последняя запись побеждает
+    assert client.put("/api/v1/tasks/1", json={"type": "carpet"}).headers["ETag"] == '"3"'
+    assert client.put("/api/v1/tasks/1", json={"type": "route"}, headers={"If-Match": "*"}).headers["ETag"] == '"4"'
+
+    assert client.put("/api/v1/tasks/1", json={"type": "demo"}, headers={"If-Match": "abc"}).status_code == 400
+    assert client.put("/api/v1/tasks/999", json={"type": "demo"}, headers={"If-Match": '"1"'}).status_code == 404
+
+
+def test_if_match_on_delete(client, fresh_database, dialect):
+    fresh_database(2)
+    client.put("/api/v1/tasks/1", json={"type": "demo"})
+
+    assert client.delete("/api/v1/tasks/1", headers={"If-Match": '"1"'}).status_code == 412
+    assert client.get("/api/v1/tasks/1").status_code == 200
+    assert client.delete("/api/v1/tasks/1", headers={"If-Match": '"2"'}).status_code == 200
+    assert client.get("/api/v1/tasks/1").status_code == 404
+    assert client.delete("/api/v1/tasks/1", headers={"If-Match": '"2"'}).status_code == 404
+
+
+def test_shift_versions(client, fresh_database, dialect):
+    fresh_database(2)
+    shift = client.get("/api/v1/shifts/2")
+    assert shift.headers["ETag"] == '"1"'
+
+    response = client.put("/api/v1/shifts/2", json={"time_end": "2025-10-01T09:00:00"}, headers={"If-Match": '"1"'})
+    assert response.status_code == 200
+    assert response.json()["time_end"] == "2025-10-01T09:00:00"
+    assert response.json()["updated_at"] is not None
+
+    response = client.put("/api/v1/shifts/2", json={"time_end": "2025-10-01T10:00:00"}, headers={"If-Match": '"1"'})
+    assert response.status_code == 412
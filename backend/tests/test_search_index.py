@@ -0,0 +1,117 @@
+"""Поисковый индекс: ранжирование, префикс, подстрока, фильтр по виду, AND и перестроение."""
+from types import SimpleNamespace
+
+from app.services import search_index
+from app.services.search_index import SearchIndex
+
+
+def _employee(employee_id, firstname, lastname, tg=None, body=None):
+    return search_index.employee_document(SimpleNamespace(
+        id=employee_id, firstname=firstname, lastname=lastname, patronymic=None, tg=tg, staff=None, body=body
+    ))
+
+
+def _transport(transport_id, name, gov_number):
+    return search_index.transport_document(
+        SimpleNamespace(id=transport_id, name=name, model=None, gov_number=gov_number)
+    )
+
+
+def _index(*docs) -> SearchIndex:
+    index = SearchIndex()
+    index._load(docs)
+    index.loaded = True
+    return index
+
+
+def _hits(index, query, **kwargs):
+    return [(hit["kind"], hit["id"]) for hit in index.search(query, **kwargs)]
+
+
+def test_exact_token_ranks_above_prefix_and_substring():
+    index = _index(
+        _employee(1, "Иван", "Петров"),
+        _employee(2, "Иванна", "Смирнова"),
+        _transport(3, "Диван", "А001ВС77"),
+    )
+    hits = index.search("иван")
+    assert [(hit["id"], hit["score"]) for hit in hits] == [(1, 3), (2, 2), (3, 1)]
+
+
+def test_ties_are_ordered_by_title_and_limit_keeps_top():
+    index = _index(*[_employee(i, f"Имя{i:02d}", "Петров") for i in range(30, 0, -1)])
+    hits = index.search("петров", limit=5)
+    assert [hit["id"] for hit in hits] == [1, 2, 3, 4, 5]
+
+
+def test_prefix_spanning_many_tokens():
+    # Больше _WIDE_PREFIX токенов под префиксом — поиск идёт по объединённому постингу
+    index = _index(*[_employee(i, "Имя", "Фамилия", tg=f"@user{i}") for i in range(1, 301)])
+    # Заголовки совпадают — точное совпадение первым, дальше по id
+    assert _hits(index, "user1", limit=3) == [("employee", 1), ("employee", 10), ("employee", 11)]
+    assert "user1" in index._wide
+    index.put(_employee(1000, "Аким", "Фамилия", tg="@user1000"))
+    index.remove(search_index.EMPLOYEE, 10)
+    assert _hits(index, "user1", limit=3) == [("employee", 1), ("employee", 1000), ("employee", 11)]
+
+
+def test_substring_inside_field():
+    index = _index(_transport(1, "Газель", "А123ВС77"), _transport(2, "Газель", "К777ОР99"))
+    assert _hits(index, "23вс") == [("transport", 1)]
+    assert _hits(index, "ор9") == [("transport", 2)]
+
+
+def test_kind_filter():
+    index = _index(
+        _employee(1, "Робот", "Сергеев"),
+        search_index.robot_document(SimpleNamespace(id=7, name=1234, series=2)),
+        search_index.task_document(5, ["st.yandex-team.ru/RND-1234"]),
+    )
+    assert set(_hits(index, "1234")) == {("robot", 7), ("task", 5)}
+    assert _hits(index, "1234", kinds=[search_index.TASK]) == [("task", 5)]
+    assert _hits(index, "1234", kinds=[search_index.EMPLOYEE]) == []
+
+
+def test_all_terms_must_match_without_dropping_candidates():
+    tasks = [search_index.task_document(i, [f"st.yandex-team.ru/RND-{i}"]) for i in range(1, 3001)]
+    index = _index(*tasks, search_index.task_document(5000, ["st.yandex-team.ru/RND-5000", "wiki/incident"]))
+    # «rnd» есть во всех задачах; нужная — далеко за первой тысячей
+    assert _hits(index, "rnd incident") == [("task", 5000)]
+    assert _hits(index, "rnd 2999") == [("task", 2999)]
+    assert _hits(index, "rnd nothing") == []
+
+
+def test_writes_during_rebuild_are_replayed():
+    index = SearchIndex()
+    late = _employee(2, "Поздний", "Сотрудник")
+
+    class Query:
+        def __init__(self, rows, on_read=None):
+            self.rows, self.on_read = rows, on_read
+
+        def all(self):
+            if self.on_read:
+                self.on_read()
+            return self.rows
+
+    class Session:
+        def query(self, *entities):
+            if entities[0] is search_index.Employee:
+                # Запись закоммичена после чтения сотрудников, но до подмены индекса
+                return Query([SimpleNamespace(
+                    id=1, firstname="Ранний", lastname="Сотрудник", patronymic=None, tg=None, staff=None, body=None
+                )], on_read=lambda: index.put(late))
+            return Query([])
+
+    index.rebuild(Session())
+    assert index.loaded
+    assert _hits(index, "сотрудник") == [("employee", 2), ("employee", 1)]
+    # Буфер записей нужен только на время перестроения
+    assert index._backlog is None
+
+
+def test_search_endpoint(client, fresh_database):
+    fresh_database(3)
+    response = client.get("/api/v1/search/", params={"q": "RND-4", "kind": "task"})
+    assert response.status_code == 200
+    assert [hit["title"] for hit in response.json()] == ["st.yandex-team.ru/RND-4"]
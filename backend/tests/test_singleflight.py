@@ -0,0 +1,66 @@
+"""Single-flight дня смен: сохранённый результат и идущее вычисление не переживают записи."""
+import asyncio
+import json
+import threading
+
+import pytest
+
+from app.services import cache, invalidation
+from app.services.singleflight import SingleFlight, flights
+
+from conftest import DAY
+
+
+@pytest.fixture
+def day_ttl():
+    default, flights.default_ttl = flights.default_ttl, 60.0
+    yield
+    flights.default_ttl = default
+    flights.forget()
+
+
+def _first_task(client):
+    return client.get(f"/api/v1/shifts/date/{DAY.isoformat()}").json()[0]["tasks"][0]
+
+
+def test_local_write_forgets_saved_day(client, fresh_database, day_ttl):
+    fresh_database(3)
+    task = _first_task(client)
+    new_type = "demo" if task["type"] != "demo" else "carpet"
+
+    assert client.put(f"/api/v1/tasks/{task['id']}", json={"type": new_type}).status_code == 200
+    assert _first_task(client)["type"] == new_type
+
+
+def test_bus_message_forgets_saved_day(client, fresh_database, day_ttl):
+    fresh_database(3)
+    client.get(f"/api/v1/shifts/date/{DAY.isoformat()}")
+    assert any(key[0] == cache.DAY_VIEW for key in flights._results)
+
+    # Запись другого процесса: своё сообщение подписчик пропустил бы
+    invalidation.apply(json.dumps({"o": "other", "e": invalidation.SHIFTS, "i": [1]}).encode())
+    assert not any(key[0] == cache.DAY_VIEW for key in flights._results)
+
+
+def test_forget_detaches_running_computation():
+    group = SingleFlight(default_ttl=60.0)
+    started, release = threading.Event(), threading.Event()
+    reads = iter(["до записи", "после записи"])
+
+    def compute():
+        value = next(reads)
+        if value == "до записи":
+            started.set()
+            release.wait(5)
+        return value
+
+    async def scenario():
+        stale = asyncio.ensure_future(group.do("day", 1, compute))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        group.forget("day")
+        fresh = asyncio.ensure_future(group.do("day", 1, compute))
+        await asyncio.sleep(0)
+        release.set()
+        return await stale, await fresh, await group.do("day", 1, compute)
+
+    assert asyncio.run(scenario()) == ("до записи", "после записи", "после записи")
@@ -0,0 +1,90 @@
+"""Инкрементальная синхронизация: токен, созданные/изменённые/удалённые строки, 410 и 400."""
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.database_models import Tombstone
+from app.services import sync
+
+
+def _backdate_all() -> None:
+    # Набор данных создан только что; переносим его в прошлое, чтобы в ответ попали только изменения теста
+    long_ago = datetime.utcnow() - timedelta(hours=1)
+    db = SessionLocal()
+    try:
+        for model, _ in sync.ENTITIES.values():
+            db.execute(model.__table__.update().values(created_at=long_ago, updated_at=long_ago))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _ids(rows):
+    return sorted(row["id"] for row in rows)
+
+
+def test_initial_request_returns_only_token(client, fresh_database):
+    fresh_database(2)
+    response = client.get("/api/v1/sync/")
+    assert response.status_code == 200
+    assert response.json()["changes"] == {}
+    assert int(response.json()["token"]) > 0
+
+
+def test_changes_since_token(client, fresh_database):
+    fresh_database(3)
+    _backdate_all()
+    token = client.get("/api/v1/sync/").json()["token"]
+
+    robot = client.post("/api/v1/robots/", json={"name": 777, "series": 1}).json()
+    assert client.put("/api/v1/tasks/2", json={"type": "demo"}).status_code == 200
+    assert client.delete("/api/v1/tasks/3").status_code == 200
+    assert client.delete("/api/v1/transport/1").status_code == 200
+
+    body = client.get("/api/v1/sync/", params={"since": token}).json()
+    changes = body["changes"]
+    assert set(changes) == set(sync.ENTITIES)
+    assert _ids(changes["robots"]["created"]) == [robot["id"]]
+    assert _ids(changes["tasks"]["updated"]) == [2]
+    assert changes["tasks"]["updated"][0]["type"] == "demo"
+    assert changes["tasks"]["deleted"] == [3]
+    assert changes["transports"]["deleted"] == [1]
+    assert changes["employees"] == {"created": [], "updated": [], "deleted": []}
+
+    # Следующий токен не уходит назад; недавние изменения могут прийти повторно — применяются по id
+    assert int(body["token"]) >= int(token)
+    again = client.get("/api/v1/sync/", params={"since": body["token"]}).json()["changes"]
+    assert set(_ids(again["tasks"]["updated"])) <= {2}
+
+
+def test_bad_and_expired_tokens(client, fresh_database, monkeypatch):
+    fresh_database(2)
+    assert client.get("/api/v1/sync/", params={"since": "not-a-token"}).status_code == 400
+
+    stale = sync.encode_token(datetime.utcnow() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS + 1))
+    assert client.get("/api/v1/sync/", params={"since": stale}).status_code == 410
+
+    # Слишком много изменений одной сущности — дешевле перезагрузить всё
+    monkeypatch.setattr(settings, "SYNC_MAX_CHANGES", 2)
+    recent = sync.encode_token(datetime.utcnow() - timedelta(hours=2))
+    assert client.get("/api/v1/sync/", params={"since": recent}).status_code == 410
+
+
+def test_token_round_trip():
+    moment = datetime(2025, 10, 1, 12, 30, 15, 123456)
+    assert sync.decode_token(sync.encode_token(moment)) == moment
+
+
+def test_old_tombstones_are_purged(client, fresh_database):
+    fresh_database(2)
+    db = SessionLocal()
+    try:
+        db.add_all([
+            Tombstone(entity=sync.TASKS, entity_id=1, deleted_at=datetime.utcnow() - timedelta(days=40)),
+            Tombstone(entity=sync.TASKS, entity_id=2),
+        ])
+        db.commit()
+        assert sync.purge_tombstones(db, days=30) == 1
+        assert [t.entity_id for t in db.query(Tombstone).all()] == [2]
+    finally:
+        db.close()
@@ -0,0 +1,34 @@
+"""Сохранённые представления: чтение без изменений не пишет в БД, изменения догоняются по журналу."""
+
+
+def _writes(statements):
+    return [
+        s for s in statements
+        if s.lstrip().upper().startswith(("UPDATE", "DELETE", "INSERT")) or "FOR UPDATE" in s.upper()
+    ]
+
+
+def test_reads_without_changes_do_not_lock_or_write(client, fresh_database, count_queries):
+    fresh_database(3)
+    assert client.get("/api/v1/tables/1/rows").status_code == 200  # материализация
+
+    with count_queries() as statements:
+        response = client.get("/api/v1/tables/1/rows")
+    assert response.status_code == 200
+    assert _writes(statements) == []
+
+
+def test_changes_are_applied_once(client, fresh_database, count_queries):
+    fresh_database(3)
+    rows = client.get("/api/v1/tables/1/rows", params={"limit": 1000}).json()["rows"]
+    task_id = rows[0]["id"]
+
+    response = client.put(f"/api/v1/tasks/{task_id}", json={"type": "carpet"})
+    assert response.status_code == 200
+    rows = client.get("/api/v1/tables/1/rows", params={"limit": 1000}).json()["rows"]
+    assert next(row for row in rows if row["id"] == task_id)["type"] == "carpet"
+
+    # Изменение уже учтено — следующее чтение снова только читает
+    with count_queries() as statements:
+        assert client.get("/api/v1/tables/1/rows").status_code == 200
+    assert _writes(statements) == []
@@ -0,0 +1,69 @@
+"""TG сценарии: автомат Ахо-Корасик и сопоставление сообщений через API."""
+import random
+
+from app.services.tg_matcher import Automaton
+
+
+def _brute_force(keywords, text):
+    text = text.lower().replace("ё", "е")
+    words = list(dict.fromkeys(k.strip().lower().replace("ё", "е") for k in keywords if k.strip()))
+    return sorted(
+        (index, start + len(word))
+        for index, word in enumerate(words)
+        for start in range(len(text) - len(word) + 1)
+        if text.startswith(word, start)
+    )
+
+
+def test_overlapping_keywords_are_all_found():
+    automaton = Automaton(["he", "she", "his", "hers"])
+    matches = sorted((automaton.keywords[i], end) for i, end in automaton.iter_matches("ushers"))
+    assert matches == [("he", 4), ("hers", 6), ("she", 4)]
+
+
+def test_matches_agree_with_brute_force():
+    rng = random.Random(7)
+    for _ in range(200):
+        keywords = ["".join(rng.choice("abё") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 6))]
+        text = "".join(rng.choice("abеЁA ") for _ in range(rng.randint(0, 30)))
+        automaton = Automaton(keywords)
+        assert sorted(automaton.iter_matches(text)) == _brute_force(keywords, text)
+
+
+def test_case_yo_and_duplicates_are_normalized():
+    automaton = Automaton(["Ёлка", " ёлка ", "", "ЕЛКА"])
+    assert automaton.keywords == ["елка"]
+    assert automaton.find("Зелёная ЁЛКА") == {0}
+
+
+def _match(client, text):
+    response = client.post("/api/v1/tg-scenarios/match", json={"text": text})
+    assert response.status_code == 200
+    return [(m["scenario_id"], sorted(m["keywords"])) for m in response.json()["matches"]]
+
+
+def test_match_endpoint(client, fresh_database):
+    fresh_database(3)
+    # Сценарии набора: «робот{i}» и общее «смена»; регистр не важен
+    assert _match(client, "СМЕНА: Робот1 на месте") == [(1, ["смена"]), (2, ["робот1", "смена"]), (3, ["смена"])]
+    assert _match(client, "ничего нужного") == []
+
+    response = client.post("/api/v1/tg-scenarios/match/batch", json={"messages": ["робот2", "", "робот0 робот2"]})
+    assert [[m["scenario_id"] for m in r["matches"]] for r in response.json()] == [[3], [], [1, 3]]
+
+
+def test_scenario_writes_rebuild_matcher(client, fresh_database):
+    fresh_database(3)
+    assert _match(client, "погрузка") == []
+
+    draft = client.post("/api/v1/tg-scenarios/", json={
+        "name": "Погрузка", "trigger_keywords": ["погрузк"], "message_template": "-", "status": "draft"
+    }).json()
+    # Черновики не участвуют
+    assert _match(client, "погрузка") == []
+
+    assert client.put(f"/api/v1/tg-scenarios/{draft['id']}", json={"status": "active"}).status_code == 200
+    assert _match(client, "погрузка") == [(draft["id"], ["погрузк"])]
+
+    assert client.delete(f"/api/v1/tg-scenarios/{draft['id']}").status_code == 200
+    assert _match(client, "погрузка") == []
@@ -86,6 +86,34 @@ class ApiService {
     }
   }
 
+  /// Несколько записей одним запросом (?ids=1,2,3); ненайденные id пропускаются
+  static Future<List<Employee>> getEmployeesByIds(List<int> ids) async {
+    if (ids.isEmpty) {
+      return [];
+    }
+    try {
+      final uri = Uri.parse('$baseUrl/crews/employees').replace(
+        queryParameters: {'ids': ids.toSet().join(',')},
+      );
+
+      final response = await http.get(
+        uri,
+        headers: {
+          'Content-Type': 'application/json',
+        },
+      );
+
+      if (response.statusCode == 200) {
+        final List<dynamic> jsonList = json.decode(response.body);
+        return jsonList.map((json) => Employee.fromJson(json)).toList();
+      } else {
+        throw Exception('Failed to load employees: ${response.statusCode}');
+      }
+    } catch (e) {
+      throw Exception('Error loading employees: $e');
+    }
+  }
+
   static Future<Employee> createEmployee(Map<String, dynamic> employeeData) async {
     try {
       final response = await http.post(
@@ -247,6 +275,34 @@ class ApiService {
     }
   }
 
+  /// Несколько записей одним запросом (?ids=1,2,3); ненайденные id пропускаются
+  static Future<List<Robot>> getRobotsByIds(List<int> ids) async {
+    if (ids.isEmpty) {
+      return [];
+    }
+    try {
+      final uri = Uri.parse('$baseUrl/robots/').replace(
+        queryParameters: {'ids': ids.toSet().join(',')},
+      );
+
+      final response = await http.get(
+        uri,
+        headers: {
+          'Content-Type': 'application/json',
+        },
+      );
+
+      if (response.statusCode == 200) {
+        final List<dynamic> jsonList = json.decode(response.body);
+        return jsonList.map((json) => Robot.fromJson(json)).toList();
+      } else {
+        throw Exception('Failed to load robots: ${response.statusCode}');
+      }
+    } catch (e) {
+      throw Exception('Error loading robots: $e');
+    }
+  }
+
   static Future<Robot> createRobot(Map<String, dynamic> robotData) async {
     try {
       final response = await http.post(
@@ -372,6 +428,34 @@ class ApiService {
     }
   }
 
+  /// Несколько записей одним запросом (?ids=1,2,3); ненайденные id пропускаются
+  static Future<List<Transport>> getTransportsByIds(List<int> ids) async {
+    if (ids.isEmpty) {
+      return [];
+    }
+    try {
+      final uri = Uri.parse('$baseUrl/transport/').replace(
+        queryParameters: {'ids': ids.toSet().join(',')},
+      );
+
+      final response = await http.get(
+        uri,
+        headers: {
+          'Content-Type': 'application/json',
+        },
+      );
+
+      if (response.statusCode == 200) {
+        final List<dynamic> jsonList = json.decode(response.body);
+        return jsonList.map((json) => Transport.fromJson(json)).toList();
+      } else {
+        throw Exception('Failed to load transports: ${response.statusCode}');
+      }
+    } catch (e) {
+      throw Exception('Error loading transports: $e');
+    }
+  }
+
   static Future<Transport> createTransport(Map<String, dynamic> transportData) async {
     try {
       final response = await http.post(
@@ -460,6 +544,73 @@ class ApiService {
     }
   }
 
+  static String? _bootstrapUri;
+  static String? _bootstrapEtag;
+  static Map<String, dynamic>? _bootstrapSnapshot;
+
+  /// Снимок для старта одним запросом: сотрудники, должности, команды, роботы,
+  /// транспорт и смены за дату. Повторный запрос с If-None-Match при неизменных
+  /// данных получает 304, и возвращается сохранённый снимок.
+  static Future<Map<String, dynamic>> getBootstrap({DateTime? date}) async {
+    final queryParams = <String, String>{};
+    if (date != null) {
+      queryParams['date'] = DateTime(date.year, date.month, date.day).toIso8601String();
+    }
+    final uri = Uri.parse('$baseUrl/bootstrap/').replace(queryParameters: queryParams);
+    final requestKey = uri.toString();
+
+    final headers = {
+      'Content-Type': 'application/json',
+    };
+    if (_bootstrapEtag != null && _bootstrapUri == requestKey) {
+      headers['If-None-Match'] = _bootstrapEtag!;
+    }
+
+    final response = await http.get(uri, headers: headers).timeout(const Duration(seconds: 10));
+
+    if (response.statusCode == 304 && _bootstrapUri == requestKey && _bootstrapSnapshot != null) {
+      return _bootstrapSnapshot!;
+    }
+    if (response.statusCode == 200) {
+      final Map<String, dynamic> snapshot = json.decode(response.body);
+      _bootstrapUri = requestKey;
+      _bootstrapEtag = response.headers['etag'];
+      _bootstrapSnapshot = snapshot;
+      return snapshot;
+    }
+    throw Exception('Failed to load bootstrap: ${response.statusCode}');
+  }
+
+  /// Изменения с токена since: {token, changes: {сущность: {created, updated, deleted}}}.
+  /// Без since возвращается только начальный токен; следующий вызов — с token из ответа.
+  /// При 410 токен устарел, данные нужно перезагрузить целиком (getBootstrap и списки).
+  static Future<Map<String, dynamic>> getChanges({String? since}) async {
+    final uri = Uri.parse('$baseUrl/sync/').replace(
+      queryParameters: since != null ? {'since': since} : null,
+    );
+
+    final response = await http.get(
+      uri,
+      headers: {
+        'Content-Type': 'application/json',
+      },
+    );
+
+    if (response.statusCode == 200) {
+      return json.decode(response.body);
+    } else if (response.statusCode == 410) {
+      throw SyncExpiredException(response.body);
+    } else {
+      throw Exception('Failed to sync: ${response.statusCode}');
+    }
+  }
+
+  /// Первая смена из снимка getBootstrap (null, если смен за дату нет)
+  static Shift? shiftFromBootstrap(Map<String, dynamic> snapshot) {
+    final List<dynamic> shifts = snapshot['shifts'] ?? [];
+    return shifts.isEmpty ? null : Shift.fromJson(shifts.first);
+  }
+
   static Future<Shift?> getShiftByDate(DateTime date) async {
     try {
       // FastAPI expects full datetime format with T separator
@@ -775,3 +926,13 @@ class ApiService {
     }
   }
 }
+
+/// Токен синхронизации устарел — нужна полная перезагрузка данных
+class SyncExpiredException implements Exception {
+  final String message;
+
+  SyncExpiredException(this.message);
+
+  @override
+  String toString() => 'SyncExpiredException: $message';
+}
@@ -44,9 +44,11 @@ class _ShiftsPageState extends State<ShiftsPage> {
     });
 
     try {
-      // First check server connection
-      final isConnected = await ApiService.testConnection();
-      if (!isConnected) {
+      // One round trip: the bootstrap snapshot doubles as the connection check
+      final Shift? currentShift;
+      try {
+        currentShift = ApiService.shiftFromBootstrap(await ApiService.getBootstrap(date: date));
+      } catch (e) {
         if (mounted) {
           setState(() {
             _isLoading = false;
@@ -56,8 +58,7 @@ class _ShiftsPageState extends State<ShiftsPage> {
         return;
       }
 
-      // Load current date and cache
-      final currentShift = await ApiService.getShiftByDate(date);
+      // Cache current date
       _shiftCache[_dateKey(date)] = currentShift;
       
       // Preload adjacent days in background